@@ -4,6 +4,7 @@ from database import supabase
 from ldap import ldap_authenticate
 from routes.user_routes import check_user_by_email_supabase
 from services.auth_service import AuthService
+from services.group_service import invalidate_user_groups
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -31,6 +32,8 @@ def login():
             session['user_email'] = email
             session['user_id'] = user_id
             session['auth_source'] = auth_source
+            # Przypisania do grup mogły się zmienić od poprzedniego logowania
+            invalidate_user_groups(user_id)
             
             next_url = session.pop('next_url', None)
             return jsonify({
@@ -50,6 +53,8 @@ def login():
 
 @auth_bp.route('/logout')
 def logout():
+    if 'user_id' in session:
+        invalidate_user_groups(session['user_id'])
     session.clear()
     return jsonify({
         'success': True,
@@ -1,9 +1,10 @@
 import secrets
 from flask import Blueprint, render_template, request, jsonify, current_app, session
 from routes.auth_routes import login_required
+from services.group_service import get_user_groups
 from services.candidate_service import CandidateService, CandidateException
 from services.campaign_service import CampaignService, CampaignException
-from services.group_service import get_user_groups
+from services.test_service import TestService
 from common.logger import Logger
 from common.recalculation_score_service import RecalculationScoreService
 from common.email_service import EmailService
@@ -33,28 +34,34 @@ def list():
         campaign_codes = [c for c in campaign_codes if c]
         statuses = [s for s in statuses if s]
         
-        # Get user's groups
-        user_id = session.get('user_id')
-        user_groups = get_user_groups(user_id)
-        user_group_ids = [group['id'] for group in user_groups]
-        
-        candidates = CandidateService.get_candidates(
-            user_group_ids=user_group_ids,
+        page = CandidateService.get_candidates(
+            user_id=session.get('user_id'),
             campaign_codes=campaign_codes,
             statuses=statuses,
-            sort_by=request.args.get("sort_by", "created_at"),
+            # Wyniki wyszukiwania domyślnie od najbardziej trafnych
+            sort_by=request.args.get("sort_by", "relevance" if search else "created_at"),
             sort_order=request.args.get("sort_order", "desc"),
-            search=search
+            search=search,
+            page_size=request.args.get("page_size", type=int),
+            cursor=request.args.get("cursor") or None,
+            include_total=True
         )
         
         # Dodajmy logowanie aby sprawdzić dane kampanii
         campaigns = CampaignService.get_campaigns_for_dropdown()
         logger.debug(f"Kampanie przekazane do widoku: {campaigns}")
         
+        # Testy dostępne w zakresie zbiorczego przeliczania punktów
+        user_group_ids = [group['id'] for group in get_user_groups(session.get('user_id'))]
+        tests = TestService.get_tests_for_groups(user_group_ids) if user_group_ids else []
+        
         return render_template(
             "candidates/list.html",
-            candidates=candidates,
-            campaigns=campaigns
+            candidates=page["candidates"],
+            next_cursor=page["next_cursor"],
+            total_count=page["total"],
+            campaigns=campaigns,
+            tests=tests
         )
         
     except CandidateException as e:
@@ -164,6 +171,30 @@ def next_stage(id):
         return jsonify({"success": False, "error": e.message})
 
 
+@candidate_bp.route("/next-stage", methods=["POST"])
+@login_required
+def bulk_next_stage():
+    try:
+        data = request.get_json() or {}
+        
+        # Kandydaci są wybierani w bazie według filtrów listy, a nie z wczytanej strony
+        result = CandidateService.bulk_move_to_next_stage(
+            user_id=session.get('user_id'),
+            campaign_codes=data.get('campaigns') or [],
+            statuses=data.get('statuses') or [],
+            search=(data.get('search') or '').strip()
+        )
+        return jsonify({"success": True, **result})
+        
+    except CandidateException as e:
+        return jsonify({"success": False, "error": e.message}), 400
+    except Exception as e:
+        return jsonify({
+            "success": False, 
+            "error": "Wystąpił nieznany błąd podczas przenoszenia kandydatów do kolejnego etapu"
+        }), 500
+
+
 @candidate_bp.route("/<int:id>/reject", methods=["POST"])
 @login_required
 def reject(id):
@@ -386,6 +417,72 @@ def recalculate_scores(id):
         }), 500
 
 
+@candidate_bp.route("/recalculate", methods=["POST"])
+@login_required
+def create_recalculation_job():
+    try:
+        data = request.get_json() or {}
+        candidate_ids = [int(candidate_id) for candidate_id in data.get('candidate_ids') or []]
+        
+        # Zakres "filtry listy" obejmuje wszystkich pasujących kandydatów, nie tylko wczytane strony
+        filters = data.get('filters')
+        if filters:
+            candidate_ids = CandidateService.get_filtered_candidate_ids(
+                user_id=session['user_id'],
+                campaign_codes=filters.get('campaigns') or [],
+                statuses=filters.get('statuses') or [],
+                search=(filters.get('search') or '').strip()
+            )
+        
+        job = CandidateService.create_recalculation_job(
+            user_id=session['user_id'],
+            candidate_ids=candidate_ids,
+            campaign_id=data.get('campaign_id'),
+            test_id=data.get('test_id')
+        )
+        return jsonify({"success": True, "job_id": job['id']})
+        
+    except CandidateException as e:
+        return jsonify({"success": False, "error": e.message}), 400
+    except Exception as e:
+        return jsonify({
+            "success": False, 
+            "error": "Wystąpił nieznany błąd podczas zlecania przeliczenia punktów"
+        }), 500
+
+
+@candidate_bp.route("/recalculate/<int:job_id>", methods=["GET"])
+@login_required
+def get_recalculation_job(job_id):
+    try:
+        job = CandidateService.get_recalculation_job(job_id)
+        return jsonify({"success": True, "job": job})
+        
+    except CandidateException as e:
+        return jsonify({"success": False, "error": e.message}), 404
+    except Exception as e:
+        return jsonify({
+            "success": False, 
+            "error": "Wystąpił nieznany błąd podczas pobierania stanu przeliczania"
+        }), 500
+
+
+@candidate_bp.route("/recalculate/<int:job_id>/cancel", methods=["POST"])
+@login_required
+def cancel_recalculation_job(job_id):
+    try:
+        CandidateService.cancel_recalculation_job(job_id)
+        return jsonify({"success": True})
+        
+    except CandidateException as e:
+        return jsonify({"success": False, "error": e.message}), 404
+    except Exception as e:
+        return jsonify({
+            "success": False, 
+            "error": "Wystąpił nieznany błąd podczas anulowania przeliczania"
+        }), 500
+
+
 @candidate_bp.route("/<int:id>/regenerate-token/<stage>", methods=["POST"])
 @login_required
 def regenerate_token(id, stage):
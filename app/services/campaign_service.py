@@ -4,6 +4,8 @@ from common.logger import Logger
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple, Union
 import secrets
+from common.config import Config
+from common.email_templates import EmailTemplateCache
 
 logger = Logger.instance()
 
@@ -226,6 +228,8 @@ class CampaignService:
                 .update(campaign_data)\
                 .eq('id', campaign_id)\
                 .execute()
+            # Formularz kampanii zmienia także szablon zaproszenia na rozmowę
+            EmailTemplateCache.instance().invalidate(('interview_email_template', campaign_id))
 
             # Update group association
             supabase.from_('link_groups_campaigns')\
@@ -314,7 +318,7 @@ class CampaignService:
     def get_campaigns_for_dropdown():
         try:
             result = supabase.from_("campaigns")\
-                .select("code, title, is_active")\
+                .select("id, code, title, is_active")\
                 .order("created_at", desc=True)\
                 .execute()
                 
@@ -346,6 +350,12 @@ class CampaignService:
             CampaignException: Gdy wystąpi błąd podczas pobierania szablonu
         """
         try:
+            cache = EmailTemplateCache.instance()
+            cached = cache.get(('interview_email_template', campaign_id))
+            if cached is not None:
+                logger.debug(f"Szablon email dla kampanii {campaign_id} pobrany z cache")
+                return dict(cached)
+            
             logger.info(f"Pobieranie szablonu email dla kampanii {campaign_id}")
             
             result = supabase.from_('campaigns')\
@@ -366,10 +376,16 @@ class CampaignService:
             logger.info(f"Pobrano szablon dla kampanii {campaign_id}")
             logger.debug(f"Zawartość szablonu: {json.dumps(template, indent=2)}")
             
-            return {
+            template = {
                 'subject': template.get('interview_email_subject', ''),
                 'content': template.get('interview_email_content', '')
             }
+            cache.put(
+                ('interview_email_template', campaign_id),
+                template,
+                ttl_seconds=Config.instance().EMAIL_TEMPLATE_CACHE_TTL_SECONDS
+            )
+            return dict(template)
                 
         except Exception as e:
             logger.error(f"Błąd podczas pobierania szablonu email dla kampanii {campaign_id}: {str(e)}")
@@ -409,6 +425,7 @@ class CampaignService:
                 .execute()
                 
             logger.debug(f"Wynik aktualizacji dla kampanii {campaign_id}: {json.dumps(result.data, indent=2)}")
+            EmailTemplateCache.instance().invalidate(('interview_email_template', campaign_id))
             logger.info(f"Pomyślnie zaktualizowano szablon dla kampanii {campaign_id}")
                 
         except Exception as e:
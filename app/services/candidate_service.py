@@ -1,13 +1,18 @@
 from common.openai_service import OpenAIService
+from common.ai_evaluation_cache import AIEvaluationCache
 from common.test_score_service import TestScoreService
 from database import supabase
 from common.logger import Logger
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Tuple, Union
 from zoneinfo import ZoneInfo
+import base64
+import json
 import secrets
+import time
 from common.config import Config
 from common.email_service import EmailService
+from common.email_outbox import EmailOutbox
 from common.recalculation_score_service import RecalculationScoreService
 
 logger = Logger.instance()
@@ -22,79 +27,111 @@ class CandidateException(Exception):
 
 
 class CandidateService:
+    # Statusy, z których kandydaci mogą zostać przeniesieni zbiorczo (odrzuceni wymagają decyzji dla każdego z osobna),
+    # wraz z kolumną wyniku etapu i kolumną kampanii wskazującą test etapu
+    BULK_STAGE_TESTS = {
+        "PO1": ("po1_score", "po1_test_id"),
+        "PO2": ("po2_score", "po2_test_id"),
+        "PO3": ("po3_score", "po3_test_id")
+    }
+    # Liczba ID kandydatów w jednym zapytaniu in_ (ogranicza długość adresu zapytania)
+    BULK_FETCH_CHUNK_SIZE = 200
+    # Kolumny, po których lista może być sortowana i stronicowana
+    LIST_SORT_COLUMNS = (
+        "created_at", "first_name", "last_name", "email", "phone", "recruitment_status",
+        "po1_score", "po2_score", "po2_5_score", "po3_score", "po4_score", "total_score",
+        "relevance"
+    )
+    LIST_MAX_PAGE_SIZE = 500
+
     @staticmethod
     def get_candidates(
-        user_group_ids: List[int],
+        user_id: int,
         campaign_codes: List[str] = None,
         statuses: List[str] = None,
         sort_by: str = "created_at",
         sort_order: str = "desc",
-        search: str = ""
-    ) -> List[Dict]:
+        search: str = "",
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = False
+    ) -> Dict:
         """
-        Pobiera listę kandydatów z możliwością filtrowania i sortowania.
+        Pobiera stronę listy kandydatów z możliwością filtrowania i sortowania.
+        Dostęp przez grupy użytkownika, filtry, sortowanie i stronicowanie są wykonywane
+        w bazie jednym wywołaniem get_user_candidates. Kolejne strony są pobierane kursorem
+        (keyset) na kolumnie sortowania i ID kandydata, więc koszt pobrania strony nie zależy od jej numeru.
         
         Args:
-            user_group_ids (List[int]): Lista ID grup do których należy użytkownik
+            user_id (int): ID użytkownika - zwracani są kandydaci kampanii jego grup
             campaign_codes (List[str]): Lista kodów kampanii do filtrowania
             statuses (List[str]): Lista statusów rekrutacji do filtrowania
-            sort_by (str): Pole po którym sortować
+            sort_by (str): Pole po którym sortować lub relevance (trafność wyszukiwania)
             sort_order (str): Kierunek sortowania (asc/desc)
-            search (str): Fraza do wyszukiwania
+            search (str): Fraza wyszukiwana w imieniu, nazwisku, emailu i telefonie (indeks trigramowy)
+            page_size (Optional[int]): Liczba kandydatów na stronie (domyślnie CANDIDATES_PAGE_SIZE)
+            cursor (Optional[str]): Kursor zwrócony z poprzednią stroną lub None (pierwsza strona)
+            include_total (bool): Czy policzyć wszystkich pasujących kandydatów (tylko dla pierwszej strony)
             
         Returns:
-            List[Dict]: Lista kandydatów
+            Dict: candidates (lista kandydatów), next_cursor (kursor następnej strony lub None)
+                oraz total (liczba pasujących kandydatów lub None)
             
         Raises:
             CandidateException: Gdy wystąpi błąd podczas pobierania kandydatów
         """
+        count_total = include_total and not cursor
         try:
             # Jeśli nie wybrano żadnej kampanii lub statusu, zwróć pustą listę
             if not campaign_codes or not statuses:
-                return []
-
-            # If no groups assigned, return empty list
-            if not user_group_ids:
-                return []
-
-            # Get campaign IDs that user has access to
-            campaign_access = supabase.from_("link_groups_campaigns")\
-                .select("campaign_id")\
-                .in_("group_id", user_group_ids)\
-                .execute()
-            campaign_ids = [item['campaign_id'] for item in campaign_access.data]
-            
-            # If no campaigns accessible, return empty list
-            if not campaign_ids:
-                return []
+                return {"candidates": [], "next_cursor": None, "total": 0 if count_total else None}
 
-            # Build query for candidates with campaign data
-            query = supabase.from_("candidates").select("*, campaigns!inner(*)")
+            search = (search or "").strip()
+            if sort_by not in CandidateService.LIST_SORT_COLUMNS or (sort_by == "relevance" and not search):
+                sort_by = "created_at"
+            descending = sort_order == "desc"
+            page_size = max(1, min(int(page_size or Config.instance().CANDIDATES_PAGE_SIZE), CandidateService.LIST_MAX_PAGE_SIZE))
 
-            # Filter by user's campaign access
-            query = query.in_("campaign_id", campaign_ids)
+            # Continue after the last candidate of the previous page
+            position = CandidateService._decode_cursor(cursor, sort_by, descending)
 
-            # Apply campaign codes filter
-            query = query.in_("campaigns.code", campaign_codes)
-
-            # Apply status filter
-            query = query.in_("recruitment_status", statuses)
-
-            # Apply search if provided
-            if search:
-                search_pattern = f"%{search.lower()}%"
-                query = query.or_(
-                    f"first_name.ilike.{search_pattern},"
-                    f"last_name.ilike.{search_pattern},"
-                    f"email.ilike.{search_pattern},"
-                    f"phone.ilike.{search_pattern}"
-                )
-
-            # Apply sorting
-            query = query.order(sort_by, desc=(sort_order == "desc"))
-
-            result = query.execute()
-            return result.data
+            # One extra row tells whether there is a next page
+            result = supabase.rpc("get_user_candidates", {
+                "p_user_id": user_id,
+                "p_campaign_codes": campaign_codes,
+                "p_statuses": statuses,
+                "p_search": search or None,
+                "p_sort_by": sort_by,
+                "p_sort_desc": descending,
+                "p_after_id": position["id"] if position else None,
+                "p_after_value": str(position["value"]) if position and position["value"] is not None else None,
+                "p_limit": page_size + 1,
+                "p_include_total": count_total
+            }).execute()
+            rows = result.data or []
+            
+            total = None
+            if count_total:
+                total = rows[0]["total_count"] if rows else 0
+            
+            candidates = []
+            for row in rows[:page_size]:
+                row.pop("total_count", None)
+                # Widok listy odwołuje się do kampanii jak w zapytaniu z osadzoną tabelą campaigns
+                row["campaigns"] = {"code": row.pop("campaign_code")}
+                candidates.append(row)
+            
+            next_cursor = None
+            if len(rows) > page_size:
+                last = candidates[-1]
+                sort_value = last["search_rank"] if sort_by == "relevance" else last[sort_by]
+                next_cursor = CandidateService._encode_cursor(sort_by, descending, sort_value, last["id"])
+            
+            return {
+                "candidates": candidates,
+                "next_cursor": next_cursor,
+                "total": total
+            }
 
         except Exception as e:
             logger.error(f"Błąd podczas pobierania kandydatów: {str(e)}")
@@ -103,6 +140,25 @@ class CandidateService:
                 original_error=e
             )
 
+    @staticmethod
+    def _encode_cursor(sort_by: str, descending: bool, value, candidate_id: int) -> str:
+        payload = json.dumps({"sort": sort_by, "desc": descending, "value": value, "id": candidate_id})
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str], sort_by: str, descending: bool) -> Optional[Dict]:
+        """Zwraca pozycję z kursora lub None, gdy kursor jest pusty, uszkodzony albo dotyczy innego sortowania"""
+        if not cursor:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if position["sort"] != sort_by or position["desc"] != descending:
+                logger.warning("Kursor listy kandydatów dotyczy innego sortowania - pobieranie od początku")
+                return None
+            return {"value": position["value"], "id": int(position["id"])}
+        except Exception as e:
+            logger.warning(f"Nieprawidłowy kursor listy kandydatów: {str(e)}")
+            return None
 
     @staticmethod
     def get_candidate_details(candidate_id: int) -> Dict:
@@ -286,42 +342,11 @@ class CandidateService:
                 logger.warning(f"Nie znaleziono kandydata {candidate_id}")
                 raise CandidateException(message="Nie znaleziono kandydata")
                 
-            current_status = candidate.data["recruitment_status"]
-            logger.debug(f"Obecny status kandydata {candidate_id}: {current_status}")
-            campaign = candidate.data["campaigns"]
-            
-            # If candidate is rejected, determine their last completed stage
-            if current_status == "REJECTED":
-                if candidate.data["po3_score"] is not None:
-                    current_status = "PO3"
-                elif candidate.data["po2_score"] is not None:
-                    current_status = "PO2"
-                elif candidate.data["po1_score"] is not None:
-                    current_status = "PO1"
-                else:
-                    raise CandidateException(message="Nie można określić ostatniego ukończonego etapu")
-            
-            # Define next stage based on current status
-            if current_status == "PO1":
-                next_status = "PO2"
-                test_id = campaign.get("po2_test_id")
-            elif current_status == "PO2":
-                next_status = "PO3"
-                test_id = campaign.get("po3_test_id")
-            elif current_status == "PO3":
-                next_status = "PO4"
-                test_id = None
-            else:
-                raise CandidateException(message="Nieprawidłowy obecny etap")
-
-            logger.debug(f"Przygotowanie aktualizacji dla kandydata {candidate_id}")
-            updates = {
-                "recruitment_status": next_status,
-                'updated_at': datetime.now(timezone.utc).isoformat()
-            }
+            logger.debug(f"Obecny status kandydata {candidate_id}: {candidate.data['recruitment_status']}")
+            next_status, updates, emails = CandidateService._prepare_next_stage(candidate.data)
             
             # Dla PO4 tylko aktualizujemy status
-            if next_status == "PO4":
+            if not emails:
                 supabase.from_("candidates")\
                     .update(updates)\
                     .eq("id", candidate_id)\
@@ -329,50 +354,10 @@ class CandidateService:
                 logger.info(f"Kandydat {candidate_id} został przeniesiony do etapu {next_status}")
                 return
             
-            # Dla PO2 i PO3 generujemy token i wysyłamy maila
-            if next_status in ["PO2", "PO3"]:
-                if not test_id:
-                    raise CandidateException(
-                        message=f"Brak skonfigurowanego testu dla etapu {next_status}"
-                    )
-                
-                logger.debug(f"Generowanie tokenu dla kandydata {candidate_id}")
-                
-                # Get token expiry days from campaign
-                expiry_days = campaign.get(f'po{next_status[-1]}_token_expiry_days', 7)
-                
-                # Generate token and prepare updates
-                current_time = datetime.now()
-                token_expiry = (current_time + timedelta(days=expiry_days)).replace(hour=23, minute=59, second=59)
-                token = secrets.token_urlsafe(32)
-                
-                updates.update({
-                    f'access_token_{next_status.lower()}': token,
-                    f'access_token_{next_status.lower()}_expires_at': token_expiry.isoformat(),
-                    f'access_token_{next_status.lower()}_is_used': False
-                })
-                
-                # Update candidate in database
-                supabase.from_("candidates")\
-                    .update(updates)\
-                    .eq("id", candidate_id)\
-                    .execute()
-                    
-                # Send email with test link
-                logger.info(f"Wysyłanie emaila do kandydata {candidate_id}")
-                try:
-                    CandidateService._send_test_email(
-                        candidate_data=candidate.data,
-                        token=token,
-                        current_status=current_status,
-                        next_status=next_status,
-                        token_expiry=token_expiry,
-                        smtp_config=smtp_config
-                    )
-                    logger.info(f"Email został wysłany do kandydata {candidate_id}")
-                except Exception as e:
-                    logger.error(f"Błąd podczas wysyłania emaila do kandydata {candidate_id}: {str(e)}")
-                    raise CandidateException(message="Nie udało się wysłać emaila z dostępem do testu")
+            # Token i email z linkiem do testu są zapisywane w jednej transakcji,
+            # a wiadomość wysyła w tle cron/email_sender.py
+            EmailOutbox(supabase).update_candidate_and_enqueue(candidate_id, updates, emails)
+            logger.info(f"Email z dostępem do testu dla kandydata {candidate_id} został dodany do kolejki")
             
             logger.info(f"Kandydat {candidate_id} został przeniesiony do etapu {next_status}")
                 
@@ -387,71 +372,302 @@ class CandidateService:
 
 
     @staticmethod
-    def _send_test_email(
-        candidate_data: Dict,
-        token: str,
-        current_status: str,
-        next_status: str,
-        token_expiry: datetime,
-        smtp_config: Dict
-    ) -> None:
+    def get_filtered_candidate_ids(
+        user_id: int,
+        campaign_codes: List[str],
+        statuses: List[str],
+        search: str = ""
+    ) -> List[int]:
         """
-        Wysyła email z linkiem do testu.
+        Zwraca ID wszystkich kandydatów spełniających filtry listy (nie tylko wczytanej strony).
+        Kandydaci są pobierani tym samym zapytaniem co lista, kolejnymi stronami o maksymalnym rozmiarze.
         
         Args:
-            candidate_data (Dict): Dane kandydata
-            token (str): Token dostępu
-            current_status (str): Obecny status
-            next_status (str): Następny status
-            token_expiry (datetime): Data wygaśnięcia tokenu
-            smtp_config (Dict): Konfiguracja SMTP
+            user_id (int): ID użytkownika - zwracani są kandydaci kampanii jego grup
+            campaign_codes (List[str]): Lista kodów kampanii do filtrowania
+            statuses (List[str]): Lista statusów rekrutacji do filtrowania
+            search (str): Fraza wyszukiwana w imieniu, nazwisku, emailu i telefonie
+            
+        Returns:
+            List[int]: Lista ID kandydatów
+            
+        Raises:
+            CandidateException: Gdy wystąpi błąd podczas pobierania kandydatów
+        """
+        candidate_ids = []
+        cursor = None
+        while True:
+            page = CandidateService.get_candidates(
+                user_id=user_id,
+                campaign_codes=campaign_codes,
+                statuses=statuses,
+                search=search,
+                page_size=CandidateService.LIST_MAX_PAGE_SIZE,
+                cursor=cursor
+            )
+            candidate_ids.extend(candidate["id"] for candidate in page["candidates"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return candidate_ids
+
+
+    @staticmethod
+    def bulk_move_to_next_stage(
+        user_id: int,
+        campaign_codes: List[str],
+        statuses: List[str],
+        search: str = ""
+    ) -> Dict:
+        """
+        Przenosi do następnego etapu rekrutacji wszystkich kandydatów spełniających filtry listy.
+        Przenoszeni są tylko kandydaci na etapach PO1, PO2 i PO3, których wynik obecnego etapu
+        osiąga próg zaliczenia testu tego etapu - pozostali są zwracani jako pominięci. Tokeny
+        wszystkich kandydatów są zapisywane jednym wywołaniem bazy danych, razem z zaproszeniami
+        dodawanymi do kolejki email_outbox. Zapis jest warunkowy - kandydaci, których status zmienił się
+        po odczycie (odrzuceni przez rekrutera lub przeniesieni przez cron), są pomijani.
+        
+        Args:
+            user_id (int): ID użytkownika - przenoszeni są tylko kandydaci kampanii jego grup
+            campaign_codes (List[str]): Lista kodów kampanii do filtrowania
+            statuses (List[str]): Lista statusów rekrutacji do filtrowania
+            search (str): Fraza wyszukiwana w imieniu, nazwisku, emailu i telefonie
+            
+        Returns:
+            Dict: Liczba przeniesionych kandydatów i wiadomości, pominięci kandydaci oraz przepustowość
             
         Raises:
-            CandidateException: Gdy wystąpi błąd podczas wysyłania emaila
+            CandidateException: Gdy nie wybrano kampanii lub etapu albo wystąpi błąd zapisu
         """
+        # Kandydaci odrzuceni i na pozostałych etapach nie są przenoszeni zbiorczo
+        statuses = [status for status in statuses or [] if status in CandidateService.BULK_STAGE_TESTS]
+        if not campaign_codes or not statuses:
+            raise CandidateException(message="Wybierz kampanię oraz etap PO1, PO2 lub PO3")
+        
+        started_at = time.monotonic()
         try:
-            # Create EmailService instance
-            config = Config.instance()
-            email_service = EmailService(config)
+            candidate_ids = CandidateService.get_filtered_candidate_ids(user_id, campaign_codes, statuses, search)
             
-            # Format expiry date
-            formatted_expiry = token_expiry.astimezone(ZoneInfo("Europe/Warsaw")).strftime("%Y-%m-%d %H:%M")
+            candidates = []
+            for i in range(0, len(candidate_ids), CandidateService.BULK_FETCH_CHUNK_SIZE):
+                candidates.extend(
+                    supabase.from_("candidates")\
+                        .select("*, campaigns(*)")\
+                        .in_("id", candidate_ids[i:i + CandidateService.BULK_FETCH_CHUNK_SIZE])\
+                        .execute().data or []
+                )
             
-            # Generate test URL
-            test_url = f"{config.BASE_URL.rstrip('/')}/test/candidate/{token}"
+            # Progi zaliczenia testów obecnych etapów kandydatów
+            test_ids = {
+                candidate["campaigns"].get(CandidateService.BULK_STAGE_TESTS[candidate["recruitment_status"]][1])
+                for candidate in candidates
+                if candidate["recruitment_status"] in CandidateService.BULK_STAGE_TESTS
+            }
+            test_ids.discard(None)
+            thresholds = {}
+            if test_ids:
+                tests = supabase.from_("tests")\
+                    .select("id, passing_threshold")\
+                    .in_("id", list(test_ids))\
+                    .execute()
+                thresholds = {test["id"]: test["passing_threshold"] for test in tests.data or []}
+            
+            items = []
+            skipped = []
+            for candidate in candidates:
+                stage = candidate["recruitment_status"]
+                if stage not in CandidateService.BULK_STAGE_TESTS:
+                    # Status zmienił się od pobrania listy
+                    skipped.append({"id": candidate["id"], "reason": "Nieprawidłowy obecny etap"})
+                    continue
+                score_column, test_column = CandidateService.BULK_STAGE_TESTS[stage]
+                score = candidate[score_column]
+                threshold = thresholds.get(candidate["campaigns"].get(test_column))
+                if threshold is None:
+                    skipped.append({"id": candidate["id"], "reason": f"Brak skonfigurowanego testu dla etapu {stage}"})
+                    continue
+                if score is None:
+                    skipped.append({"id": candidate["id"], "reason": f"Brak wyniku etapu {stage}"})
+                    continue
+                if score < threshold:
+                    skipped.append({"id": candidate["id"], "reason": f"Wynik {score} poniżej progu {threshold}"})
+                    continue
+                try:
+                    _, updates, emails = CandidateService._prepare_next_stage(candidate)
+                except CandidateException as e:
+                    skipped.append({"id": candidate["id"], "reason": e.message})
+                    continue
+                # Zapis jest warunkowy - nie nadpisuje odrzucenia ani przeniesienia wykonanego w międzyczasie
+                items.append({
+                    "candidate_id": candidate["id"],
+                    "expected_status": stage,
+                    "updates": updates,
+                    "emails": emails
+                })
+            
+            moved = len(items)
+            enqueued = 0
+            if items:
+                saved = EmailOutbox(supabase).advance_candidates_and_enqueue(items)
+                enqueued = saved["enqueued"]
+                moved -= len(saved["skipped"])
+                skipped.extend(
+                    {"id": candidate_id, "reason": "Status kandydata zmienił się w trakcie przenoszenia"}
+                    for candidate_id in saved["skipped"]
+                )
             
-            # Map status to stage name
-            stage_names = {
-                'PO1': 'Test kwalifikacyjny',
-                'PO2': 'Test kompetencji',
-                'PO3': 'Test końcowy'
+            elapsed_seconds = round(time.monotonic() - started_at, 3)
+            result = {
+                "moved": moved,
+                "enqueued": enqueued,
+                "skipped": skipped,
+                "elapsed_seconds": elapsed_seconds,
+                "per_second": round(moved / elapsed_seconds, 1) if elapsed_seconds else None
             }
-            stage_name = stage_names.get(next_status, f'Test {next_status}')
-            
-            # Get campaign title
-            campaign_title = candidate_data.get('campaigns', {}).get('title', 'Rekrutacja')
-            
-            # Send email using EmailService
-            success = email_service.send_test_invitation(
-                to_email=candidate_data["email"],
-                stage_name=stage_name,
-                campaign_title=campaign_title,
-                test_url=test_url,
-                expiry_date=formatted_expiry,
-                test_details=None  # We don't have test details at this point
+            logger.info(
+                f"Przeniesiono {result['moved']} kandydatów do następnego etapu "
+                f"(wiadomości w kolejce: {enqueued}, pominięci: {len(skipped)}, "
+                f"czas: {elapsed_seconds}s, kandydatów/s: {result['per_second']})"
             )
+            return result
             
-            if not success:
-                raise CandidateException(message="Nie udało się wysłać emaila z dostępem do testu")
-                
         except Exception as e:
-            logger.error(f"Błąd podczas wysyłania emaila do kandydata: {str(e)}")
+            logger.error(f"Błąd podczas przenoszenia kandydatów do następnego etapu: {str(e)}")
             raise CandidateException(
-                message="Nie udało się wysłać emaila z dostępem do testu",
+                message="Wystąpił błąd podczas przenoszenia kandydatów do następnego etapu",
                 original_error=e
             )
 
 
+    @staticmethod
+    def _prepare_next_stage(candidate_data: Dict) -> Tuple[str, Dict, List[Dict]]:
+        """
+        Wyznacza następny etap kandydata oraz przygotowuje zmiany i wiadomości.
+        Dla etapów PO2 i PO3 generowany jest token dostępu do testu.
+        
+        Args:
+            candidate_data (Dict): Dane kandydata wraz z kampanią (klucz campaigns)
+            
+        Returns:
+            Tuple[str, Dict, List[Dict]]: Następny status, zmiany w tabeli candidates
+                i wiadomości do zapisania w kolejce email_outbox
+            
+        Raises:
+            CandidateException: Gdy nie można ustalić następnego etapu
+        """
+        current_status = candidate_data["recruitment_status"]
+        campaign = candidate_data["campaigns"]
+        
+        # If candidate is rejected, determine their last completed stage
+        if current_status == "REJECTED":
+            if candidate_data["po3_score"] is not None:
+                current_status = "PO3"
+            elif candidate_data["po2_score"] is not None:
+                current_status = "PO2"
+            elif candidate_data["po1_score"] is not None:
+                current_status = "PO1"
+            else:
+                raise CandidateException(message="Nie można określić ostatniego ukończonego etapu")
+        
+        # Define next stage based on current status
+        if current_status == "PO1":
+            next_status = "PO2"
+            test_id = campaign.get("po2_test_id")
+        elif current_status == "PO2":
+            next_status = "PO3"
+            test_id = campaign.get("po3_test_id")
+        elif current_status == "PO3":
+            next_status = "PO4"
+            test_id = None
+        else:
+            raise CandidateException(message="Nieprawidłowy obecny etap")
+
+        updates = {
+            "recruitment_status": next_status,
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }
+        
+        # Dla PO4 tylko aktualizujemy status
+        if next_status == "PO4":
+            return next_status, updates, []
+        
+        # Dla PO2 i PO3 generujemy token i wysyłamy maila
+        if not test_id:
+            raise CandidateException(
+                message=f"Brak skonfigurowanego testu dla etapu {next_status}"
+            )
+        
+        # Get token expiry days from campaign
+        expiry_days = campaign.get(f'po{next_status[-1]}_token_expiry_days', 7)
+        
+        # Generate token and prepare updates
+        current_time = datetime.now()
+        token_expiry = (current_time + timedelta(days=expiry_days)).replace(hour=23, minute=59, second=59)
+        token = secrets.token_urlsafe(32)
+        
+        updates.update({
+            f'access_token_{next_status.lower()}': token,
+            f'access_token_{next_status.lower()}_expires_at': token_expiry.isoformat(),
+            f'access_token_{next_status.lower()}_is_used': False
+        })
+        
+        email = CandidateService._build_test_email(
+            candidate_data=candidate_data,
+            token=token,
+            next_status=next_status,
+            token_expiry=token_expiry
+        )
+        return next_status, updates, [email]
+
+
+    @staticmethod
+    def _build_test_email(
+        candidate_data: Dict,
+        token: str,
+        next_status: str,
+        token_expiry: datetime
+    ) -> Dict:
+        """
+        Przygotowuje email z linkiem do testu.
+        
+        Args:
+            candidate_data (Dict): Dane kandydata
+            token (str): Token dostępu
+            next_status (str): Następny status
+            token_expiry (datetime): Data wygaśnięcia tokenu
+            
+        Returns:
+            Dict: Wiadomość do zapisania w kolejce email_outbox
+        """
+        config = Config.instance()
+        email_service = EmailService(config)
+        
+        # Format expiry date
+        formatted_expiry = token_expiry.astimezone(ZoneInfo("Europe/Warsaw")).strftime("%Y-%m-%d %H:%M")
+        
+        # Generate test URL
+        test_url = f"{config.BASE_URL.rstrip('/')}/test/candidate/{token}"
+        
+        # Map status to stage name
+        stage_names = {
+            'PO1': 'Test kwalifikacyjny',
+            'PO2': 'Test kompetencji',
+            'PO3': 'Test końcowy'
+        }
+        stage_name = stage_names.get(next_status, f'Test {next_status}')
+        
+        # Get campaign title
+        campaign_title = candidate_data.get('campaigns', {}).get('title', 'Rekrutacja')
+        
+        return email_service.build_test_invitation(
+            to_email=candidate_data["email"],
+            stage_name=stage_name,
+            campaign_title=campaign_title,
+            test_url=test_url,
+            expiry_date=formatted_expiry,
+            test_details=None  # We don't have test details at this point
+        )
+
+
     @staticmethod
     def add_note(candidate_id: int, note_type: str, content: str, user_id: int, user_email: str) -> Dict:
         """
@@ -588,7 +804,7 @@ class CandidateService:
         try:
             config = Config.instance()
             email_service = EmailService(config)
-            openai_service = OpenAIService(config)
+            openai_service = OpenAIService(config, AIEvaluationCache(supabase))
             test_score_service = TestScoreService(supabase, openai_service)
             recalculation_service = RecalculationScoreService(
                 supabase=supabase,
@@ -615,6 +831,113 @@ class CandidateService:
                 original_error=e
             )
 
+    @staticmethod
+    def create_recalculation_job(
+        user_id: int,
+        candidate_ids: Optional[List[int]] = None,
+        campaign_id: Optional[int] = None,
+        test_id: Optional[int] = None
+    ) -> Dict:
+        """
+        Zleca przeliczenie punktów wielu kandydatów w tle (wykonuje je cron).
+        
+        Args:
+            user_id (int): ID użytkownika zlecającego przeliczenie
+            candidate_ids (Optional[List[int]]): Lista ID kandydatów do przeliczenia
+            campaign_id (Optional[int]): ID kampanii, której kandydatów należy przeliczyć
+            test_id (Optional[int]): ID testu - przeliczani są kandydaci kampanii używających testu
+            
+        Returns:
+            Dict: Utworzone zadanie przeliczania
+            
+        Raises:
+            CandidateException: Gdy nie podano zakresu lub wystąpi błąd podczas tworzenia zadania
+        """
+        if not candidate_ids and not campaign_id and not test_id:
+            raise CandidateException(message="Nie wskazano kandydatów do przeliczenia")
+        
+        try:
+            result = supabase.from_("recalculation_jobs")\
+                .insert({
+                    "candidate_ids": candidate_ids or None,
+                    "campaign_id": campaign_id,
+                    "test_id": test_id,
+                    "created_by": user_id
+                })\
+                .execute()
+            
+            job = result.data[0]
+            logger.info(f"Utworzono zadanie przeliczania {job['id']} (kandydaci: {len(candidate_ids or [])}, kampania: {campaign_id}, test: {test_id})")
+            return job
+            
+        except Exception as e:
+            logger.error(f"Błąd podczas tworzenia zadania przeliczania: {str(e)}")
+            raise CandidateException(
+                message="Wystąpił błąd podczas zlecania przeliczenia punktów",
+                original_error=e
+            )
+
+    @staticmethod
+    def get_recalculation_job(job_id: int) -> Dict:
+        """
+        Pobiera stan zadania przeliczania (postęp i przepustowość).
+        
+        Args:
+            job_id (int): ID zadania
+            
+        Returns:
+            Dict: Stan zadania
+            
+        Raises:
+            CandidateException: Gdy zadanie nie istnieje lub wystąpi błąd podczas pobierania
+        """
+        try:
+            result = supabase.from_("recalculation_jobs")\
+                .select("id, status, total, processed, failed, per_second, error, created_at, started_at, finished_at")\
+                .eq("id", job_id)\
+                .execute()
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania zadania przeliczania {job_id}: {str(e)}")
+            raise CandidateException(
+                message="Wystąpił błąd podczas pobierania stanu przeliczania",
+                original_error=e
+            )
+        
+        if not result.data:
+            raise CandidateException(message="Nie znaleziono zadania przeliczania")
+        
+        return result.data[0]
+
+    @staticmethod
+    def cancel_recalculation_job(job_id: int) -> None:
+        """
+        Anuluje oczekujące lub trwające zadanie przeliczania.
+        
+        Args:
+            job_id (int): ID zadania
+            
+        Raises:
+            CandidateException: Gdy zadanie nie istnieje, zostało już zakończone
+                lub wystąpi błąd podczas anulowania
+        """
+        try:
+            result = supabase.from_("recalculation_jobs")\
+                .update({"status": "CANCELLED"})\
+                .eq("id", job_id)\
+                .in_("status", ["PENDING", "RUNNING", "WAITING_AI_BATCH"])\
+                .execute()
+        except Exception as e:
+            logger.error(f"Błąd podczas anulowania zadania przeliczania {job_id}: {str(e)}")
+            raise CandidateException(
+                message="Wystąpił błąd podczas anulowania przeliczania",
+                original_error=e
+            )
+        
+        if not result.data:
+            raise CandidateException(message="Nie znaleziono trwającego zadania przeliczania")
+        
+        logger.info(f"Anulowano zadanie przeliczania {job_id}")
+
     @staticmethod
     def regenerate_token(candidate_id: int, stage: str) -> Dict[str, Union[bool, str, datetime]]:
         """
@@ -1,12 +1,21 @@
+import threading
+import time
+from flask import g, has_request_context
 from database import supabase
+from common.config import Config
 from common.logger import Logger
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 logger = Logger.instance()
 
+# Grupy użytkowników współdzielone przez żądania procesu: user_id -> (czas wygaśnięcia, grupy)
+_user_groups_cache: Dict[int, Tuple[float, List[Dict]]] = {}
+_user_groups_lock = threading.Lock()
+
 def get_user_groups(user_id: int) -> List[Dict]:
     """
-    Pobiera grupy przypisane do użytkownika.
+    Pobiera grupy przypisane do użytkownika. Wynik jest zapamiętywany na czas żądania
+    (flask.g) oraz przez GROUP_CACHE_TTL_SECONDS dla kolejnych żądań w procesie.
     
     Args:
         user_id (int): ID użytkownika.
@@ -14,6 +23,47 @@ def get_user_groups(user_id: int) -> List[Dict]:
     Returns:
         list: Lista grup (id i nazwa).
     """
+    request_cache = g.setdefault('user_groups', {}) if has_request_context() else None
+    if request_cache is not None and user_id in request_cache:
+        return list(request_cache[user_id])
+    
+    with _user_groups_lock:
+        cached = _user_groups_cache.get(user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        groups = cached[1]
+    else:
+        groups = _fetch_user_groups(user_id)
+        if groups is None:
+            return []
+        with _user_groups_lock:
+            _user_groups_cache[user_id] = (time.monotonic() + Config.instance().GROUP_CACHE_TTL_SECONDS, groups)
+    
+    if request_cache is not None:
+        request_cache[user_id] = groups
+    return list(groups)
+
+def invalidate_user_groups(user_id: Optional[int] = None) -> None:
+    """
+    Usuwa z cache grupy podanego użytkownika lub wszystkich użytkowników.
+    Należy ją wywołać po zmianie przypisań w link_groups_users.
+    
+    Args:
+        user_id (Optional[int]): ID użytkownika lub None (wszyscy użytkownicy).
+    """
+    with _user_groups_lock:
+        if user_id is None:
+            _user_groups_cache.clear()
+        else:
+            _user_groups_cache.pop(user_id, None)
+    
+    if has_request_context() and 'user_groups' in g:
+        if user_id is None:
+            g.user_groups.clear()
+        else:
+            g.user_groups.pop(user_id, None)
+
+def _fetch_user_groups(user_id: int) -> Optional[List[Dict]]:
+    """Pobiera grupy użytkownika z bazy; zwraca None w przypadku błędu (wynik nie trafia do cache)"""
     try:
         response = supabase.from_("link_groups_users") \
             .select("groups:group_id(*)") \
@@ -28,7 +78,7 @@ def get_user_groups(user_id: int) -> List[Dict]:
         
     except Exception as e:
         logger.error(f"Błąd podczas pobierania grup użytkownika: {str(e)}")
-        return []
+        return None
 
 def get_test_groups(test_id: int) -> List[Dict]:
     """
@@ -497,6 +497,7 @@ class TestPublicService:
             if answers_to_insert:
                 logger.debug(f"Inserting {len(answers_to_insert)} answers into database")
                 result = supabase.table('candidate_answers').insert(answers_to_insert).execute()
+                # Trigger on candidate_answers sets needs_scoring in the same transaction
                 logger.debug(f"Successfully inserted answers: {result.data}")
             else:
                 logger.warning("No answers to insert!")
@@ -1,5 +1,6 @@
 from database import supabase
 from common.logger import Logger
+from common.question_cache import QuestionCache
 from typing import Dict, List, Optional, Union
 from datetime import datetime, timezone
 import json
@@ -288,6 +289,9 @@ class TestService:
                         .in_("id", questions['deleted'])\
                         .execute()
 
+                if questions.get('added') or questions.get('modified') or questions.get('deleted'):
+                    TestService.touch_test(test_id)
+
         except TestException:
             raise
         except Exception as e:
@@ -340,6 +344,21 @@ class TestService:
                 original_error=e
             )
 
+    @staticmethod
+    def touch_test(test_id: int) -> None:
+        """
+        Aktualizuje tests.updated_at po zmianie pytań, co unieważnia definicję testu
+        przechowywaną w cache serwisu oceniania.
+        
+        Args:
+            test_id (int): ID testu
+        """
+        supabase.from_("tests")\
+            .update({"updated_at": datetime.now(timezone.utc).isoformat()})\
+            .eq("id", test_id)\
+            .execute()
+        QuestionCache.instance().invalidate(test_id)
+
     @staticmethod
     def add_questions(test_id: int, questions: List[Dict]) -> None:
         """
@@ -385,6 +404,7 @@ class TestService:
                 if not result.data:
                     raise TestException(message="Nie udało się dodać pytań")
 
+                TestService.touch_test(test_id)
                 logger.info(f"Pomyślnie dodano {len(questions_to_insert)} pytań do testu {test_id}")
 
         except TestException:
@@ -580,6 +600,9 @@ class TestService:
                     logger.error(f"Błąd podczas usuwania pytań: {str(e)}")
                     raise TestException(message="Błąd podczas usuwania pytań")
 
+            if questions_to_update or questions_to_insert or questions_to_delete:
+                TestService.touch_test(test_id)
+
         except TestException:
             raise
         except Exception as e:
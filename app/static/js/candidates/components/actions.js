@@ -1,5 +1,5 @@
 import { setButtonLoading } from '../utils/buttons.js';
-import { refreshTable } from '../utils/table.js';
+import { refreshTable, getListFilters } from '../utils/table.js';
 
 // Function to move candidate to next stage
 export async function moveToNextStage(candidateId) {
@@ -227,92 +227,187 @@ export async function viewCandidate(candidateId) {
 }
 
 // Function to bulk recalculate scores
-export async function bulkRecalculateScores() {
-    // Get candidates list first
-    const candidates = Array.from(document.querySelectorAll('#candidatesTable tbody tr'))
-        .filter(row => row.style.display !== 'none')
-        .map(row => {
-            const id = row.querySelector('.dropdown-menu').getAttribute('aria-labelledby').replace('dropdownMenuButton', '');
-            return { id };
-        });
+export function bulkRecalculateScores() {
+    const scopeSection = document.getElementById('recalculationScopeSection');
+    const progressSection = document.getElementById('recalculationProgressSection');
+    const startButton = document.getElementById('startRecalculation');
     
-    const total = candidates.length;
+    // Reset modal to the scope selection step
+    scopeSection?.classList.remove('d-none');
+    progressSection?.classList.add('d-none');
+    startButton?.classList.remove('d-none');
     
-    // Reset and initialize modal state
-    const progressBar = document.querySelector('#bulkRecalculateModal .progress-bar');
-    const processedCount = document.getElementById('processedCount');
-    const totalCount = document.getElementById('totalCount');
+    const modal = new bootstrap.Modal(document.getElementById('bulkRecalculateModal'));
+    modal.show();
     
-    if (progressBar) {
-        progressBar.style.width = '0%';
-        progressBar.setAttribute('aria-valuenow', 0);
+    const cancelButton = document.getElementById('cancelRecalculation');
+    if (cancelButton) {
+        cancelButton.onclick = () => modal.hide();
     }
-    if (processedCount) processedCount.textContent = '0';
-    if (totalCount) totalCount.textContent = total.toString();
+    if (startButton) {
+        startButton.onclick = () => runRecalculationJob(modal);
+    }
+}
+
+// Builds the recalculation job scope from the modal selection
+function getRecalculationScope() {
+    const scope = document.getElementById('recalculationScope')?.value || 'filters';
     
-    const modal = new bootstrap.Modal(document.getElementById('bulkRecalculateModal'));
-    modal.show();
+    if (scope.startsWith('campaign:')) {
+        return { campaign_id: parseInt(scope.split(':')[1], 10) };
+    }
+    if (scope.startsWith('test:')) {
+        return { test_id: parseInt(scope.split(':')[1], 10) };
+    }
+    
+    // Candidates matching the list filters are selected on the server
+    return { filters: getListFilters() };
+}
+
+// Function to start a recalculation job and follow its progress
+async function runRecalculationJob(modal) {
+    const scope = getRecalculationScope();
+    
+    if (scope.filters && (scope.filters.campaigns.length === 0 || scope.filters.statuses.length === 0)) {
+        showToast('Brak kandydatów do przeliczenia', 'error');
+        return;
+    }
+    
+    document.getElementById('recalculationScopeSection')?.classList.add('d-none');
+    document.getElementById('recalculationProgressSection')?.classList.remove('d-none');
+    document.getElementById('startRecalculation')?.classList.add('d-none');
+    updateRecalculationProgress({ processed: 0, total: 0, per_second: null });
     
+    let jobId = null;
     let isCancelled = false;
     const cancelButton = document.getElementById('cancelRecalculation');
     if (cancelButton) {
-        cancelButton.onclick = () => {
+        cancelButton.onclick = async () => {
             isCancelled = true;
             modal.hide();
+            if (jobId) {
+                await fetch(`/candidates/recalculate/${jobId}/cancel`, { method: 'POST' });
+            }
         };
     }
     
     try {
-        let processed = 0;
+        // The job is processed in the background by cron, here we only follow its progress
+        const response = await fetch('/candidates/recalculate', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(scope)
+        });
         
-        for (const candidate of candidates) {
+        const result = await response.json();
+        if (!response.ok || !result.success) {
+            throw new Error(result.error || 'Wystąpił błąd podczas zlecania przeliczenia punktów');
+        }
+        jobId = result.job_id;
+        
+        while (!isCancelled) {
+            await new Promise(resolve => setTimeout(resolve, 2000));
             if (isCancelled) break;
             
-            try {
-                const response = await fetch(`/candidates/${candidate.id}/recalculate`, {
-                    method: 'POST'
-                });
-                
-                if (!response.ok) {
-                    const error = await response.json();
-                    console.error(`Error recalculating scores for candidate ${candidate.id}:`, error);
-                }
-                
-            } catch (error) {
-                console.error(`Error recalculating scores for candidate ${candidate.id}:`, error);
+            const statusResponse = await fetch(`/candidates/recalculate/${jobId}`);
+            const status = await statusResponse.json();
+            if (!statusResponse.ok || !status.success) {
+                throw new Error(status.error || 'Wystąpił błąd podczas pobierania stanu przeliczania');
             }
             
-            processed++;
-            updateRecalculationProgress(processed, total);
+            const job = status.job;
+            updateRecalculationProgress({
+                processed: job.processed,
+                total: job.total ?? 0,
+                per_second: job.per_second
+            });
+            
+            if (job.status === 'FAILED') {
+                throw new Error(job.error || 'Wystąpił błąd podczas przeliczania punktów');
+            }
+            if (job.status === 'COMPLETED') {
+                const message = job.failed > 0
+                    ? `Punkty zostały przeliczone (błędy: ${job.failed})`
+                    : 'Punkty zostały przeliczone';
+                showToast(message, 'success');
+                await refreshTable(true);
+                break;
+            }
+            if (job.status === 'CANCELLED') {
+                break;
+            }
+            if (job.status === 'WAITING_AI_BATCH') {
+                showToast('Odpowiedzi oceniane przez AI zostały przekazane do oceny wsadowej - punkty zostaną przeliczone w tle', 'success');
+                break;
+            }
         }
         
-        if (!isCancelled) {
-            showToast('Punkty zostały przeliczone', 'success');
-            await refreshTable(true);
+    } catch (error) {
+        console.error('Error:', error);
+        showToast(error.message || 'Wystąpił błąd podczas przeliczania punktów', 'error');
+    } finally {
+        modal.hide();
+    }
+}
+
+// Function to move all candidates matching the list filters to the next stage
+export async function bulkMoveToNextStage() {
+    const filters = getListFilters();
+    
+    if (filters.campaigns.length === 0 || filters.statuses.length === 0) {
+        showToast('Wybierz kampanię oraz etap kandydatów do przeniesienia', 'error');
+        return;
+    }
+    
+    if (!confirm('Czy na pewno chcesz przenieść do kolejnego etapu wszystkich kandydatów spełniających wybrane filtry? Przeniesieni zostaną tylko kandydaci na etapach PO1, PO2 i PO3 z wynikiem co najmniej równym progowi zaliczenia testu.')) {
+        return;
+    }
+    
+    const button = document.getElementById('bulkNextStageBtn');
+    try {
+        if (button) setButtonLoading(button, true);
+        
+        const response = await fetch('/candidates/next-stage', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(filters)
+        });
+        
+        const result = await response.json();
+        if (!response.ok || !result.success) {
+            throw new Error(result.error || 'Wystąpił błąd podczas przenoszenia kandydatów do kolejnego etapu');
         }
         
+        let message = `Przeniesiono kandydatów: ${result.moved}, zaproszenia w kolejce: ${result.enqueued}`;
+        if (result.per_second) message += ` (${result.per_second} kandydatów/s)`;
+        if (result.skipped.length > 0) message += `, pominięto: ${result.skipped.length}`;
+        showToast(message, 'success');
+        await refreshTable(true);
+        
     } catch (error) {
         console.error('Error:', error);
-        showToast('Wystąpił błąd podczas przeliczania punktów', 'error');
+        showToast(error.message, 'error');
     } finally {
-        modal.hide();
+        if (button) setButtonLoading(button, false);
     }
 }
 
 // Function to update recalculation progress
-function updateRecalculationProgress(processed, total) {
+function updateRecalculationProgress({ processed, total, per_second }) {
     const progressBar = document.querySelector('#bulkRecalculateModal .progress-bar');
     const processedCount = document.getElementById('processedCount');
     const totalCount = document.getElementById('totalCount');
+    const throughput = document.getElementById('recalculationThroughput');
     
     if (progressBar) {
-        const percentage = (processed / total) * 100;
+        const percentage = total > 0 ? (processed / total) * 100 : 0;
         progressBar.style.width = `${percentage}%`;
         progressBar.setAttribute('aria-valuenow', percentage);
     }
     
     if (processedCount) processedCount.textContent = processed;
     if (totalCount) totalCount.textContent = total;
+    if (throughput) throughput.textContent = per_second ? `${per_second} kandydatów/s` : '';
 }
 
 // Export functions to global scope for HTML event handlers
@@ -324,5 +419,6 @@ Object.assign(window, {
     setAwaitingDecision,
     recalculateScores,
     viewCandidate,
-    bulkRecalculateScores
+    bulkRecalculateScores,
+    bulkMoveToNextStage
 }); 
\ No newline at end of file
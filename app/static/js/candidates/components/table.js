@@ -1,11 +1,10 @@
-import { refreshTable, getRowValue } from '../utils/table.js';
+import { refreshTable, setListSort } from '../utils/table.js';
 
 // Function to initialize sortable headers
 export function initializeSortableHeaders() {
     const headers = document.querySelectorAll('#candidatesTable th.sortable');
     let currentSortField = null;
     let currentSortOrder = 'asc';
-    let sortOrderLabels = {};
     
     headers.forEach(header => {
         header.addEventListener('click', () => {
@@ -20,53 +19,12 @@ export function initializeSortableHeaders() {
             }
             
             // Update header classes
-            headers.forEach(h => {
-                h.classList.remove('asc', 'desc');
-                const orderLabel = h.querySelector('.sort-order');
-                if (orderLabel) orderLabel.remove();
-            });
-            
+            headers.forEach(h => h.classList.remove('asc', 'desc'));
             header.classList.add(currentSortOrder);
             
-            // Sort the table
-            const tbody = document.querySelector('#candidatesTable tbody');
-            const rows = Array.from(tbody.querySelectorAll('tr'));
-            
-            rows.sort((a, b) => {
-                const aValue = getRowValue(a, sortField);
-                const bValue = getRowValue(b, sortField);
-                
-                if (aValue === bValue) return 0;
-                if (aValue === -Infinity) return 1;
-                if (bValue === -Infinity) return -1;
-                
-                const comparison = aValue < bValue ? -1 : 1;
-                return currentSortOrder === 'asc' ? comparison : -comparison;
-            });
-            
-            // Clear and re-append rows
-            tbody.innerHTML = '';
-            rows.forEach(row => tbody.appendChild(row));
-            
-            // Update row numbers
-            rows.forEach((row, index) => {
-                const numberCell = row.querySelector('td.row-number');
-                if (numberCell) {
-                    numberCell.textContent = index + 1;
-                }
-            });
-            
-            // Update sort order labels
-            if (sortOrderLabels[sortField]) {
-                delete sortOrderLabels[sortField];
-            }
-            
-            const orderLabel = document.createElement('span');
-            orderLabel.className = 'sort-order';
-            orderLabel.textContent = Object.keys(sortOrderLabels).length + 1;
-            header.appendChild(orderLabel);
-            
-            sortOrderLabels[sortField] = currentSortOrder;
+            // The list is sorted and paged by the server, loaded pages are replaced
+            setListSort(currentSortField, currentSortOrder);
+            refreshTable();
         });
     });
 }
@@ -1,37 +1,99 @@
-// Function to refresh table
-export async function refreshTable() {
-    try {
-        const currentUrl = new URL(window.location.href);
-        // Dodaj parametry filtrowania do URL
-        const selectedCampaigns = Array.from(document.querySelectorAll('.filter-campaign:checked'))
-            .map(cb => cb.value);
-        const selectedStatuses = Array.from(document.querySelectorAll('.filter-status:checked'))
-            .map(cb => cb.value);
-        const searchText = document.getElementById('searchText')?.value || '';
+import { setButtonLoading } from './buttons.js';
+
+// Current list sort - applied by the server (keyset cursor), null means the server default
+const listSort = { sortBy: null, sortOrder: null };
+
+// Function to set list sort (call refreshTable() afterwards)
+export function setListSort(sortBy, sortOrder) {
+    listSort.sortBy = sortBy;
+    listSort.sortOrder = sortOrder;
+}
+
+// Function to get current list filters (also used as the scope of bulk actions)
+export function getListFilters() {
+    return {
+        campaigns: Array.from(document.querySelectorAll('.filter-campaign:checked')).map(cb => cb.value),
+        statuses: Array.from(document.querySelectorAll('.filter-status:checked')).map(cb => cb.value),
+        search: document.getElementById('searchText')?.value || ''
+    };
+}
 
-        currentUrl.searchParams.set('campaigns', selectedCampaigns.join(','));
-        currentUrl.searchParams.set('statuses', selectedStatuses.join(','));
-        currentUrl.searchParams.set('search', searchText);
+// Function to build list URL with current filters
+function buildListUrl(cursor = null) {
+    const currentUrl = new URL(window.location.href);
+    // Dodaj parametry filtrowania do URL
+    const filters = getListFilters();
 
-        const response = await fetch(currentUrl);
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
+    currentUrl.searchParams.set('campaigns', filters.campaigns.join(','));
+    currentUrl.searchParams.set('statuses', filters.statuses.join(','));
+    currentUrl.searchParams.set('search', filters.search);
+    if (listSort.sortBy) {
+        currentUrl.searchParams.set('sort_by', listSort.sortBy);
+        currentUrl.searchParams.set('sort_order', listSort.sortOrder);
+    } else {
+        currentUrl.searchParams.delete('sort_by');
+        currentUrl.searchParams.delete('sort_order');
+    }
+    if (cursor) {
+        currentUrl.searchParams.set('cursor', cursor);
+    } else {
+        currentUrl.searchParams.delete('cursor');
+    }
+    return currentUrl;
+}
+
+// Function to fetch a page of the candidate list
+async function fetchListPage(cursor = null) {
+    const response = await fetch(buildListUrl(cursor));
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    const html = await response.text();
+    const parser = new DOMParser();
+    return parser.parseFromString(html, 'text/html');
+}
+
+// Function to update pager (next page cursor and counters)
+function updatePager(doc, append) {
+    const pager = document.getElementById('candidatesPager');
+    const newPager = doc.querySelector('#candidatesPager');
+    if (!pager || !newPager) return;
+    
+    const nextCursor = newPager.dataset.nextCursor || '';
+    pager.dataset.nextCursor = nextCursor;
+    document.getElementById('loadMoreBtn')?.classList.toggle('d-none', !nextCursor);
+    
+    // Total count is only calculated for the first page
+    if (!append) {
+        pager.querySelector('span.text-muted').innerHTML = newPager.querySelector('span.text-muted').innerHTML;
+    }
+    const loadedCount = document.getElementById('loadedCount');
+    if (loadedCount) {
+        loadedCount.textContent = document.querySelectorAll('#candidatesTable tbody tr').length;
+    }
+}
+
+// Function to update row numbers
+function updateRowNumbers() {
+    document.querySelectorAll('#candidatesTable tbody tr').forEach((row, index) => {
+        const numberCell = row.querySelector('td.row-number');
+        if (numberCell) {
+            numberCell.textContent = index + 1;
         }
-        const html = await response.text();
-        const parser = new DOMParser();
-        const doc = parser.parseFromString(html, 'text/html');
+    });
+}
+
+// Function to refresh table
+export async function refreshTable() {
+    try {
+        const doc = await fetchListPage();
         const newTable = doc.querySelector('#candidatesTable tbody');
         if (newTable) {
             document.querySelector('#candidatesTable tbody').innerHTML = newTable.innerHTML;
         }
         
-        // Update row numbers
-        document.querySelectorAll('#candidatesTable tbody tr').forEach((row, index) => {
-            const numberCell = row.querySelector('td.row-number');
-            if (numberCell) {
-                numberCell.textContent = index + 1;
-            }
-        });
+        updateRowNumbers();
+        updatePager(doc, false);
         
     } catch (error) {
         console.error('Error:', error);
@@ -39,37 +101,29 @@ export async function refreshTable() {
     }
 }
 
-const statusOrder = {
-    'Odrzucony k': 1,          // REJECTED_CRITICAL - najpierw krytyczne odrzucenie
-    'Odrzucony': 2,            // REJECTED - potem zwykłe odrzucenie
-    'Ankieta': 3,              // PO1
-    'Test EQ': 4,              // PO2
-    'Ocena EQ': 5,             // PO2_5
-    'Test IQ': 6,              // PO3
-    'Potencjał': 7,            // PO4
-    'Zaproszono na rozmowę': 8,// INVITED_TO_INTERVIEW
-    'Oczekuje na decyzję': 9,  // AWAITING_DECISION
-    'Zaakceptowany': 10        // ACCEPTED
-};
-
-// Function to get row value for sorting
-export function getRowValue(row, sortField) {
-    const cell = row.querySelector(`td[data-sort="${sortField}"]`);
-    if (!cell) return '';
-    
-    let value = cell.textContent.trim();
+// Function to load the next page of candidates
+export async function loadMoreCandidates() {
+    const pager = document.getElementById('candidatesPager');
+    const cursor = pager?.dataset.nextCursor;
+    if (!cursor) return;
     
-    // Handle special cases
-    if (sortField === 'created_at') {
-        return new Date(value).getTime();
-    } else if (['po1_score', 'po2_score', 'po2_5_score', 'po3_score', 'po4_score', 'total_score'].includes(sortField)) {
-        return value === '-' ? -Infinity : parseFloat(value);
-    } else if (sortField === 'recruitment_status') {
-        // Pobierz tekst ze spana wewnątrz komórki (pomijając białe znaki)
-        const statusText = cell.querySelector('.badge')?.textContent.trim() || '';
-        // Zwróć wartość numeryczną ze słownika lub maksymalną wartość jeśli status nie jest znany
-        return statusOrder[statusText] || 999;
+    const button = document.getElementById('loadMoreBtn');
+    try {
+        setButtonLoading(button, true);
+        
+        const doc = await fetchListPage(cursor);
+        const newRows = doc.querySelector('#candidatesTable tbody');
+        if (newRows) {
+            document.querySelector('#candidatesTable tbody').insertAdjacentHTML('beforeend', newRows.innerHTML);
+        }
+        
+        updateRowNumbers();
+        updatePager(doc, true);
+        
+    } catch (error) {
+        console.error('Error:', error);
+        showToast('Wystąpił błąd podczas pobierania kolejnych kandydatów', 'error');
+    } finally {
+        setButtonLoading(button, false);
     }
-    
-    return value.toLowerCase();
-} 
\ No newline at end of file
+}
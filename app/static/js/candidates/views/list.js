@@ -1,4 +1,4 @@
-import { refreshTable } from '../utils/table.js';
+import { refreshTable, loadMoreCandidates } from '../utils/table.js';
 
 // Initialize list view
 export function initializeListView() {
@@ -14,6 +14,18 @@ export function initializeListView() {
         bulkRecalculateBtn.addEventListener('click', bulkRecalculateScores);
     }
     
+    // Initialize bulk next stage button
+    const bulkNextStageBtn = document.getElementById('bulkNextStageBtn');
+    if (bulkNextStageBtn) {
+        bulkNextStageBtn.addEventListener('click', bulkMoveToNextStage);
+    }
+    
+    // Initialize load more button
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener('click', loadMoreCandidates);
+    }
+    
     // Initial table refresh
     refreshTable(false);
 }
@@ -0,0 +1,122 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+from supabase import Client
+from common.logger import Logger
+
+class AIEvaluationCache:
+    """Trwały cache ocen AI zapisany w tabeli ai_evaluation_cache"""
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+        self.logger = Logger.instance()
+
+    @staticmethod
+    def make_key(
+        question_text: str,
+        answer_text: str,
+        max_points: float,
+        algorithm_params: Optional[dict],
+        prompt_version: str,
+        model: str,
+        custom_prompt: Optional[str] = None
+    ) -> str:
+        """
+        Wylicza klucz cache na podstawie wszystkich danych wpływających na ocenę.
+
+        Returns:
+            str: Skrót SHA-256 w postaci szesnastkowej
+        """
+        payload = json.dumps(
+            [question_text, answer_text, float(max_points), algorithm_params, prompt_version, model, custom_prompt],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Pobiera zapisane oceny jednym zapytaniem.
+
+        Args:
+            keys: Klucze cache
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Mapowanie klucza na ocenę (score, explanation); błędy odczytu są pomijane
+        """
+        if not keys:
+            return {}
+
+        try:
+            response = self.supabase.table('ai_evaluation_cache')\
+                .select('cache_key, score, explanation')\
+                .in_('cache_key', list(set(keys)))\
+                .execute()
+
+            return {
+                row['cache_key']: {'score': row['score'], 'explanation': row['explanation']}
+                for row in (response.data or [])
+            }
+
+        except Exception as e:
+            self.logger.warning(f"Nie udało się odczytać cache ocen AI: {str(e)}")
+            return {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Pobiera zapisaną ocenę dla klucza lub None, gdy jej brak"""
+        return self.get_many([key]).get(key)
+
+    def put(self, key: str, result: Dict[str, Any], prompt_version: str, model: str) -> None:
+        """
+        Zapisuje ocenę w cache. Błąd zapisu nie przerywa oceniania.
+
+        Args:
+            key: Klucz cache
+            result: Wynik oceny z polami score i explanation
+            prompt_version: Wersja promptu użyta do oceny
+            model: Model użyty do oceny
+        """
+        try:
+            self.supabase.table('ai_evaluation_cache')\
+                .upsert({
+                    'cache_key': key,
+                    'score': float(result['score']),
+                    'explanation': result.get('explanation'),
+                    'model': model,
+                    'prompt_version': prompt_version
+                })\
+                .execute()
+
+        except Exception as e:
+            self.logger.warning(f"Nie udało się zapisać oceny AI w cache: {str(e)}")
+
+    def put_many(self, results: Dict[str, Dict[str, Any]], prompt_version: str, model: str) -> None:
+        """
+        Zapisuje wiele ocen w cache jednym zapytaniem (np. wyniki zadania wsadowego).
+        Błąd zapisu nie przerywa oceniania.
+
+        Args:
+            results: Mapowanie klucza cache na ocenę z polami score i explanation
+            prompt_version: Wersja promptu użyta do oceny
+            model: Model użyty do oceny
+        """
+        if not results:
+            return
+
+        try:
+            self.supabase.table('ai_evaluation_cache')\
+                .upsert([
+                    {
+                        'cache_key': key,
+                        'score': float(result['score']),
+                        'explanation': result.get('explanation'),
+                        'model': model,
+                        'prompt_version': prompt_version
+                    }
+                    for key, result in results.items()
+                ])\
+                .execute()
+
+        except Exception as e:
+            self.logger.warning(f"Nie udało się zapisać {len(results)} ocen AI w cache: {str(e)}")
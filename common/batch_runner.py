@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from common.logger import Logger
+
+class BatchRunner:
+    """Wykonuje zadania dla wielu elementów przy użyciu ograniczonej puli wątków"""
+
+    def __init__(self, max_workers: int = 1, log_prefix: str = 'KANDYDAT'):
+        """
+        Args:
+            max_workers: Maksymalna liczba równolegle przetwarzanych elementów (1 = tryb sekwencyjny)
+            log_prefix: Prefiks dodawany do logów każdego elementu, np. [KANDYDAT 123]
+        """
+        self.max_workers = max(1, int(max_workers or 1))
+        self.log_prefix = log_prefix
+        self.logger = Logger.instance()
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if self.max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='batch')
+
+        # Limit elementów w trakcie przetwarzania - submit() czeka na wolny wątek
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._succeeded = 0
+        self._failed = 0
+
+    def __enter__(self) -> 'BatchRunner':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def submit(self, key: Any, task: Callable[..., Any], *args, **kwargs) -> None:
+        """
+        Zleca wykonanie zadania dla elementu. W trybie równoległym blokuje,
+        dopóki nie zwolni się miejsce w puli.
+
+        Args:
+            key: Identyfikator elementu używany w prefiksie logów
+            task: Funkcja do wykonania; zwrócenie False oznacza niepowodzenie
+        """
+        if self._executor is None:
+            self._run(key, task, args, kwargs)
+            return
+
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._run, key, task, args, kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def close(self) -> None:
+        """Czeka na zakończenie wszystkich zleconych zadań"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Statystyki przetwarzania: liczba elementów, błędy, czas i przepustowość"""
+        with self._lock:
+            processed = self._succeeded + self._failed
+            failed = self._failed
+        elapsed = time.monotonic() - self._started_at
+        return {
+            'processed': processed,
+            'failed': failed,
+            'elapsed_seconds': round(elapsed, 2),
+            'per_second': round(processed / elapsed, 2) if elapsed > 0 else 0.0
+        }
+
+    def _run(self, key: Any, task: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        with self.logger.context(f"[{self.log_prefix} {key}]"):
+            try:
+                succeeded = task(*args, **kwargs) is not False
+            except Exception as e:
+                self.logger.error(f"Nieobsłużony błąd podczas przetwarzania: {str(e)}")
+                succeeded = False
+
+        with self._lock:
+            if succeeded:
+                self._succeeded += 1
+            else:
+                self._failed += 1
@@ -0,0 +1,153 @@
+from datetime import date, datetime
+from typing import List, Optional
+import numpy as np
+from common.scoring_rules import DateRule, NumericRule, ScoringRule, parse_number
+
+
+def supports_bulk(rule: ScoringRule) -> bool:
+    """Sprawdza, czy regułę można obliczyć wektorowo dla wielu odpowiedzi naraz"""
+    if isinstance(rule, NumericRule):
+        return True
+    if isinstance(rule, DateRule):
+        dates = [rule.min_date, rule.max_date, rule.correct_date]
+        return all(value is None or isinstance(value, date) for value in dates)
+    return False
+
+
+def score_bulk(rule: ScoringRule, answers: List[dict]) -> np.ndarray:
+    """
+    Oblicza surowe wyniki (przed zaokrągleniem) dla wielu odpowiedzi na to samo pytanie.
+    Wyniki są identyczne z ScoringRule.score wywołanym dla każdej odpowiedzi osobno.
+
+    Args:
+        rule: Reguła liczbowa lub datowa, dla której supports_bulk zwraca True
+        answers: Odpowiedzi kandydatów na pytanie
+
+    Returns:
+        np.ndarray: Surowe wyniki w kolejności odpowiedzi
+    """
+    if isinstance(rule, NumericRule):
+        values, valid = _parse_numbers(answers)
+        return _score_numeric(rule, values, valid)
+    values, valid = _parse_dates(answers)
+    return _score_dates(rule, values, valid)
+
+
+def _parse_numbers(answers: List[dict]):
+    values = np.zeros(len(answers), dtype=np.float64)
+    valid = np.zeros(len(answers), dtype=bool)
+    for index, answer in enumerate(answers):
+        try:
+            values[index] = parse_number(answer.get('answer', ''))
+            valid[index] = True
+        except (ValueError, TypeError):
+            pass
+    return values, valid
+
+
+def _parse_dates(answers: List[dict]):
+    values = np.zeros(len(answers), dtype=np.int64)
+    valid = np.zeros(len(answers), dtype=bool)
+    for index, answer in enumerate(answers):
+        user_date_str = answer.get('answer')
+        if not user_date_str:
+            continue
+        try:
+            values[index] = datetime.strptime(user_date_str, '%Y-%m-%d').date().toordinal()
+            valid[index] = True
+        except (ValueError, TypeError):
+            pass
+    return values, valid
+
+
+def _score_numeric(rule: NumericRule, user: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    max_points = rule.max_points
+    full = float(max_points)
+    min_value = rule.min_value
+    max_value = rule.max_value
+    correct = rule.correct_answer
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if rule.algorithm_type == 'EXACT_MATCH':
+            scores = np.where(np.abs(user - correct) < rule.epsilon, full, 0.0)
+
+        elif rule.algorithm_type == 'RANGE':
+            scores = np.where((min_value <= user) & (user <= max_value), full, 0.0)
+
+        elif rule.algorithm_type == 'LEFT_SIDED':
+            scores = np.select(
+                [user < min_value, user >= correct],
+                [0.0, full],
+                _scaled(max_points, user - min_value, correct - min_value)
+            )
+
+        elif rule.algorithm_type == 'RIGHT_SIDED':
+            scores = np.select(
+                [user > max_value, user <= correct],
+                [0.0, full],
+                _scaled(max_points, max_value - user, max_value - correct)
+            )
+
+        else:  # CENTER
+            scores = np.select(
+                [user == correct, (user < min_value) | (user > max_value), user < correct],
+                [full, 0.0, _scaled(max_points, user - min_value, correct - min_value)],
+                _scaled(max_points, max_value - user, max_value - correct)
+            )
+
+    return np.where(valid, scores, 0.0)
+
+
+def _score_dates(rule: DateRule, user: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    max_points = rule.max_points
+    full = float(max_points)
+    min_day = _ordinal(rule.min_date)
+    max_day = _ordinal(rule.max_date)
+    correct_day = _ordinal(rule.correct_date)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if rule.algorithm_type == 'EXACT_MATCH':
+            scores = np.where(user == correct_day, full, 0.0)
+
+        elif rule.algorithm_type == 'RANGE':
+            scores = np.where((min_day <= user) & (user <= max_day), full, 0.0)
+
+        elif rule.algorithm_type == 'LEFT_SIDED':
+            scores = np.select(
+                [user <= min_day, user >= correct_day],
+                [0.0, full],
+                _sided_days(max_points, user - min_day, correct_day - min_day)
+            )
+
+        elif rule.algorithm_type == 'RIGHT_SIDED':
+            scores = np.select(
+                [user >= max_day, user <= correct_day],
+                [0.0, full],
+                _sided_days(max_points, max_day - user, max_day - correct_day)
+            )
+
+        else:  # CENTER
+            scores = np.select(
+                [user == correct_day, (user <= min_day) | (user >= max_day), user < correct_day],
+                [full, 0.0, _sided_days(max_points, user - min_day, correct_day - min_day)],
+                _sided_days(max_points, max_day - user, max_day - correct_day)
+            )
+
+    return np.where(valid, scores, 0.0)
+
+
+def _scaled(max_points, distance: np.ndarray, total: float) -> np.ndarray:
+    # Dzielenie przez zero w wersji skalarnej kończy się wyjątkiem i wynikiem 0
+    if total == 0:
+        return np.zeros(distance.shape, dtype=np.float64)
+    return max_points * distance / total
+
+
+def _sided_days(max_points, user_days: np.ndarray, total_days: int) -> np.ndarray:
+    if total_days <= 0:
+        return np.zeros(user_days.shape, dtype=np.float64)
+    return max_points * (user_days / total_days)
+
+
+def _ordinal(value: Optional[date]) -> int:
+    return value.toordinal() if value is not None else 0
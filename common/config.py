@@ -36,6 +36,15 @@ class Config:
         self.SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
         self.SMTP_USERNAME = os.getenv('SMTP_USERNAME')
         self.SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+        self.SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', '1'))
+        self.SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', '100'))
+        self.SMTP_IDLE_TIMEOUT_SECONDS = int(os.getenv('SMTP_IDLE_TIMEOUT_SECONDS', '60'))
+        self.EMAIL_SENDER_BATCH_SIZE = int(os.getenv('EMAIL_SENDER_BATCH_SIZE', '50'))
+        self.EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+        self.EMAIL_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_RETRY_BASE_SECONDS', '60'))
+        self.EMAIL_LOCK_SECONDS = int(os.getenv('EMAIL_LOCK_SECONDS', '300'))
+        self.EMAIL_TEMPLATE_CACHE_SIZE = int(os.getenv('EMAIL_TEMPLATE_CACHE_SIZE', '256'))
+        self.EMAIL_TEMPLATE_CACHE_TTL_SECONDS = int(os.getenv('EMAIL_TEMPLATE_CACHE_TTL_SECONDS', '300'))
         self.SENDER_EMAIL = os.getenv('SENDER_EMAIL')
         self.BASE_URL = os.getenv('BASE_URL')
         
@@ -60,6 +69,37 @@ class Config:
         
         # OpenAI Configuration
         self.OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+        self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+        self.OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4')
+        self.LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'openai').lower()
+        self.FAKE_LLM_LATENCY_SECONDS = float(os.getenv('FAKE_LLM_LATENCY_SECONDS', '0.5'))
+        self.FAKE_LLM_ERROR_RATE = float(os.getenv('FAKE_LLM_ERROR_RATE', '0'))
+        self.OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', '4'))
+        self.OPENAI_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '500'))
+        self.OPENAI_TOKENS_PER_MINUTE = int(os.getenv('OPENAI_TOKENS_PER_MINUTE', '10000'))
+        self.OPENAI_COMPLETION_TOKENS_ESTIMATE = int(os.getenv('OPENAI_COMPLETION_TOKENS_ESTIMATE', '200'))
+        self.OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '5'))
+        self.OPENAI_BACKOFF_BASE_SECONDS = float(os.getenv('OPENAI_BACKOFF_BASE_SECONDS', '1'))
+        self.OPENAI_BACKOFF_MAX_SECONDS = float(os.getenv('OPENAI_BACKOFF_MAX_SECONDS', '60'))
+        self.OPENAI_JSON_MODE = os.getenv('OPENAI_JSON_MODE', 'False').lower() == 'true'
+        self.AI_PACK_SIZE = int(os.getenv('AI_PACK_SIZE', '1'))
+        self.AI_BATCH_MODE = os.getenv('AI_BATCH_MODE', 'False').lower() == 'true'
+        self.AI_BATCH_MIN_CANDIDATES = int(os.getenv('AI_BATCH_MIN_CANDIDATES', '200'))
+        self.AI_BATCH_MAX_REQUESTS = int(os.getenv('AI_BATCH_MAX_REQUESTS', '50000'))
+        
+        # Web App Configuration
+        self.GROUP_CACHE_TTL_SECONDS = int(os.getenv('GROUP_CACHE_TTL_SECONDS', '60'))
+        self.CANDIDATES_PAGE_SIZE = int(os.getenv('CANDIDATES_PAGE_SIZE', '100'))
+        
+        # Scoring Configuration
+        self.QUESTION_CACHE_SIZE = int(os.getenv('QUESTION_CACHE_SIZE', '128'))
+        
+        # Cron Configuration
+        self.CRON_BATCH_SIZE = int(os.getenv('CRON_BATCH_SIZE', '100'))
+        self.CRON_STATUS_RECHECK_SECONDS = int(os.getenv('CRON_STATUS_RECHECK_SECONDS', '30'))
+        self.CRON_WORKERS = int(os.getenv('CRON_WORKERS', '1'))
+        self.CRON_FULL_SCAN = os.getenv('CRON_FULL_SCAN', 'False').lower() == 'true'
+        self.CRON_JOB_TIMEOUT_SECONDS = int(os.getenv('CRON_JOB_TIMEOUT_SECONDS', '1800'))
 
         # Create log directory if it doesn't exist
         os.makedirs(self.LOG_DIR, exist_ok=True)
@@ -79,12 +119,46 @@ class Config:
         logging.debug(f"SMTP_PORT: {self.SMTP_PORT}")
         logging.debug(f"SMTP_USERNAME: {self.SMTP_USERNAME}")
         logging.debug(f"SMTP_PASSWORD: {'*' * 8 if self.SMTP_PASSWORD else None}")
+        logging.debug(f"SMTP_POOL_SIZE: {self.SMTP_POOL_SIZE}")
+        logging.debug(f"SMTP_MAX_MESSAGES_PER_CONNECTION: {self.SMTP_MAX_MESSAGES_PER_CONNECTION}")
+        logging.debug(f"SMTP_IDLE_TIMEOUT_SECONDS: {self.SMTP_IDLE_TIMEOUT_SECONDS}")
+        logging.debug(f"EMAIL_SENDER_BATCH_SIZE: {self.EMAIL_SENDER_BATCH_SIZE}")
+        logging.debug(f"EMAIL_MAX_ATTEMPTS: {self.EMAIL_MAX_ATTEMPTS}")
+        logging.debug(f"EMAIL_RETRY_BASE_SECONDS: {self.EMAIL_RETRY_BASE_SECONDS}")
+        logging.debug(f"EMAIL_LOCK_SECONDS: {self.EMAIL_LOCK_SECONDS}")
+        logging.debug(f"EMAIL_TEMPLATE_CACHE_SIZE: {self.EMAIL_TEMPLATE_CACHE_SIZE}")
+        logging.debug(f"EMAIL_TEMPLATE_CACHE_TTL_SECONDS: {self.EMAIL_TEMPLATE_CACHE_TTL_SECONDS}")
         logging.debug(f"SENDER_EMAIL: {self.SENDER_EMAIL}")
         logging.debug(f"BASE_URL: {self.BASE_URL}")
         logging.debug(f"LOG_DIR: {self.LOG_DIR}")
         logging.debug(f"LOG_RETENTION_DAYS: {self.LOG_RETENTION_DAYS}")
         logging.debug(f"DEBUG_MODE: {self.DEBUG_MODE}")
         logging.debug(f"OPENAI_API_KEY: {'*' * 8 if self.OPENAI_API_KEY else None}")
+        logging.debug(f"OPENAI_BASE_URL: {self.OPENAI_BASE_URL}")
+        logging.debug(f"OPENAI_MODEL: {self.OPENAI_MODEL}")
+        logging.debug(f"LLM_PROVIDER: {self.LLM_PROVIDER}")
+        logging.debug(f"FAKE_LLM_LATENCY_SECONDS: {self.FAKE_LLM_LATENCY_SECONDS}")
+        logging.debug(f"FAKE_LLM_ERROR_RATE: {self.FAKE_LLM_ERROR_RATE}")
+        logging.debug(f"OPENAI_MAX_CONCURRENCY: {self.OPENAI_MAX_CONCURRENCY}")
+        logging.debug(f"OPENAI_REQUESTS_PER_MINUTE: {self.OPENAI_REQUESTS_PER_MINUTE}")
+        logging.debug(f"OPENAI_TOKENS_PER_MINUTE: {self.OPENAI_TOKENS_PER_MINUTE}")
+        logging.debug(f"OPENAI_COMPLETION_TOKENS_ESTIMATE: {self.OPENAI_COMPLETION_TOKENS_ESTIMATE}")
+        logging.debug(f"OPENAI_MAX_RETRIES: {self.OPENAI_MAX_RETRIES}")
+        logging.debug(f"OPENAI_BACKOFF_BASE_SECONDS: {self.OPENAI_BACKOFF_BASE_SECONDS}")
+        logging.debug(f"OPENAI_BACKOFF_MAX_SECONDS: {self.OPENAI_BACKOFF_MAX_SECONDS}")
+        logging.debug(f"OPENAI_JSON_MODE: {self.OPENAI_JSON_MODE}")
+        logging.debug(f"AI_PACK_SIZE: {self.AI_PACK_SIZE}")
+        logging.debug(f"AI_BATCH_MODE: {self.AI_BATCH_MODE}")
+        logging.debug(f"AI_BATCH_MIN_CANDIDATES: {self.AI_BATCH_MIN_CANDIDATES}")
+        logging.debug(f"AI_BATCH_MAX_REQUESTS: {self.AI_BATCH_MAX_REQUESTS}")
+        logging.debug(f"GROUP_CACHE_TTL_SECONDS: {self.GROUP_CACHE_TTL_SECONDS}")
+        logging.debug(f"CANDIDATES_PAGE_SIZE: {self.CANDIDATES_PAGE_SIZE}")
+        logging.debug(f"QUESTION_CACHE_SIZE: {self.QUESTION_CACHE_SIZE}")
+        logging.debug(f"CRON_BATCH_SIZE: {self.CRON_BATCH_SIZE}")
+        logging.debug(f"CRON_STATUS_RECHECK_SECONDS: {self.CRON_STATUS_RECHECK_SECONDS}")
+        logging.debug(f"CRON_WORKERS: {self.CRON_WORKERS}")
+        logging.debug(f"CRON_FULL_SCAN: {self.CRON_FULL_SCAN}")
+        logging.debug(f"CRON_JOB_TIMEOUT_SECONDS: {self.CRON_JOB_TIMEOUT_SECONDS}")
     
     def _validate_config(self):
         """Validate that all required configuration values are present"""
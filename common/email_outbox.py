@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from supabase import Client
+from common.logger import Logger
+
+class EmailOutbox:
+    """
+    Kolejka wiadomości email (tabela email_outbox). Wiadomości są zapisywane razem
+    z aktualizacją kandydata, a wysyła je osobny proces (cron/email_sender.py).
+    """
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+        self.logger = Logger.instance()
+
+    def update_candidate_and_enqueue(
+        self,
+        candidate_id: int,
+        updates: Dict[str, Any],
+        emails: List[Dict[str, Any]],
+        expected_status: Optional[str] = None
+    ) -> bool:
+        """
+        Aktualizuje kandydata i dodaje wiadomości do kolejki w jednej transakcji.
+
+        Args:
+            candidate_id: ID kandydata
+            updates: Zmiany w tabeli candidates
+            emails: Wiadomości przygotowane przez EmailService (to_email, subject, body, content_type)
+            expected_status: Status, który kandydat musi mieć w bazie, aby zmiany zostały zapisane
+
+        Returns:
+            bool: False, jeśli status kandydata różnił się od expected_status i nic nie zapisano
+        """
+        params = {
+            'p_candidate_id': candidate_id,
+            'p_updates': updates,
+            'p_emails': emails
+        }
+        if expected_status is not None:
+            params['p_expected_status'] = expected_status
+
+        response = self.supabase.rpc('update_candidate_and_enqueue_emails', params).execute()
+
+        if expected_status is not None and response.data is None:
+            return False
+
+        if emails:
+            self.logger.info(f"Dodano {len(emails)} wiadomości do kolejki dla kandydata {candidate_id}")
+        return True
+
+    def advance_candidates_and_enqueue(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Aktualizuje wielu kandydatów i dodaje ich wiadomości do kolejki jednym wywołaniem,
+        w jednej transakcji. Kandydaci, których status różni się od expected_status, są pomijani.
+
+        Args:
+            items: Lista {"candidate_id": ..., "expected_status": ..., "updates": {...}, "emails": [...]}
+
+        Returns:
+            Dict[str, Any]: enqueued (liczba wiadomości dodanych do kolejki)
+                oraz skipped (ID kandydatów, których status zmienił się w międzyczasie)
+        """
+        response = self.supabase.rpc('advance_candidates_and_enqueue_emails', {
+            'p_items': items
+        }).execute()
+
+        result = response.data or {}
+        enqueued = result.get('enqueued') or 0
+        skipped = result.get('skipped') or []
+        self.logger.info(
+            f"Zaktualizowano {len(items) - len(skipped)} kandydatów i dodano {enqueued} wiadomości do kolejki "
+            f"(pominięci po zmianie statusu: {len(skipped)})"
+        )
+        return {'enqueued': enqueued, 'skipped': skipped}
+
+    def claim_batch(self, limit: int, lock_seconds: int) -> List[Dict[str, Any]]:
+        """
+        Przejmuje paczkę wiadomości gotowych do wysłania
+
+        Args:
+            limit: Maksymalna liczba wiadomości
+            lock_seconds: Czas, po którym nie wysłane wiadomości może przejąć inny nadawca
+
+        Returns:
+            List[Dict[str, Any]]: Przejęte wiadomości
+        """
+        response = self.supabase.rpc('claim_email_outbox', {
+            'p_limit': limit,
+            'p_lock_seconds': lock_seconds
+        }).execute()
+        return response.data or []
+
+    def mark_sent(self, email_ids: List[int]) -> None:
+        if not email_ids:
+            return
+        self.supabase.table('email_outbox')\
+            .update({
+                'status': 'SENT',
+                'sent_at': datetime.now(timezone.utc).isoformat(),
+                'locked_until': None,
+                'last_error': None
+            })\
+            .in_('id', email_ids)\
+            .execute()
+
+    def mark_failed(self, email: Dict[str, Any], error: str, max_attempts: int, retry_base_seconds: int) -> None:
+        """
+        Zapisuje nieudaną wysyłkę. Wiadomość wraca do kolejki z wykładniczo rosnącym
+        opóźnieniem, a po max_attempts próbach otrzymuje status FAILED.
+        """
+        attempts = email['attempts']
+        updates = {
+            'status': 'FAILED' if attempts >= max_attempts else 'PENDING',
+            'last_error': error,
+            'locked_until': None
+        }
+        if attempts < max_attempts:
+            delay = retry_base_seconds * (2 ** (attempts - 1))
+            updates['next_attempt_at'] = (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat()
+
+        self.supabase.table('email_outbox')\
+            .update(updates)\
+            .eq('id', email['id'])\
+            .execute()
@@ -1,8 +1,11 @@
-import smtplib
+import hashlib
+import html
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from common.logger import Logger
+from common.smtp_pool import SMTPConnectionPool
+from common.email_templates import EmailTemplate, EmailTemplateCache, html_to_text
 
 class EmailService:
     """Serwis do wysyłania wiadomości email"""
@@ -10,6 +13,8 @@ class EmailService:
     def __init__(self, config):
         self.config = config
         self.logger = Logger.instance()
+        self.smtp_pool = SMTPConnectionPool.instance(config)
+        self.templates = EmailTemplateCache.instance()
 
     def send_interview_invitation(
         self,
@@ -31,14 +36,42 @@ class EmailService:
             bool: True jeśli wysłano pomyślnie, False w przypadku błędu
         """
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.config.SENDER_EMAIL
-            msg['To'] = to_email
-            msg['Subject'] = subject or f"Zaproszenie na rozmowę kwalifikacyjną - {campaign_title}"
-
-            # If content is empty, use default template
-            if not content:
-                content = f"""
+            email = self.build_interview_invitation(to_email, subject, content, campaign_title)
+        except Exception as e:
+            self.logger.error(f"Błąd podczas przygotowywania zaproszenia na rozmowę do {to_email}: {str(e)}")
+            return False
+
+        if not self.send_prepared(email):
+            return False
+        self.logger.info(f"Pomyślnie wysłano zaproszenie na rozmowę do {to_email}")
+        return True
+
+    def build_interview_invitation(
+        self,
+        to_email: str,
+        subject: str,
+        content: str,
+        campaign_title: str
+    ) -> Dict[str, Any]:
+        """
+        Przygotowuje zaproszenie na rozmowę (HTML z wersją tekstową) bez wysyłania.
+        Szablon kampanii jest kompilowany raz i używany dla kolejnych kandydatów.
+        
+        Returns:
+            Dict[str, Any]: Wiadomość z polami to_email, subject, body, html_body i content_type
+        """
+        digest = hashlib.sha256(f"{subject}\0{content}".encode('utf-8')).hexdigest()
+        template = self.templates.get_or_create(
+            ('interview_invitation', campaign_title, digest),
+            lambda: self._compile_interview_invitation(subject, content, campaign_title)
+        )
+        return template.render(to_email)
+
+    @staticmethod
+    def _compile_interview_invitation(subject: str, content: str, campaign_title: str) -> EmailTemplate:
+        # If content is empty, use default template
+        if not content:
+            content = f"""
                 Szanowna Pani / Szanowny Panie,
 
                 Z przyjemnością zapraszamy na rozmowę kwalifikacyjną w ramach rekrutacji na stanowisko {campaign_title}.
@@ -49,19 +82,11 @@ class EmailService:
                 Zespół Rekrutacji
                 """
 
-            msg.attach(MIMEText(content, 'html'))
-
-            with smtplib.SMTP(self.config.SMTP_SERVER, self.config.SMTP_PORT) as server:
-                server.starttls()
-                server.login(self.config.SMTP_USERNAME, self.config.SMTP_PASSWORD)
-                server.send_message(msg)
-                
-            self.logger.info(f"Pomyślnie wysłano zaproszenie na rozmowę do {to_email}")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Błąd podczas wysyłania zaproszenia na rozmowę do {to_email}: {str(e)}")
-            return False
+        return EmailTemplate(
+            subject=subject or f"Zaproszenie na rozmowę kwalifikacyjną - {campaign_title}",
+            text=html_to_text(content),
+            html_body=content
+        )
 
     def send_test_invitation(
         self,
@@ -75,6 +100,35 @@ class EmailService:
         """
         Wysyła zaproszenie na test do kandydata
         """
+        return self.send_prepared(self.build_test_invitation(
+            to_email, stage_name, campaign_title, test_url, expiry_date, test_details
+        ))
+
+    def build_test_invitation(
+        self,
+        to_email: str,
+        stage_name: str,
+        campaign_title: str,
+        test_url: str,
+        expiry_date: str,
+        test_details: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """
+        Przygotowuje zaproszenie na test bez wysyłania, np. do zapisania w kolejce email_outbox.
+        Szablon kampanii i etapu jest kompilowany raz, a dla kandydata wstawiane są tylko link i termin.
+        
+        Returns:
+            Dict[str, Any]: Wiadomość z polami to_email, subject, body, html_body i content_type
+        """
+        time_limit_minutes = (test_details or {}).get('time_limit_minutes')
+        template = self.templates.get_or_create(
+            ('test_invitation', campaign_title, stage_name, time_limit_minutes),
+            lambda: self._compile_test_invitation(stage_name, campaign_title, time_limit_minutes)
+        )
+        return template.render(to_email, test_url=test_url, expiry_date=expiry_date)
+
+    @staticmethod
+    def _compile_test_invitation(stage_name: str, campaign_title: str, time_limit_minutes: Optional[int]) -> EmailTemplate:
         subject = f"Zaproszenie do kolejnego etapu rekrutacji - {campaign_title}"
         
         content = [
@@ -85,11 +139,11 @@ class EmailService:
             "",
         ]
         
-        if test_details and test_details.get('time_limit_minutes'):
+        if time_limit_minutes:
             content.extend([
                 "INFORMACJE O TEŚCIE",
                 "━━━━━━━━━━━━━━━━━━━━━",
-                f"• Czas trwania: {test_details['time_limit_minutes']} minut",
+                f"• Czas trwania: {time_limit_minutes} minut",
                 "• Test należy wykonać w jednej sesji",
                 "• System automatycznie zakończy test po upływie czasu",
                 ""
@@ -105,8 +159,8 @@ class EmailService:
             "",
             "LINK DO TESTU",
             "━━━━━━━━━━━━━━━━━━━━━",
-            test_url,
-            f"Link aktywny do: {expiry_date}",
+            "{test_url}",
+            "Link aktywny do: {expiry_date}",
             "",
             "W razie problemów technicznych: praca@pomagier.info",
             "",
@@ -116,10 +170,60 @@ class EmailService:
             "Zespół Rekrutacji"
         ])
         
-        return self.send_email(to_email, subject, "\n".join(content))
+        # Wersja HTML z klikalnym linkiem do testu
+        html_lines = [
+            '<a href="{test_url}">{test_url}</a>' if line == "{test_url}" else html.escape(line, quote=False)
+            for line in content
+        ]
+        
+        return EmailTemplate(
+            subject=subject,
+            text="\n".join(content),
+            html_body="<html><body>\n" + "<br>\n".join(html_lines) + "\n</body></html>",
+            fields=('test_url', 'expiry_date')
+        )
+
+    def send_prepared(self, email: Dict[str, Any]) -> bool:
+        """
+        Wysyła wiadomość przygotowaną przez build_test_invitation, build_interview_invitation
+        lub pobraną z kolejki email_outbox
+        
+        Returns:
+            bool: True jeśli wysłano pomyślnie, False w przypadku błędu
+        """
+        try:
+            self.deliver_prepared(email)
+            return True
+        except Exception as e:
+            self.logger.error(f"Błąd podczas wysyłania emaila do {email['to_email']}: {str(e)}")
+            return False
+
+    def deliver_prepared(self, email: Dict[str, Any]) -> None:
+        """
+        Wysyła przygotowaną wiadomość, przekazując błąd wysyłki wywołującemu
+        (np. aby zapisać jego treść w email_outbox.last_error)
+        
+        Raises:
+            smtplib.SMTPException: Gdy serwer odrzucił wiadomość
+            OSError: Gdy nie udało się połączyć z serwerem
+        """
+        self._deliver(
+            email['to_email'],
+            email['subject'],
+            email['body'],
+            content_type=email.get('content_type') or 'plain',
+            html_body=email.get('html_body')
+        )
 
 
-    def send_email(self, to_email: str, subject: str, body: str) -> bool:
+    def send_email(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        content_type: str = 'plain',
+        html_body: Optional[str] = None
+    ) -> bool:
         """
         Wysyła email do kandydata
         
@@ -127,26 +231,37 @@ class EmailService:
             to_email: Adres email odbiorcy
             subject: Temat wiadomości 
             body: Treść wiadomości
+            content_type: Typ treści (plain lub html)
+            html_body: Treść HTML wysyłana razem z body jako wiadomość multipart/alternative
             
         Returns:
             bool: True jeśli wysłano pomyślnie, False w przypadku błędu
         """
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.config.SENDER_EMAIL
-            msg['To'] = to_email
-            msg['Subject'] = subject
-
-            msg.attach(MIMEText(body, 'plain'))
-
-            with smtplib.SMTP(self.config.SMTP_SERVER, self.config.SMTP_PORT) as server:
-                server.starttls()
-                server.login(self.config.SMTP_USERNAME, self.config.SMTP_PASSWORD)
-                server.send_message(msg)
-                
-            self.logger.info(f"Pomyślnie wysłano email do {to_email}")
+            self._deliver(to_email, subject, body, content_type, html_body)
             return True
             
         except Exception as e:
             self.logger.error(f"Błąd podczas wysyłania emaila do {to_email}: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+    def _deliver(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        content_type: str = 'plain',
+        html_body: Optional[str] = None
+    ) -> None:
+        msg = MIMEMultipart('alternative' if html_body else 'mixed')
+        msg['From'] = self.config.SENDER_EMAIL
+        msg['To'] = to_email
+        msg['Subject'] = subject
+
+        msg.attach(MIMEText(body, content_type))
+        if html_body:
+            msg.attach(MIMEText(html_body, 'html'))
+
+        self.smtp_pool.send_message(msg)
+            
+        self.logger.info(f"Pomyślnie wysłano email do {to_email}") 
\ No newline at end of file
@@ -0,0 +1,151 @@
+import html
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+from common.config import Config
+
+class EmailTemplate:
+    """
+    Szablon wiadomości skompilowany raz dla kampanii i etapu. Treść jest dzielona na stałe
+    fragmenty i pola odbiorcy ({test_url}, {expiry_date}, ...), więc renderowanie
+    wiadomości dla kolejnego kandydata sprowadza się do złączenia gotowych fragmentów.
+    """
+
+    def __init__(self, subject: str, text: str, html_body: Optional[str] = None, fields: Sequence[str] = ()):
+        """
+        Args:
+            subject: Temat wiadomości
+            text: Treść w wersji tekstowej
+            html_body: Treść w wersji HTML (wiadomość multipart) lub None
+            fields: Nazwy pól odbiorcy, które mogą wystąpić w szablonie jako {nazwa}
+        """
+        self.fields = tuple(fields)
+        pattern = re.compile(r'\{(' + '|'.join(map(re.escape, self.fields)) + r')\}') if self.fields else None
+        self._subject = self._compile(subject, pattern)
+        self._text = self._compile(text, pattern)
+        self._html = self._compile(html_body, pattern) if html_body is not None else None
+
+    @staticmethod
+    def _compile(template: str, pattern: Optional[re.Pattern]) -> List[str]:
+        # Elementy parzyste to stałe fragmenty, nieparzyste - nazwy pól
+        return pattern.split(template) if pattern else [template]
+
+    @staticmethod
+    def _fill(parts: List[str], values: Dict[str, str]) -> str:
+        if len(parts) == 1:
+            return parts[0]
+        return ''.join(values[part] if i % 2 else part for i, part in enumerate(parts))
+
+    def render(self, to_email: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Wypełnia szablon polami odbiorcy
+
+        Args:
+            to_email: Adres email odbiorcy
+            **fields: Wartości pól odbiorcy
+
+        Returns:
+            Dict[str, Any]: Wiadomość z polami to_email, subject, body, html_body i content_type
+
+        Raises:
+            KeyError: Gdy nie podano wartości pola występującego w szablonie
+        """
+        values = {name: str(fields[name]) for name in self.fields}
+        email = {
+            'to_email': to_email,
+            'subject': self._fill(self._subject, values),
+            'body': self._fill(self._text, values),
+            'content_type': 'plain'
+        }
+        if self._html is not None:
+            escaped = {name: html.escape(value) for name, value in values.items()}
+            email['html_body'] = self._fill(self._html, escaped)
+        return email
+
+
+def html_to_text(content: str) -> str:
+    """Przygotowuje tekstową wersję treści HTML (np. z edytora szablonu zaproszenia)"""
+    text = re.sub(r'(?i)<br\s*/?>', '\n', content)
+    text = re.sub(r'(?i)</(p|div|li|h[1-6])>', '\n', text)
+    text = re.sub(r'(?i)<li[^>]*>', '• ', text)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = html.unescape(text)
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+class EmailTemplateCache:
+    """
+    Współdzielony w procesie cache LRU skompilowanych szablonów wiadomości i szablonów kampanii.
+    Wpisy mogą mieć czas ważności - szablony zapisane w bazie zmieniają się także w innych procesach.
+    """
+
+    _instance: Optional['EmailTemplateCache'] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> 'EmailTemplateCache':
+        """Zwraca instancję cache o rozmiarze z EMAIL_TEMPLATE_CACHE_SIZE"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(Config.instance().EMAIL_TEMPLATE_CACHE_SIZE)
+        return cls._instance
+
+    def __init__(self, max_size: int = 256):
+        """
+        Args:
+            max_size: Maksymalna liczba przechowywanych szablonów
+        """
+        self.max_size = max(1, int(max_size or 1))
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Zwraca wpis lub None, gdy brak go w cache lub stracił ważność"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> Any:
+        """
+        Zapisuje wpis w cache, usuwając najdawniej używane wpisy.
+
+        Args:
+            key: Klucz wpisu
+            value: Wartość; nie może być później modyfikowana
+            ttl_seconds: Czas ważności wpisu lub None (bez wygasania)
+
+        Returns:
+            Any: Zapisana wartość
+        """
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any], ttl_seconds: Optional[float] = None) -> Any:
+        """Zwraca wpis z cache lub tworzy go przy użyciu factory"""
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, factory(), ttl_seconds)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Usuwa z cache podany wpis lub wszystkie wpisy"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
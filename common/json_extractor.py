@@ -0,0 +1,150 @@
+import json
+from typing import Any, Iterable, List
+
+
+class JSONExtractor:
+    """
+    Przyrostowy ekstraktor wartości JSON z tekstu odpowiedzi modelu.
+    Tekst może być podawany w kawałkach (np. ze strumienia) i zawierać opis,
+    bloki kodu markdown lub przecinki na końcu obiektów - zwracane są tylko
+    kompletne obiekty i tablice najwyższego poziomu, które udało się sparsować.
+    Nawias z opisu, który nie rozpoczyna poprawnego JSON (np. "[skala 0-5"),
+    nie przesłania kolejnych wartości - skanowanie jest wtedy wznawiane od
+    następnego nawiasu otwierającego.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Przetwarza kolejny fragment tekstu.
+
+        Args:
+            chunk: Fragment odpowiedzi modelu
+
+        Returns:
+            List[Any]: Wartości JSON zakończone w tym fragmencie
+        """
+        values = []
+        self._scan(chunk, values)
+        return values
+
+    def finish(self) -> List[Any]:
+        """
+        Kończy przetwarzanie tekstu. Niezamknięty fragment (np. nawias z opisu bez pary)
+        jest skanowany ponownie od kolejnego nawiasu otwierającego.
+
+        Returns:
+            List[Any]: Wartości JSON znalezione w niezamkniętym fragmencie
+        """
+        values = []
+        while self._depth:
+            pending = ''.join(self._buffer)
+            self._reset()
+            self._scan(pending[1:], values)
+        return values
+
+    def _reset(self) -> None:
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _scan(self, text: str, values: List[Any]) -> None:
+        position = 0
+        while position < len(text):
+            char = text[position]
+            position += 1
+
+            if self._depth == 0:
+                if char in '{[':
+                    self._buffer = [char]
+                    self._depth = 1
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = ''.join(self._buffer)
+                    self._buffer = []
+                    value = self._parse(candidate)
+                    if value is not None:
+                        values.append(value)
+                    else:
+                        # Fragment nie jest JSON - wznowienie od kolejnego nawiasu otwierającego
+                        text = candidate[1:] + text[position:]
+                        position = 0
+
+    @classmethod
+    def _parse(cls, candidate: str) -> Any:
+        for text in (candidate, cls._strip_trailing_commas(candidate)):
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                continue
+        return None
+
+    @staticmethod
+    def _strip_trailing_commas(text: str) -> str:
+        """Usuwa przecinki przed zamknięciem obiektu lub tablicy, np. {"score": 3,}, z pominięciem treści napisów"""
+        result = []
+        in_string = False
+        escape = False
+        for position, char in enumerate(text):
+            if in_string:
+                if escape:
+                    escape = False
+                elif char == '\\':
+                    escape = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == ',':
+                following = position + 1
+                while following < len(text) and text[following].isspace():
+                    following += 1
+                if following < len(text) and text[following] in '}]':
+                    continue
+            result.append(char)
+        return ''.join(result)
+
+
+def extract_json(text: str, required_keys: Iterable[str] = ()) -> Any:
+    """
+    Zwraca pierwszą wartość JSON z odpowiedzi modelu. Gdy podano wymagane klucze,
+    zwracany jest pierwszy obiekt zawierający je wszystkie.
+
+    Args:
+        text: Pełna odpowiedź modelu
+        required_keys: Klucze, które musi zawierać zwracany obiekt
+
+    Returns:
+        Any: Sparsowany obiekt lub tablica
+
+    Raises:
+        json.JSONDecodeError: Gdy odpowiedź nie zawiera pasującej wartości JSON
+    """
+    text = text or ''
+    required_keys = tuple(required_keys)
+    extractor = JSONExtractor()
+    for value in extractor.feed(text) + extractor.finish():
+        if not required_keys or (isinstance(value, dict) and all(key in value for key in required_keys)):
+            return value
+    raise json.JSONDecodeError("Nie znaleziono obiektu JSON w odpowiedzi", text, 0)
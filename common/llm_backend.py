@@ -0,0 +1,225 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+from openai import OpenAI, APIConnectionError, APIStatusError, RateLimitError
+
+class LLMRetryableError(Exception):
+    """
+    Przejściowy błąd modelu (limit zapytań, błąd serwera, błąd połączenia),
+    po którym zapytanie można ponowić.
+    """
+    def __init__(self, message: str, original_error: Exception = None, retry_after: Optional[float] = None):
+        self.message = message
+        self.original_error = original_error
+        self.retry_after = retry_after
+        super().__init__(self.message)
+
+
+class LLMCompletion:
+    """Odpowiedź modelu niezależna od dostawcy"""
+
+    def __init__(self, content: str, total_tokens: Optional[int] = None):
+        self.content = content
+        self.total_tokens = total_tokens
+
+
+class LLMBackend(ABC):
+    """Interfejs dostawcy modelu używanego do oceny odpowiedzi"""
+
+    # Czy dostawca obsługuje OpenAI Batch API (AIBatchService)
+    supports_batch = False
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @abstractmethod
+    def complete(self, prompt: str, response_format: Optional[Dict[str, Any]] = None) -> LLMCompletion:
+        """
+        Wysyła prompt do modelu.
+
+        Args:
+            prompt: Treść zapytania
+            response_format: Opcjonalny format odpowiedzi (np. {'type': 'json_object'})
+
+        Returns:
+            LLMCompletion: Treść odpowiedzi i zużycie tokenów
+
+        Raises:
+            LLMRetryableError: Gdy zapytanie można ponowić
+        """
+
+
+class OpenAIBackend(LLMBackend):
+    """Model dostępny przez API OpenAI (lub zgodne z nim, OPENAI_BASE_URL)"""
+
+    supports_batch = True
+
+    def __init__(self, config):
+        super().__init__(config.OPENAI_MODEL)
+        # Ponowne próby obsługuje OpenAIService, razem z limitami zapytań i tokenów
+        self.client = OpenAI(
+            api_key=config.OPENAI_API_KEY,
+            base_url=config.OPENAI_BASE_URL,
+            max_retries=0
+        )
+
+    def complete(self, prompt: str, response_format: Optional[Dict[str, Any]] = None) -> LLMCompletion:
+        kwargs = {'response_format': response_format} if response_format else {}
+        try:
+            completion = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                **kwargs
+            )
+        except (RateLimitError, APIConnectionError, APIStatusError) as e:
+            if isinstance(e, APIStatusError) and not isinstance(e, RateLimitError) and e.status_code < 500:
+                raise
+            raise LLMRetryableError(
+                message=f"{e.__class__.__name__}: {str(e)}",
+                original_error=e,
+                retry_after=self._retry_after(e)
+            )
+
+        usage = completion.usage
+        return LLMCompletion(
+            content=completion.choices[0].message.content,
+            total_tokens=usage.total_tokens if usage is not None else None
+        )
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return float(retry_after) if retry_after else None
+        except ValueError:
+            return None
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Lokalny zamiennik modelu do testów obciążeniowych bez sieci i klucza API.
+    Odpowiada po zadanym opóźnieniu deterministyczną oceną wyliczoną ze skrótu promptu
+    i z zadanym prawdopodobieństwem zgłasza błąd limitu zapytań (429).
+    """
+
+    _MAX_POINTS = re.compile(r'Maksymalna liczba punktów: ([0-9.]+)')
+    _PACKED_ITEM = re.compile(r'^\[(\d+)\]$', re.MULTILINE)
+
+    supports_batch = True
+
+    def __init__(self, config):
+        # Osobna nazwa modelu, aby oceny testowe nie trafiały do cache prawdziwych ocen
+        super().__init__(f"fake:{config.OPENAI_MODEL}")
+        self.latency_seconds = config.FAKE_LLM_LATENCY_SECONDS
+        self.error_rate = config.FAKE_LLM_ERROR_RATE
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+        # Lokalny odpowiednik klienta Batch API używanego przez AIBatchService
+        self.client = FakeBatchClient(self)
+
+    def complete(self, prompt: str, response_format: Optional[Dict[str, Any]] = None) -> LLMCompletion:
+        time.sleep(self.latency_seconds)
+
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            raise LLMRetryableError(message="Symulowany błąd limitu zapytań (429)", retry_after=self.latency_seconds)
+
+        content = self.respond(prompt)
+        return LLMCompletion(content=content, total_tokens=(len(prompt) + len(content)) // 4)
+
+    def respond(self, prompt: str) -> str:
+        """Zwraca treść odpowiedzi modelu na prompt (bez opóźnienia i symulowanych błędów)"""
+        max_points = [float(value) for value in self._MAX_POINTS.findall(prompt)]
+        items = self._PACKED_ITEM.findall(prompt)
+        if items:
+            return json.dumps({'results': [
+                self._evaluation(prompt, points, id=int(number))
+                for number, points in zip(items, max_points)
+            ]})
+        return json.dumps(self._evaluation(prompt, max_points[0] if max_points else 0.0))
+
+    @staticmethod
+    def _evaluation(prompt: str, max_points: float, **fields) -> Dict[str, Any]:
+        seed = hashlib.sha256(f"{prompt}|{fields.get('id')}".encode('utf-8')).digest()[0]
+        return {
+            **fields,
+            'score': max_points * (seed % 5) / 4,
+            'explanation': 'Ocena testowa (FakeLLMBackend)'
+        }
+
+
+class FakeBatchClient:
+    """
+    Lokalny zamiennik klienta OpenAI w zakresie Batch API (files, batches) dla FakeLLMBackend.
+    Zadanie jest w toku do pierwszego sprawdzenia (batches.retrieve), po którym kończy się
+    z plikiem wynikowym w formacie Batch API, z odpowiedziami wyliczonymi przez backend.
+    """
+
+    def __init__(self, backend: FakeLLMBackend):
+        self.backend = backend
+        self._files: Dict[str, bytes] = {}
+        self._batches: Dict[str, SimpleNamespace] = {}
+        self._lock = threading.Lock()
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose: str) -> SimpleNamespace:
+        _name, content = file
+        with self._lock:
+            file_id = f"file-fake-{len(self._files) + 1}"
+            self._files[file_id] = content if isinstance(content, bytes) else content.encode('utf-8')
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _file_content(self, file_id: str) -> SimpleNamespace:
+        return SimpleNamespace(text=self._files[file_id].decode('utf-8'))
+
+    def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str, metadata=None) -> SimpleNamespace:
+        with self._lock:
+            batch = SimpleNamespace(
+                id=f"batch-fake-{len(self._batches) + 1}",
+                status='in_progress',
+                input_file_id=input_file_id,
+                output_file_id=None,
+                metadata=metadata or {}
+            )
+            self._batches[batch.id] = batch
+        return batch
+
+    def _retrieve_batch(self, batch_id: str) -> SimpleNamespace:
+        batch = self._batches[batch_id]
+        if batch.status == 'in_progress':
+            lines = []
+            for line in self._file_content(batch.input_file_id).text.splitlines():
+                request = json.loads(line)
+                content = self.backend.respond(request['body']['messages'][-1]['content'])
+                lines.append(json.dumps({
+                    'custom_id': request['custom_id'],
+                    'response': {'status_code': 200, 'body': {'choices': [{'message': {'content': content}}]}},
+                    'error': None
+                }))
+            batch.output_file_id = self._create_file(('output.jsonl', '\n'.join(lines)), 'batch_output').id
+            batch.status = 'completed'
+        return batch
+
+
+def create_llm_backend(config) -> LLMBackend:
+    """
+    Tworzy dostawcę modelu wskazanego w LLM_PROVIDER
+
+    Raises:
+        ValueError: Gdy dostawca jest nieznany
+    """
+    provider = config.LLM_PROVIDER
+    if provider == 'openai':
+        return OpenAIBackend(config)
+    if provider == 'fake':
+        return FakeLLMBackend(config)
+    raise ValueError(f"Nieznany dostawca modelu LLM_PROVIDER: {provider}")
@@ -1,13 +1,16 @@
 import os
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterator, Optional
 
 class Logger:
     """Singleton logger class for application-wide logging"""
     
     _instance: Optional['Logger'] = None
     _logger: Optional[logging.Logger] = None
+    _context = threading.local()
     
     @classmethod
     def instance(cls, config=None, logFile=None) -> 'Logger':
@@ -89,27 +92,45 @@ class Logger:
         except Exception as e:
             print(f"Błąd podczas czyszczenia logów: {str(e)}")
     
+    @contextmanager
+    def context(self, prefix: str) -> Iterator[None]:
+        """Add a prefix to every message logged by the current thread within the block"""
+        previous = getattr(self._context, 'prefix', None)
+        self._context.prefix = prefix
+        try:
+            yield
+        finally:
+            self._context.prefix = previous
+    
+    def current_context(self) -> Optional[str]:
+        """Return the prefix set for the current thread, e.g. to pass it on to worker threads"""
+        return getattr(self._context, 'prefix', None)
+    
+    def _with_context(self, message: str) -> str:
+        prefix = getattr(self._context, 'prefix', None)
+        return f"{prefix} {message}" if prefix else message
+    
     def debug(self, message: str) -> None:
         if self._logger is None:
             raise Exception("Logger not initialized. Call Logger.instance(config) first.")
-        self._logger.debug(message)
+        self._logger.debug(self._with_context(message))
     
     def info(self, message: str) -> None:
         if self._logger is None:
             raise Exception("Logger not initialized. Call Logger.instance(config) first.")
-        self._logger.info(message)
+        self._logger.info(self._with_context(message))
     
     def warning(self, message: str) -> None:
         if self._logger is None:
             raise Exception("Logger not initialized. Call Logger.instance(config) first.")
-        self._logger.warning(message)
+        self._logger.warning(self._with_context(message))
     
     def error(self, message: str) -> None:
         if self._logger is None:
             raise Exception("Logger not initialized. Call Logger.instance(config) first.")
-        self._logger.error(message)
+        self._logger.error(self._with_context(message))
     
     def critical(self, message: str) -> None:
         if self._logger is None:
             raise Exception("Logger not initialized. Call Logger.instance(config) first.")
-        self._logger.critical(message)
\ No newline at end of file
+        self._logger.critical(self._with_context(message))
\ No newline at end of file
@@ -1,13 +1,62 @@
-from openai import OpenAI
-from typing import Optional 
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional 
 from common.logger import Logger
+from common.ai_evaluation_cache import AIEvaluationCache
+from common.rate_limiter import TokenBucketRateLimiter
+from common.json_extractor import extract_json
+from common.llm_backend import LLMBackend, LLMCompletion, LLMRetryableError, create_llm_backend
+
+class AIEvaluationDeferred(Exception):
+    """
+    Wyjątek zgłaszany, gdy ocena AI nie powiodła się z powodu limitów lub niedostępności API
+    mimo ponownych prób. Odpowiedź nie powinna zostać oceniona na 0 punktów, tylko oceniona ponownie później.
+    """
+    def __init__(self, message: str, original_error: Exception = None):
+        self.message = message
+        self.original_error = original_error
+        super().__init__(self.message)
 
 class OpenAIService:
     """Serwis do obsługi interakcji z API OpenAI"""
     
-    def __init__(self, config):
+    # Zmiana treści promptu wymaga zmiany wersji, aby nie używać ocen zapisanych w cache
+    PROMPT_VERSION = "1"
+    # Wersja promptu zbiorczego zapisywana przy ocenach z AI_PACK_SIZE > 1
+    PACKED_PROMPT_VERSION = "2-packed"
+    
+    # Limit równoległych zapytań wspólny dla wszystkich wątków procesu (klucz: OPENAI_MAX_CONCURRENCY)
+    _request_slots: Dict[int, threading.BoundedSemaphore] = {}
+    _request_slots_lock = threading.Lock()
+    
+    @classmethod
+    def request_slots(cls, limit: int) -> threading.BoundedSemaphore:
+        """Zwraca semafor procesu ograniczający liczbę zapytań wysyłanych jednocześnie do modelu"""
+        limit = max(1, limit)
+        slots = cls._request_slots.get(limit)
+        if slots is None:
+            with cls._request_slots_lock:
+                slots = cls._request_slots.setdefault(limit, threading.BoundedSemaphore(limit))
+        return slots
+    
+    def __init__(
+        self,
+        config,
+        evaluation_cache: Optional[AIEvaluationCache] = None,
+        backend: Optional[LLMBackend] = None
+    ):
         self.config = config
-        self.client = OpenAI(api_key=self.config.OPENAI_API_KEY)
+        # Dostawca modelu wybierany przez LLM_PROVIDER (openai lub lokalny fake)
+        self.backend = backend or create_llm_backend(config)
+        self.model = self.backend.model
+        self.evaluation_cache = evaluation_cache
+        self.rate_limiter = TokenBucketRateLimiter.instance(
+            self.config.OPENAI_REQUESTS_PER_MINUTE,
+            self.config.OPENAI_TOKENS_PER_MINUTE
+        )
         self.logger = Logger.instance()
         
     def evaluate_answer(
@@ -20,6 +69,7 @@ class OpenAIService:
     ) -> Optional[float]:
         """
         Ocenia odpowiedź używając API OpenAI i zwraca wynik między 0 a max_points.
+        Jeśli ta sama odpowiedź była już oceniana, zwraca ocenę zapisaną w cache.
         
         Args:
             question_text: Treść pytania
@@ -28,6 +78,53 @@ class OpenAIService:
             algorithm_params: Słownik zawierający evaluation_focus i scoring_criteria
             custom_prompt: Opcjonalny własny prompt zastępujący domyślny
         """
+        cache_key = self.cache_key(question_text, answer_text, max_points, algorithm_params, custom_prompt)
+        if cache_key:
+            cached = self.evaluation_cache.get(cache_key)
+            if cached is not None:
+                self.logger.info(f"Użyto zapisanej oceny AI: {cached['score']}/{max_points} punktów")
+                return cached
+        
+        return self._evaluate_and_store(cache_key, question_text, answer_text, max_points, algorithm_params, custom_prompt)
+    
+    def cache_key(
+        self,
+        question_text: str,
+        answer_text: str,
+        max_points: int,
+        algorithm_params: dict = None,
+        custom_prompt: Optional[str] = None,
+        prompt_version: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Klucz oceny w cache lub None, gdy cache jest wyłączony albo danych nie da się serializować.
+        Oceny z promptu zbiorczego mają osobne klucze (prompt_version=PACKED_PROMPT_VERSION).
+        """
+        if self.evaluation_cache is None:
+            return None
+        try:
+            return AIEvaluationCache.make_key(
+                question_text, answer_text, max_points, algorithm_params,
+                prompt_version or self.PROMPT_VERSION, self.model, custom_prompt
+            )
+        except (TypeError, ValueError):
+            return None
+    
+    def _evaluate_and_store(self, cache_key: Optional[str], *args, **kwargs) -> Optional[dict]:
+        result = self._request_evaluation(*args, **kwargs)
+        if result is not None and cache_key:
+            self.evaluation_cache.put(cache_key, result, self.PROMPT_VERSION, self.model)
+        return result
+        
+    def _request_evaluation(
+        self,
+        question_text: str,
+        answer_text: str,
+        max_points: int,
+        algorithm_params: dict = None,
+        custom_prompt: Optional[str] = None
+    ) -> Optional[dict]:
+        """Wysyła odpowiedź do oceny przez API OpenAI"""
         try:
             self.logger.info(f"Rozpoczęcie oceny odpowiedzi przez AI")
             self.logger.debug(f"Długość odpowiedzi do oceny: {len(answer_text)} znaków")
@@ -42,18 +139,72 @@ class OpenAIService:
             # Before API call
             self.logger.info("Wysyłanie zapytania do API OpenAI...")
             
-            # Domyślne kryteria oceny jeśli nie podano własnych
-            default_evaluation_focus = 'Oceń kompletność i dokładność odpowiedzi.'
-            default_scoring_criteria = f'''
+            prompt = self.build_prompt(question_text, answer_text, max_points, algorithm_params, custom_prompt)
+            
+            # Wywołanie API
+            self.logger.debug(f"Wysyłanie zapytania do modelu {self.model}")
+            completion = self._create_completion(prompt)
+            
+            # Parsowanie odpowiedzi
+            self.logger.debug("Otrzymano odpowiedź od API, rozpoczęcie parsowania")
+            response = completion.content
+            try:
+                result = self.parse_evaluation(response, max_points)
+                self.logger.debug(f"Pomyślnie sparsowano JSON: {result}")
+            except json.JSONDecodeError as e:
+                self.logger.error(f"Błąd parsowania JSON: {str(e)}")
+                self.logger.debug(f"Otrzymana odpowiedź: {response}")
+                return None
+            
+            score = float(result['score'])
+                
+            # After API call
+            self.logger.debug(f"Otrzymano odpowiedź od API")
+            
+            # Before parsing
+            self.logger.debug("Rozpoczęcie parsowania odpowiedzi JSON")
+            
+            # After validation
+            self.logger.info(
+                f"Zakończono ocenę odpowiedzi. "
+                f"Przyznano {score}/{max_points} punktów. "
+                f"Uzasadnienie: {result['explanation']}"
+            )
+            
+            return result
+            
+        except AIEvaluationDeferred:
+            raise
+        except Exception as e:
+            self.logger.error(f"Wystąpił błąd podczas oceny odpowiedzi: {str(e)}")
+            self.logger.debug(f"Szczegóły błędu: {e.__class__.__name__}")
+            return None
+
+
+    def build_prompt(
+        self,
+        question_text: str,
+        answer_text: str,
+        max_points: int,
+        algorithm_params: dict = None,
+        custom_prompt: Optional[str] = None
+    ) -> str:
+        """Buduje prompt oceny odpowiedzi (domyślny lub własny)"""
+        if custom_prompt:
+            return custom_prompt
+        
+        # Domyślne kryteria oceny jeśli nie podano własnych
+        default_evaluation_focus = 'Oceń kompletność i dokładność odpowiedzi.'
+        default_scoring_criteria = f'''
             - {max_points} punktów: Doskonała odpowiedź, która w pełni odpowiada na pytanie
             - {max_points * 0.75} punktów: Bardzo dobra odpowiedź z drobnymi pominięciami
             - {max_points * 0.5} punktów: Odpowiedź zadowalająca, która częściowo odpowiada na pytanie
             - {max_points * 0.25} punktów: Słaba odpowiedź z istotnymi brakami
             - 0 punktów: Całkowicie niepoprawna lub nieadekwatna odpowiedź
             '''
-            
-            # Domyślny prompt jeśli nie podano własnego
-            default_prompt = f"""
+        
+        # Domyślny prompt jeśli nie podano własnego
+        default_prompt = f"""
             Jesteś ekspertem oceniającym w procesie rekrutacji. Oceń następującą odpowiedź na pytanie.
             
             Pytanie: {question_text}
@@ -74,52 +225,285 @@ class OpenAIService:
             
             Bądź surowy, ale sprawiedliwy i obiektywny w swojej ocenie. Liczba punktów musi być między 0 a {max_points}.
             """
+        
+        return default_prompt
+    
+    def parse_evaluation(self, response: str, max_points: float) -> dict:
+        """
+        Parsuje odpowiedź modelu z oceną.
+        
+        Args:
+            response: Treść odpowiedzi modelu
+            max_points: Maksymalna liczba punktów za pytanie
             
-            prompt = custom_prompt if custom_prompt else default_prompt
+        Returns:
+            dict: Ocena z polami score i explanation
             
-            # Wywołanie API
-            self.logger.debug("Wysyłanie zapytania do modelu GPT-4")
-            completion = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                # response_format={"type": "json_object"},
-            )
+        Raises:
+            json.JSONDecodeError: Gdy odpowiedź nie zawiera obiektu JSON z oceną
+            ValueError: Gdy wynik jest poza zakresem [0, max_points]
+        """
+        # Odpowiedź może zawierać opis lub blok kodu wokół obiektu JSON
+        result = extract_json(response, required_keys=('score', 'explanation'))
+        score = float(result['score'])
+        
+        # Walidacja czy wynik mieści się w zakresie
+        if not 0 <= score <= max_points:
+            self.logger.warning(f"Wynik {score} jest poza dozwolonym zakresem [0, {max_points}]")
+            raise ValueError(f"Wynik {score} jest poza dozwolonym zakresem [0, {max_points}]")
+        
+        return result
+    
+    def batch_request(self, custom_id: str, prompt: str) -> dict:
+        """
+        Buduje wiersz pliku JSONL dla Batch API z tym samym modelem i promptem co zapytanie synchroniczne
+        
+        Args:
+            custom_id: Identyfikator zapytania zwracany razem z wynikiem
+            prompt: Prompt oceny
+        """
+        body = {
+            'model': self.model,
+            'messages': [{"role": "user", "content": prompt}]
+        }
+        if self._response_format():
+            body['response_format'] = self._response_format()
+        
+        return {
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': body
+        }
+
+    def _create_completion(self, prompt: str, completion_tokens: Optional[int] = None) -> LLMCompletion:
+        """
+        Wysyła zapytanie do modelu z zachowaniem limitów zapytań i tokenów na minutę.
+        Błędy 429, 5xx i błędy połączenia są ponawiane z wykładniczym opóźnieniem z losowym rozrzutem.
+        
+        Raises:
+            AIEvaluationDeferred: Gdy zapytanie nie powiodło się po wszystkich próbach
+        """
+        # Szacunek: ok. 4 znaki na token promptu plus miejsce na odpowiedź
+        if completion_tokens is None:
+            completion_tokens = self.config.OPENAI_COMPLETION_TOKENS_ESTIMATE
+        estimated_tokens = len(prompt) // 4 + completion_tokens
+        max_retries = self.config.OPENAI_MAX_RETRIES
+        
+        for attempt in range(max_retries + 1):
+            waited = self.rate_limiter.acquire(estimated_tokens)
+            if waited > 0:
+                self.logger.debug(f"Oczekiwano {waited:.1f}s na limit zapytań OpenAI")
             
-            # Parsowanie odpowiedzi
-            self.logger.debug("Otrzymano odpowiedź od API, rozpoczęcie parsowania")
-            response = completion.choices[0].message.content
             try:
-                import json
-                result = json.loads(response)
-                self.logger.debug(f"Pomyślnie sparsowano JSON: {result}")
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Błąd parsowania JSON: {str(e)}")
-                self.logger.debug(f"Otrzymana odpowiedź: {response}")
-                return None
+                # Wątki wszystkich kandydatów (CRON_WORKERS) dzielą jeden limit OPENAI_MAX_CONCURRENCY
+                with self.request_slots(self.config.OPENAI_MAX_CONCURRENCY):
+                    completion = self.backend.complete(prompt, self._response_format())
+                if completion.total_tokens is not None:
+                    self.rate_limiter.record_usage(estimated_tokens, completion.total_tokens)
+                return completion
             
-            score = float(result['score'])
-            
-            # Walidacja czy wynik mieści się w zakresie
-            if not 0 <= score <= max_points:
-                self.logger.warning(f"Wynik {score} jest poza dozwolonym zakresem [0, {max_points}]")
-                raise ValueError(f"Wynik {score} jest poza dozwolonym zakresem [0, {max_points}]")
+            except LLMRetryableError as e:
+                if attempt == max_retries:
+                    self.logger.warning(f"Ocena AI odłożona po {attempt + 1} próbach: {str(e)}")
+                    raise AIEvaluationDeferred(
+                        message="Nie udało się ocenić odpowiedzi przez AI - ocena zostanie ponowiona później",
+                        original_error=e
+                    )
                 
-            # After API call
-            self.logger.debug(f"Otrzymano odpowiedź od API")
-            
-            # Before parsing
-            self.logger.debug("Rozpoczęcie parsowania odpowiedzi JSON")
+                delay = self._retry_delay(attempt, e.retry_after)
+                self.logger.warning(
+                    f"Błąd modelu ({e.message}), ponowienie {attempt + 1}/{max_retries} za {delay:.1f}s"
+                )
+                time.sleep(delay)
+    
+    def _response_format(self) -> Optional[Dict[str, Any]]:
+        """Tryb JSON (OPENAI_JSON_MODE) wymusza odpowiedź w postaci poprawnego obiektu JSON"""
+        if self.config.OPENAI_JSON_MODE:
+            return {'type': 'json_object'}
+        return None
+    
+    def _retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Opóźnienie przed ponowieniem: wykładnicze z losowym rozrzutem, nie krótsze niż Retry-After"""
+        backoff = min(self.config.OPENAI_BACKOFF_MAX_SECONDS, self.config.OPENAI_BACKOFF_BASE_SECONDS * (2 ** attempt))
+        delay = backoff / 2 + random.uniform(0, backoff / 2)
+        
+        if retry_after:
+            delay = max(delay, min(retry_after, self.config.OPENAI_BACKOFF_MAX_SECONDS))
+        
+        return delay
+
+    def evaluate_answers_batch(self, evaluations: List[Dict[str, Any]]) -> List[Optional[dict]]:
+        """
+        Ocenia wiele odpowiedzi równolegle. Liczba zapytań wysyłanych jednocześnie przez cały
+        proces (także z innych wątków crona) jest ograniczona do OPENAI_MAX_CONCURRENCY.
+        
+        Args:
+            evaluations: Lista słowników z argumentami evaluate_answer
+                (question_text, answer_text, max_points, algorithm_params)
+                
+        Returns:
+            List[Optional[dict]]: Wyniki evaluate_answer w kolejności przekazanych odpowiedzi
+        """
+        if not evaluations:
+            return []
+        
+        # Odpowiedzi z domyślnym promptem są łączone po AI_PACK_SIZE w jedno zapytanie,
+        # a ich oceny zapisywane pod kluczami promptu zbiorczego
+        pack_size = self.config.AI_PACK_SIZE
+        keys = [self.cache_key(**evaluation) for evaluation in evaluations]
+        packed_keys = [
+            self.cache_key(**evaluation, prompt_version=self.PACKED_PROMPT_VERSION)
+            if pack_size > 1 and self._is_packable(evaluation) else None
+            for evaluation in evaluations
+        ]
+        
+        # Oceny zapisane w cache są pobierane jednym zapytaniem; ocena pojedyncza ma pierwszeństwo
+        lookup = [key for key in keys + packed_keys if key]
+        cached = self.evaluation_cache.get_many(lookup) if self.evaluation_cache and lookup else {}
+        results = [
+            cached.get(key) or cached.get(packed_key)
+            for key, packed_key in zip(keys, packed_keys)
+        ]
+        missing = [index for index, result in enumerate(results) if result is None]
+        
+        if len(missing) < len(evaluations):
+            self.logger.info(f"Użyto {len(evaluations) - len(missing)} zapisanych ocen AI z cache")
+        if not missing:
+            return results
+        
+        if pack_size > 1:
+            packable = [index for index in missing if self._is_packable(evaluations[index])]
+            units = [[index] for index in missing if index not in packable]
+            units += [packable[start:start + pack_size] for start in range(0, len(packable), pack_size)]
+        else:
+            units = [[index] for index in missing]
+        
+        workers = min(self.config.OPENAI_MAX_CONCURRENCY, len(units))
+        self.logger.info(
+            f"Równoległa ocena {len(missing)} odpowiedzi przez AI "
+            f"({len(units)} zapytań, do {workers} zapytań naraz w procesie)"
+        )
+        log_prefix = self.logger.current_context()
+        
+        def evaluate(unit: List[int]) -> List[Optional[dict]]:
+            with self.logger.context(log_prefix):
+                if len(unit) == 1:
+                    return [self._evaluate_and_store(keys[unit[0]], **evaluations[unit[0]])]
+                return self._evaluate_pack(
+                    [keys[index] for index in unit],
+                    [packed_keys[index] for index in unit],
+                    [evaluations[index] for index in unit]
+                )
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='openai') as executor:
+            for unit, unit_results in zip(units, executor.map(evaluate, units)):
+                for index, result in zip(unit, unit_results):
+                    results[index] = result
+        
+        return results
+    
+    def _is_packable(self, evaluation: Dict[str, Any]) -> bool:
+        return not evaluation.get('custom_prompt') and isinstance(evaluation.get('algorithm_params'), dict)
+    
+    def _evaluate_pack(
+        self,
+        keys: List[Optional[str]],
+        packed_keys: List[Optional[str]],
+        evaluations: List[Dict[str, Any]]
+    ) -> List[Optional[dict]]:
+        """
+        Ocenia kilka odpowiedzi jednym zapytaniem. Odpowiedzi, dla których nie udało się
+        odczytać poprawnej oceny, są oceniane pojedynczo.
+        
+        Args:
+            keys: Klucze cache ocen pojedynczych (dla odpowiedzi ocenianych pojedynczo)
+            packed_keys: Klucze cache ocen z promptu zbiorczego (PACKED_PROMPT_VERSION)
+            evaluations: Argumenty evaluate_answer dla każdej odpowiedzi
             
-            # After validation
-            self.logger.info(
-                f"Zakończono ocenę odpowiedzi. "
-                f"Przyznano {score}/{max_points} punktów. "
-                f"Uzasadnienie: {result['explanation']}"
+        Returns:
+            List[Optional[dict]]: Oceny w kolejności przekazanych odpowiedzi
+        """
+        results = self._request_packed_evaluation(evaluations)
+        
+        stored = {}
+        for key, result in zip(packed_keys, results):
+            if result is not None and key:
+                stored[key] = result
+        if stored and self.evaluation_cache:
+            self.evaluation_cache.put_many(stored, self.PACKED_PROMPT_VERSION, self.model)
+        
+        fallback = [position for position, result in enumerate(results) if result is None]
+        if fallback:
+            self.logger.warning(f"Nie odczytano {len(fallback)}/{len(evaluations)} ocen ze zbiorczej odpowiedzi, ocena pojedyncza")
+        for position in fallback:
+            results[position] = self._evaluate_and_store(keys[position], **evaluations[position])
+        
+        return results
+    
+    def _request_packed_evaluation(self, evaluations: List[Dict[str, Any]]) -> List[Optional[dict]]:
+        """Wysyła kilka odpowiedzi do oceny w jednym zapytaniu i zwraca oceny, które udało się odczytać"""
+        results = [None] * len(evaluations)
+        try:
+            self.logger.info(f"Wysyłanie {len(evaluations)} odpowiedzi do oceny w jednym zapytaniu")
+            prompt = self.build_packed_prompt(evaluations)
+            completion = self._create_completion(
+                prompt,
+                completion_tokens=self.config.OPENAI_COMPLETION_TOKENS_ESTIMATE * len(evaluations)
             )
+            response = completion.content
+            items = extract_json(response)
+            if isinstance(items, dict):
+                items = items.get('results', [])
             
-            return result
-            
+        except AIEvaluationDeferred:
+            raise
         except Exception as e:
-            self.logger.error(f"Wystąpił błąd podczas oceny odpowiedzi: {str(e)}")
-            self.logger.debug(f"Szczegóły błędu: {e.__class__.__name__}")
-            return None
+            self.logger.error(f"Błąd podczas zbiorczej oceny odpowiedzi: {str(e)}")
+            return results
+        
+        for item in items if isinstance(items, list) else []:
+            try:
+                position = int(item['id']) - 1
+                if not 0 <= position < len(evaluations) or results[position] is not None:
+                    continue
+                item_json = json.dumps({'score': item['score'], 'explanation': item.get('explanation')})
+                results[position] = self.parse_evaluation(item_json, evaluations[position]['max_points'])
+            except Exception as e:
+                self.logger.debug(f"Pominięto nieprawidłową ocenę w zbiorczej odpowiedzi: {str(e)}")
+        
+        return results
+    
+    def build_packed_prompt(self, evaluations: List[Dict[str, Any]]) -> str:
+        """
+        Buduje jeden prompt oceny dla kilku odpowiedzi. Instrukcje są podane raz,
+        a każda odpowiedź ma numer, pod którym model zwraca jej ocenę.
+        """
+        items = []
+        for number, evaluation in enumerate(evaluations, start=1):
+            params = evaluation.get('algorithm_params') or {}
+            item = (
+                f"[{number}]\n"
+                f"Pytanie: {evaluation['question_text']}\n"
+                f"Odpowiedź: {evaluation['answer_text']}\n"
+                f"Maksymalna liczba punktów: {evaluation['max_points']}"
+            )
+            if params.get('evaluation_focus'):
+                item += f"\nNa co zwrócić uwagę: {params['evaluation_focus']}"
+            if params.get('scoring_criteria'):
+                item += f"\nKryteria przyznawania punktów: {params['scoring_criteria']}"
+            items.append(item)
+        
+        separator = '\n\n'
+        return (
+            "Jesteś ekspertem oceniającym w procesie rekrutacji. Oceń każdą z poniższych odpowiedzi niezależnie.\n\n"
+            "Jeśli dla odpowiedzi nie podano, na co zwrócić uwagę, oceń kompletność i dokładność odpowiedzi. "
+            "Jeśli nie podano kryteriów, przyznaj: 100% punktów za doskonałą odpowiedź, 75% za bardzo dobrą "
+            "z drobnymi pominięciami, 50% za zadowalającą, 25% za słabą z istotnymi brakami, "
+            "0 za całkowicie niepoprawną lub nieadekwatną.\n\n"
+            f"{separator.join(items)}\n\n"
+            "WAŻNE: Odpowiedz w formacie JSON z jedną oceną dla każdej odpowiedzi:\n"
+            '{"results": [{"id": <numer_odpowiedzi>, "score": <liczba_punktów>, "explanation": "<krótkie uzasadnienie oceny>"}]}\n\n'
+            "Bądź surowy, ale sprawiedliwy i obiektywny w swojej ocenie. "
+            "Liczba punktów musi być między 0 a maksymalną liczbą punktów danej odpowiedzi."
+        )
@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from common.config import Config
+
+class QuestionCache:
+    """Współdzielony w procesie cache LRU definicji testów (typ testu i pytania)"""
+
+    _instance: Optional['QuestionCache'] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> 'QuestionCache':
+        """Zwraca instancję cache o rozmiarze z QUESTION_CACHE_SIZE"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(Config.instance().QUESTION_CACHE_SIZE)
+        return cls._instance
+
+    def __init__(self, max_size: int = 128):
+        """
+        Args:
+            max_size: Maksymalna liczba testów przechowywanych w cache
+        """
+        self.max_size = max(1, int(max_size or 1))
+        self._entries: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, test_id: int, version: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Zwraca definicję testu, jeśli w cache jest wersja zgodna z podaną.
+
+        Args:
+            test_id: ID testu
+            version: Wersja testu (tests.updated_at)
+
+        Returns:
+            Optional[Dict[str, Any]]: Definicja testu lub None, gdy brak jej w cache lub jest nieaktualna
+        """
+        with self._lock:
+            entry = self._entries.get(test_id)
+            if entry is None:
+                return None
+            if entry['version'] != version:
+                del self._entries[test_id]
+                return None
+            self._entries.move_to_end(test_id)
+            return entry
+
+    def put(self, test_id: int, version: Optional[str], definition: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Zapisuje definicję testu w cache, usuwając najdawniej używane wpisy.
+
+        Args:
+            test_id: ID testu
+            version: Wersja testu (tests.updated_at)
+            definition: Definicja testu; nie może być później modyfikowana
+
+        Returns:
+            Dict[str, Any]: Zapisany wpis
+        """
+        entry = {**definition, 'version': version}
+        with self._lock:
+            self._entries[test_id] = entry
+            self._entries.move_to_end(test_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, test_id: Optional[int] = None) -> None:
+        """Usuwa z cache podany test lub wszystkie testy"""
+        with self._lock:
+            if test_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(test_id, None)
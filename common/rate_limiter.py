@@ -0,0 +1,83 @@
+import threading
+import time
+from typing import Optional
+
+class TokenBucketRateLimiter:
+    """
+    Ogranicznik liczby zapytań i tokenów na minutę (algorytm token bucket),
+    współdzielony przez wszystkie wątki procesu. Limit 0 oznacza brak ograniczenia.
+    """
+
+    _instance: Optional['TokenBucketRateLimiter'] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls, requests_per_minute: int, tokens_per_minute: int) -> 'TokenBucketRateLimiter':
+        """Zwraca ogranicznik procesu, tworząc go przy pierwszym wywołaniu"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(requests_per_minute, tokens_per_minute)
+        return cls._instance
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Args:
+            requests_per_minute: Maksymalna liczba zapytań na minutę (0 = bez limitu)
+            tokens_per_minute: Maksymalna liczba tokenów na minutę (0 = bez limitu)
+        """
+        self.requests_per_minute = max(0, requests_per_minute)
+        self.tokens_per_minute = max(0, tokens_per_minute)
+        self._requests = float(self.requests_per_minute)
+        self._tokens = float(self.tokens_per_minute)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Czeka, aż w kubełkach będzie miejsce na jedno zapytanie i podaną liczbę tokenów.
+
+        Args:
+            tokens: Szacowana liczba tokenów zapytania
+
+        Returns:
+            float: Łączny czas oczekiwania w sekundach
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                tokens_needed = min(tokens, self.tokens_per_minute)
+                wait_requests = self._wait_time(self._requests, 1, self.requests_per_minute)
+                wait_tokens = self._wait_time(self._tokens, tokens_needed, self.tokens_per_minute)
+                delay = max(wait_requests, wait_tokens)
+                if delay <= 0:
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= tokens_needed
+                    return waited
+            time.sleep(delay)
+            waited += delay
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Koryguje stan kubełka tokenów o różnicę między szacowanym a faktycznym zużyciem"""
+        if not self.tokens_per_minute:
+            return
+        with self._lock:
+            self._tokens = min(float(self.tokens_per_minute), self._tokens + estimated_tokens - actual_tokens)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed_minutes = (now - self._updated_at) / 60
+        self._updated_at = now
+        if self.requests_per_minute:
+            self._requests = min(float(self.requests_per_minute), self._requests + elapsed_minutes * self.requests_per_minute)
+        if self.tokens_per_minute:
+            self._tokens = min(float(self.tokens_per_minute), self._tokens + elapsed_minutes * self.tokens_per_minute)
+
+    @staticmethod
+    def _wait_time(available: float, needed: float, per_minute: int) -> float:
+        if not per_minute or available >= needed:
+            return 0.0
+        return (needed - available) * 60 / per_minute
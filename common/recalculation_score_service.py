@@ -4,6 +4,7 @@ from supabase import Client
 from common.logger import Logger
 from common.config import Config
 from common.email_service import EmailService
+from common.email_outbox import EmailOutbox
 from common.test_score_service import TestScoreService
 from common.token_utils import generate_access_token
 
@@ -27,15 +28,18 @@ class RecalculationScoreService:
         self.config = config
         self.test_score_service = test_score_service
         self.email_service = email_service
+        self.email_outbox = EmailOutbox(supabase)
         self.logger = Logger.instance()
 
 
-    def recalculate_candidate_scores(self, candidate_id: int) -> Dict[str, Any]:
+    def recalculate_candidate_scores(self, candidate_id: int, candidate: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Przelicza ponownie wyniki kandydata dla wszystkich testów.
         
         Args:
             candidate_id (int): ID kandydata
+            candidate (Optional[Dict[str, Any]]): Dane kandydata z kampanią, jeśli zostały już
+                pobrane (np. paczkami w zadaniu przeliczania) - pomija ich ponowne pobieranie
             
         Returns:
             Dict[str, Any]: Wynik przeliczenia z informacją o zmianach
@@ -46,22 +50,23 @@ class RecalculationScoreService:
         try:
             self.logger.info(f"Rozpoczęcie ponownego przeliczania wyników dla kandydata {candidate_id}")
             
-            # Get candidate data with campaign
-            self.logger.debug(f"Pobieranie danych kandydata {candidate_id} wraz z kampanią")
-            candidate_response = self.supabase.table('candidates')\
-                .select('*, campaign:campaigns!campaign_id(*)')\
-                .eq('id', candidate_id)\
-                .single()\
-                .execute()
-                
-            if not candidate_response.data:
-                self.logger.warning(f"Nie znaleziono kandydata {candidate_id}")
-                return {
-                    "status": "error",
-                    "message": "Candidate not found"
-                }
-                
-            candidate = candidate_response.data
+            if candidate is None:
+                # Get candidate data with campaign
+                self.logger.debug(f"Pobieranie danych kandydata {candidate_id} wraz z kampanią")
+                candidate_response = self.supabase.table('candidates')\
+                    .select('*, campaign:campaigns!campaign_id(*)')\
+                    .eq('id', candidate_id)\
+                    .single()\
+                    .execute()
+                    
+                if not candidate_response.data:
+                    self.logger.warning(f"Nie znaleziono kandydata {candidate_id}")
+                    return {
+                        "status": "error",
+                        "message": "Candidate not found"
+                    }
+                    
+                candidate = candidate_response.data
             campaign = candidate['campaign']
             original_status = candidate.get('recruitment_status')
             current_time = datetime.now(timezone.utc)
@@ -85,6 +90,7 @@ class RecalculationScoreService:
                 'recruitment_status': original_status
             }
             score_changes = {}
+            emails = []
             
             # Store original scores for comparison
             original_scores = {
@@ -114,10 +120,7 @@ class RecalculationScoreService:
                             'status': 'REJECTED_CRITICAL'
                         }
                         updates['updated_at'] = current_time.isoformat()
-                        self.supabase.table('candidates')\
-                            .update(updates)\
-                            .eq('id', candidate_id)\
-                            .execute()
+                        self._save_candidate(candidate_id, updates, emails)
                         return {
                             "status": "success",
                             "changes": score_changes,
@@ -144,11 +147,11 @@ class RecalculationScoreService:
                                 updates['recruitment_status'] = 'REJECTED'
                             elif original_status == 'REJECTED' and last_stage == 'PO1' and result['score'] >= passing_threshold:
                                 updates['recruitment_status'] = 'PO2'
-                                result = self._generate_token(candidate, campaign, 'PO2')
+                                result = self._generate_token(candidate, campaign, 'PO2', emails)
                                 updates.update(result)
                             elif original_status == 'PO1' and original_scores['po1_score'] is None and result['score'] >= passing_threshold:
                                 updates['recruitment_status'] = 'PO2'
-                                result = self._generate_token(candidate, campaign, 'PO2')
+                                result = self._generate_token(candidate, campaign, 'PO2', emails)
                                 updates.update(result)
                             elif result['score'] >= passing_threshold:
                                 updates['recruitment_status'] = 'PO2'
@@ -170,10 +173,7 @@ class RecalculationScoreService:
                         'status': 'REJECTED_CRITICAL'
                     }
                     updates['updated_at'] = current_time.isoformat()
-                    self.supabase.table('candidates')\
-                        .update(updates)\
-                        .eq('id', candidate_id)\
-                        .execute()
+                    self._save_candidate(candidate_id, updates, emails)
                     return {
                         "status": "success",
                         "changes": score_changes,
@@ -216,10 +216,7 @@ class RecalculationScoreService:
                         'status': 'REJECTED_CRITICAL'
                     }
                     updates['updated_at'] = current_time.isoformat()
-                    self.supabase.table('candidates')\
-                        .update(updates)\
-                        .eq('id', candidate_id)\
-                        .execute()
+                    self._save_candidate(candidate_id, updates, emails)
                     return {
                         "status": "success",
                         "changes": score_changes,
@@ -246,11 +243,11 @@ class RecalculationScoreService:
                             updates['recruitment_status'] = 'REJECTED'
                         elif original_status == 'REJECTED' and (last_stage == 'PO2_5' or last_stage == 'PO2') and result['score'] >= passing_threshold:
                             updates['recruitment_status'] = 'PO3'
-                            result = self._generate_token(candidate, campaign, 'PO3')
+                            result = self._generate_token(candidate, campaign, 'PO3', emails)
                             updates.update(result)
                         elif (original_status == 'PO2_5' or original_status == 'PO2') and original_scores['po2_5_score'] is None and result['score'] >= passing_threshold:
                             updates['recruitment_status'] = 'PO3'
-                            result = self._generate_token(candidate, campaign, 'PO3')
+                            result = self._generate_token(candidate, campaign, 'PO3', emails)
                             updates.update(result)
                         elif result['score'] >= passing_threshold:
                             updates['recruitment_status'] = 'PO3'
@@ -272,10 +269,7 @@ class RecalculationScoreService:
                         'status': 'REJECTED_CRITICAL'
                     }
                     updates['updated_at'] = current_time.isoformat()
-                    self.supabase.table('candidates')\
-                        .update(updates)\
-                        .eq('id', candidate_id)\
-                        .execute()
+                    self._save_candidate(candidate_id, updates, emails)
                     return {
                         "status": "success",
                         "changes": score_changes,
@@ -331,10 +325,7 @@ class RecalculationScoreService:
                 
                 # Update database
                 self.logger.debug(f"Aktualizacja wyników w bazie danych dla kandydata {candidate_id}")
-                self.supabase.table('candidates')\
-                    .update(updates)\
-                    .eq('id', candidate_id)\
-                    .execute()
+                self._save_candidate(candidate_id, updates, emails)
                 
                 # Log changes
                 self.logger.info(f"Zaktualizowano wyniki kandydata {candidate_id}. Zmiany: {updates}")
@@ -434,14 +425,37 @@ class RecalculationScoreService:
             return 0.0
 
 
-    def _generate_token(self, candidate: Dict[str, Any], campaign: dict[str, Any], next_stage: str) -> None:
+    def _save_candidate(self, candidate_id: int, updates: Dict[str, Any], emails: List[Dict[str, Any]]) -> None:
+        """
+        Zapisuje zmiany kandydata. Zaproszenia są dodawane do kolejki email_outbox
+        w tej samej transakcji co nowy token, więc zmiana etapu i wiadomość zapisują się razem.
+        """
+        if not emails:
+            self.supabase.table('candidates')\
+                .update(updates)\
+                .eq('id', candidate_id)\
+                .execute()
+            return
+
+        self.email_outbox.update_candidate_and_enqueue(candidate_id, updates, emails)
+        emails.clear()
+
+
+    def _generate_token(
+        self,
+        candidate: Dict[str, Any],
+        campaign: dict[str, Any],
+        next_stage: str,
+        emails: List[Dict[str, Any]]
+    ) -> None:
         """
-        Generuje token dostępu i wysyła email do kandydata
+        Generuje token dostępu i przygotowuje zaproszenie dla kandydata
         
         Args:
             candidate: Dane kandydata
             campaign: Dane kampanii
             next_stage: Etap rekrutacji (PO2/PO3)
+            emails: Lista, do której dodawane jest zaproszenie (zapisywane przez _save_candidate)
         """
         self.logger.info(f"Generowanie tokenu dla kandydata {candidate['id']} na etap {next_stage}")
         try:
@@ -496,15 +510,16 @@ class RecalculationScoreService:
                 'PO3': 'Test końcowy'
             }.get(next_stage, f'Test {next_stage}')
             
-            if self.email_service.send_test_invitation(
+            # Zaproszenie trafi do kolejki razem z zapisem tokenu (_save_candidate)
+            emails.append(self.email_service.build_test_invitation(
                 to_email=candidate['email'],
                 stage_name=stage_name,
                 campaign_title=campaign.get('title'),
                 test_url=test_url,
                 expiry_date=formatted_expiry,
                 test_details=test_details
-            ):
-                self.logger.info(f"Wysłano zaproszenie na {stage_name} do kandydata {candidate['id']}")
+            ))
+            self.logger.info(f"Przygotowano zaproszenie na {stage_name} dla kandydata {candidate['id']}")
 
             return updates
 
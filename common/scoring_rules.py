@@ -0,0 +1,336 @@
+from datetime import datetime
+from typing import Any, Optional
+from common.logger import Logger
+
+NUMERIC_ANSWER_TYPES = ('SCALE', 'SALARY', 'NUMERIC')
+SIDED_ALGORITHMS = ('LEFT_SIDED', 'RIGHT_SIDED', 'CENTER')
+
+
+def parse_number(value: Any) -> float:
+    """Parsuje liczbę zapisaną z przecinkiem lub kropką dziesiętną"""
+    return float(str(value).replace(',', '.'))
+
+
+def parse_date(value: Any) -> Any:
+    """Parsuje datę w formacie YYYY-MM-DD; wartości niebędące tekstem zwraca bez zmian"""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+
+class ScoringRule:
+    """
+    Reguła oceny pytania z parametrami algorytmu przetworzonymi przy kompilacji.
+    Bazowa reguła zawsze zwraca 0 punktów.
+    """
+
+    requires_ai = False
+
+    def __init__(self, max_points: float):
+        self.max_points = max_points
+
+    def score(self, answer: dict) -> float:
+        """
+        Oblicza surowy wynik odpowiedzi przed zaokrągleniem.
+
+        Args:
+            answer: Odpowiedź kandydata
+
+        Returns:
+            float: Surowy wynik
+        """
+        return 0.0
+
+
+class AIEvaluationRule(ScoringRule):
+    """Pytanie oceniane przez AI - ocenę wykonuje TestScoreService"""
+
+    requires_ai = True
+
+
+class TextExactMatchRule(ScoringRule):
+    """Porównanie tekstu bez względu na wielkość liter i białe znaki na końcach"""
+
+    def __init__(self, max_points: float, correct_answer: Any):
+        super().__init__(max_points)
+        self.correct_answer = str(correct_answer).strip().lower()
+
+    def score(self, answer: dict) -> float:
+        user_answer = str(answer.get('answer', '')).strip().lower()
+        return float(self.max_points) if user_answer == self.correct_answer else 0.0
+
+
+class BooleanExactMatchRule(ScoringRule):
+    """Porównanie odpowiedzi tak/nie z wartością correct_answer zapisaną w parametrach"""
+
+    def __init__(self, max_points: float, correct_answer: Any):
+        super().__init__(max_points)
+        self.correct_answer = correct_answer
+
+    def score(self, answer: dict) -> float:
+        try:
+            user_answer = str(answer.get('answer', '')).lower()
+            return float(self.max_points) if user_answer == self.correct_answer else 0.0
+        except:
+            return 0.0
+
+
+class NumericRule(ScoringRule):
+    """Ocena odpowiedzi liczbowych (SCALE, SALARY, NUMERIC)"""
+
+    def __init__(
+        self,
+        max_points: float,
+        algorithm_type: str,
+        epsilon: float = 0.0,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+        correct_answer: Optional[float] = None
+    ):
+        super().__init__(max_points)
+        self.algorithm_type = algorithm_type
+        self.epsilon = epsilon
+        self.min_value = min_value
+        self.max_value = max_value
+        self.correct_answer = correct_answer
+
+    def score(self, answer: dict) -> float:
+        try:
+            user_answer = parse_number(answer.get('answer', ''))
+        except (ValueError, TypeError):
+            return 0.0
+
+        try:
+            return self._score_value(user_answer)
+        except (ValueError, TypeError, ZeroDivisionError):
+            return 0.0
+
+    def _score_value(self, user_answer: float) -> float:
+        max_points = self.max_points
+        algorithm_type = self.algorithm_type
+
+        if algorithm_type == 'EXACT_MATCH':
+            return float(max_points) if abs(user_answer - self.correct_answer) < self.epsilon else 0.0
+
+        if algorithm_type == 'RANGE':
+            return float(max_points) if self.min_value <= user_answer <= self.max_value else 0.0
+
+        min_value = self.min_value
+        max_value = self.max_value
+        correct_answer = self.correct_answer
+
+        if algorithm_type == 'LEFT_SIDED':
+            if user_answer < min_value:
+                return 0.0
+            elif user_answer >= correct_answer:
+                return float(max_points)
+            return max_points * (user_answer - min_value) / (correct_answer - min_value)
+
+        if algorithm_type == 'RIGHT_SIDED':
+            if user_answer > max_value:
+                return 0.0
+            elif user_answer <= correct_answer:
+                return float(max_points)
+            return max_points * (max_value - user_answer) / (max_value - correct_answer)
+
+        # CENTER
+        if user_answer == correct_answer:
+            return float(max_points)
+        elif user_answer < min_value or user_answer > max_value:
+            return 0.0
+        elif user_answer < correct_answer:
+            return max_points * (user_answer - min_value) / (correct_answer - min_value)
+        else:
+            return max_points * (max_value - user_answer) / (max_value - correct_answer)
+
+
+class DateRule(ScoringRule):
+    """Ocena odpowiedzi z datą (format YYYY-MM-DD)"""
+
+    def __init__(
+        self,
+        max_points: float,
+        algorithm_type: str,
+        min_date: Any = None,
+        max_date: Any = None,
+        correct_date: Any = None
+    ):
+        super().__init__(max_points)
+        self.algorithm_type = algorithm_type
+        self.min_date = min_date
+        self.max_date = max_date
+        self.correct_date = correct_date
+        self.logger = Logger.instance()
+
+    def score(self, answer: dict) -> float:
+        user_date_str = answer.get('answer')
+        if not user_date_str:
+            return 0.0
+
+        try:
+            user_date = datetime.strptime(user_date_str, '%Y-%m-%d').date()
+            return self._score_date(user_date)
+        except (ValueError, TypeError) as e:
+            self.logger.error(f"Błąd podczas obliczania wyniku dla daty: {str(e)}")
+            return 0.0
+
+    def _score_date(self, user_date) -> float:
+        max_points = self.max_points
+        algorithm_type = self.algorithm_type
+        min_date = self.min_date
+        max_date = self.max_date
+        correct_date = self.correct_date
+
+        if algorithm_type == 'EXACT_MATCH':
+            return float(max_points) if user_date == correct_date else 0.0
+
+        if algorithm_type == 'RANGE':
+            return float(max_points) if min_date <= user_date <= max_date else 0.0
+
+        if algorithm_type == 'LEFT_SIDED':
+            if user_date <= min_date:
+                return 0.0
+            elif user_date >= correct_date:
+                return float(max_points)
+            total_days = (correct_date - min_date).days
+            if total_days <= 0:
+                return 0.0
+            user_days = (user_date - min_date).days
+            return max_points * (user_days / total_days)
+
+        if algorithm_type == 'RIGHT_SIDED':
+            if user_date >= max_date:
+                return 0.0
+            elif user_date <= correct_date:
+                return float(max_points)
+            total_days = (max_date - correct_date).days
+            if total_days <= 0:
+                return 0.0
+            user_days = (max_date - user_date).days
+            return max_points * (user_days / total_days)
+
+        # CENTER
+        if user_date == correct_date:
+            return float(max_points)
+        elif user_date <= min_date or user_date >= max_date:
+            return 0.0
+        elif user_date < correct_date:
+            total_days = (correct_date - min_date).days
+            if total_days <= 0:
+                return 0.0
+            user_days = (user_date - min_date).days
+            return max_points * (user_days / total_days)
+        else:
+            total_days = (max_date - correct_date).days
+            if total_days <= 0:
+                return 0.0
+            user_days = (max_date - user_date).days
+            return max_points * (user_days / total_days)
+
+
+def compile_rule(question: dict) -> ScoringRule:
+    """
+    Kompiluje pytanie do reguły oceny. Parametry algorytmu (liczby, daty) są
+    parsowane jednorazowo; nieprawidłowe parametry dają regułę zwracającą 0 punktów,
+    tak jak wcześniej przy ocenie każdej odpowiedzi.
+
+    Args:
+        question: Pytanie z polami answer_type, algorithm_type, algorithm_params i points
+
+    Returns:
+        ScoringRule: Reguła oceny pytania
+    """
+    max_points = question.get('points', 0)
+    answer_type = question.get('answer_type')
+    algorithm_type = question.get('algorithm_type', 'NO_ALGORITHM')
+    params = question.get('algorithm_params', {})
+
+    if answer_type == 'TEXT' and algorithm_type == 'EVALUATION_BY_AI':
+        return AIEvaluationRule(max_points)
+
+    if not isinstance(params, dict):
+        return ScoringRule(max_points)
+
+    if answer_type in ('TEXT', 'ABCDEF') and algorithm_type == 'EXACT_MATCH':
+        return TextExactMatchRule(max_points, params.get('correct_answer', ''))
+
+    if answer_type == 'BOOLEAN' and algorithm_type == 'EXACT_MATCH':
+        return BooleanExactMatchRule(max_points, params.get('correct_answer'))
+
+    if answer_type in NUMERIC_ANSWER_TYPES:
+        return _compile_numeric_rule(max_points, answer_type, algorithm_type, params)
+
+    if answer_type == 'DATE':
+        return _compile_date_rule(max_points, algorithm_type, params)
+
+    return ScoringRule(max_points)
+
+
+def _compile_numeric_rule(max_points: float, answer_type: str, algorithm_type: str, params: dict) -> ScoringRule:
+    try:
+        if algorithm_type == 'EXACT_MATCH':
+            return NumericRule(
+                max_points,
+                algorithm_type,
+                epsilon=0.001 if answer_type == 'SCALE' else 0.01,
+                correct_answer=parse_number(params.get('correct_answer', 0))
+            )
+
+        if algorithm_type == 'RANGE':
+            return NumericRule(
+                max_points,
+                algorithm_type,
+                min_value=parse_number(params.get('min_value', '')),
+                max_value=parse_number(params.get('max_value', ''))
+            )
+
+        if algorithm_type in SIDED_ALGORITHMS:
+            return NumericRule(
+                max_points,
+                algorithm_type,
+                min_value=parse_number(params.get('min_value', '')) if algorithm_type != 'RIGHT_SIDED' else None,
+                max_value=parse_number(params.get('max_value', '')) if algorithm_type != 'LEFT_SIDED' else None,
+                correct_answer=parse_number(params.get('correct_answer', ''))
+            )
+    except (ValueError, TypeError):
+        pass
+
+    return ScoringRule(max_points)
+
+
+def _compile_date_rule(max_points: float, algorithm_type: str, params: dict) -> ScoringRule:
+    correct_date = params.get('correct_answer')
+    min_date = params.get('min_value')
+    max_date = params.get('max_value')
+
+    try:
+        if algorithm_type == 'EXACT_MATCH':
+            if not correct_date:
+                return ScoringRule(max_points)
+            return DateRule(max_points, algorithm_type, correct_date=parse_date(correct_date))
+
+        if algorithm_type == 'RANGE':
+            if not min_date or not max_date:
+                return ScoringRule(max_points)
+            return DateRule(max_points, algorithm_type, min_date=parse_date(min_date), max_date=parse_date(max_date))
+
+        if algorithm_type in SIDED_ALGORITHMS:
+            if algorithm_type != 'RIGHT_SIDED':
+                if not min_date or not correct_date:
+                    return ScoringRule(max_points)
+                min_date = parse_date(min_date)
+            if algorithm_type != 'LEFT_SIDED':
+                if not max_date or not correct_date:
+                    return ScoringRule(max_points)
+                max_date = parse_date(max_date)
+            return DateRule(
+                max_points,
+                algorithm_type,
+                min_date=min_date,
+                max_date=max_date,
+                correct_date=parse_date(correct_date)
+            )
+    except (ValueError, TypeError):
+        pass
+
+    return ScoringRule(max_points)
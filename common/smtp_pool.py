@@ -0,0 +1,132 @@
+import atexit
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import List, Optional
+from common.logger import Logger
+
+class _PooledConnection:
+    """Zalogowane połączenie SMTP wraz z licznikiem wysłanych wiadomości"""
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Pula trwałych połączeń SMTP współdzielona przez wszystkie instancje EmailService w procesie.
+    Połączenie (STARTTLS i logowanie) jest nawiązywane raz i używane do wielu wiadomości,
+    a po SMTP_MAX_MESSAGES_PER_CONNECTION wiadomościach lub SMTP_IDLE_TIMEOUT_SECONDS
+    bezczynności jest zamykane. Zerwane połączenie jest odnawiane, a wiadomość wysyłana ponownie.
+    """
+
+    _instance: Optional['SMTPConnectionPool'] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls, config) -> 'SMTPConnectionPool':
+        """Zwraca pulę procesu, tworząc ją przy pierwszym wywołaniu"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(config)
+                    atexit.register(cls._instance.close_all)
+        return cls._instance
+
+    def __init__(self, config):
+        self.config = config
+        self.logger = Logger.instance()
+        self._idle: List[_PooledConnection] = []
+        self._lock = threading.Lock()
+        # Limit jednocześnie otwartych połączeń - kolejni nadawcy czekają na wolne połączenie
+        self._slots = threading.BoundedSemaphore(max(1, config.SMTP_POOL_SIZE))
+
+    def send_message(self, msg: Message) -> None:
+        """
+        Wysyła wiadomość przy użyciu połączenia z puli. Gdy połączenie zostało zerwane
+        przez serwer, jest nawiązywane ponownie i wysyłka jest powtarzana jeden raz.
+
+        Raises:
+            smtplib.SMTPException: Gdy serwer odrzucił wiadomość
+            OSError: Gdy nie udało się połączyć z serwerem
+        """
+        with self._slots:
+            connection = self._checkout()
+            try:
+                connection.smtp.send_message(msg)
+            except Exception as e:
+                if not self._is_disconnect(e):
+                    self._release_after_error(connection, e)
+                    raise
+                self.logger.warning(f"Połączenie SMTP zostało zerwane ({str(e)}), ponowne łączenie")
+                self._close(connection)
+                # Gdy ponowne połączenie się nie uda (np. SMTPAuthenticationError), do puli nic nie wraca
+                connection = self._connect()
+                try:
+                    connection.smtp.send_message(msg)
+                except Exception as retry_error:
+                    self._release_after_error(connection, retry_error)
+                    raise
+            connection.messages_sent += 1
+            self._release(connection, reusable=True)
+
+    def _release_after_error(self, connection: _PooledConnection, error: Exception) -> None:
+        # Po odrzuceniu wiadomości smtplib resetuje sesję (RSET), więc połączenie nadaje się do ponownego użycia
+        self._release(connection, reusable=isinstance(error, smtplib.SMTPException) and not self._is_disconnect(error))
+
+    def close_all(self) -> None:
+        """Zamyka wszystkie bezczynne połączenia"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection)
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect()
+            if time.monotonic() - connection.last_used <= self.config.SMTP_IDLE_TIMEOUT_SECONDS:
+                return connection
+            # Serwer mógł już zamknąć bezczynne połączenie
+            self._close(connection)
+
+    def _release(self, connection: _PooledConnection, reusable: bool) -> None:
+        if not reusable or connection.messages_sent >= self.config.SMTP_MAX_MESSAGES_PER_CONNECTION:
+            self._close(connection)
+            return
+        connection.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(connection)
+
+    def _connect(self) -> _PooledConnection:
+        self.logger.debug(f"Nawiązywanie połączenia SMTP z {self.config.SMTP_SERVER}:{self.config.SMTP_PORT}")
+        smtp = smtplib.SMTP(self.config.SMTP_SERVER, self.config.SMTP_PORT)
+        try:
+            smtp.starttls()
+            smtp.login(self.config.SMTP_USERNAME, self.config.SMTP_PASSWORD)
+        except Exception:
+            smtp.close()
+            raise
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _close(connection: _PooledConnection) -> None:
+        try:
+            connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    @staticmethod
+    def _is_disconnect(error: Exception) -> bool:
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        # 421 - serwer zamyka połączenie (np. przekroczony limit czasu sesji)
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code == 421
+        # Błędy gniazda (SMTPException dziedziczy po OSError, ale oznacza odpowiedź serwera)
+        return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
@@ -1,9 +1,19 @@
 import json
-from typing import List, Optional
+from typing import Dict, List, Optional
 from supabase import Client
 from datetime import datetime, timezone
 from common.logger import Logger
-from common.openai_service import OpenAIService
+from common.openai_service import AIEvaluationDeferred, OpenAIService
+from common.question_cache import QuestionCache
+from common.scoring_rules import ScoringRule, compile_rule
+from common.bulk_scoring import score_bulk, supports_bulk
+
+class ScoreWriteException(Exception):
+    """Wyjątek zgłaszany, gdy nie udało się zapisać wyników odpowiedzi kandydata."""
+    def __init__(self, message: str, original_error: Exception = None):
+        self.message = message
+        self.original_error = original_error
+        super().__init__(self.message)
 
 class TestScoreService:
     """Serwis do obliczania wyników testów kandydatów"""
@@ -11,6 +21,7 @@ class TestScoreService:
     def __init__(self, supabase: Client, openai_service: OpenAIService):
         self.supabase = supabase
         self.openai_service = openai_service
+        self.question_cache = QuestionCache.instance()
         self.logger = Logger.instance()
 
     def calculate_test_score(self, candidate_id: int, test_id: int, stage: str) -> Optional[dict]:
@@ -26,56 +37,50 @@ class TestScoreService:
             Optional[dict]: Wynik testu lub None w przypadku błędu. 
             Dla testów EQ zwraca słownik z wynikami poszczególnych kategorii.
             Dla zwykłych testów zwraca słownik z wynikiem i ewentualnym statusem odrzucenia.
+            
+        Raises:
+            ScoreWriteException: Gdy nie udało się zapisać wyników poszczególnych odpowiedzi
         """
         try:
             self.logger.info(f"[TEST {test_id}] Rozpoczęcie obliczania wyniku dla kandydata {candidate_id} w etapie {stage}")
             
-            # First get test type
-            test_response = self.supabase.table('tests')\
-                .select('test_type')\
-                .eq('id', test_id)\
-                .single()\
-                .execute()
-                
-            if not test_response.data:
-                self.logger.warning(f"[TEST {test_id}] Nie znaleziono testu")
-                return None
-                
-            test_type = test_response.data['test_type']
-            self.logger.info(f"[TEST {test_id}] Typ testu: {test_type}")
-
+            # Odpowiedzi kandydata razem z wersją testu w jednym zapytaniu
             answers_response = self.supabase.table('candidate_answers')\
                 .select('''
                     id,
                     question_id,
                     answer,
-                    points_per_option
+                    points_per_option,
+                    question:questions!inner(test:tests!inner(updated_at))
                 ''')\
                 .eq('candidate_id', candidate_id)\
                 .eq('stage', stage)\
+                .eq('question.test_id', test_id)\
                 .execute()
             
             if not answers_response.data:
                 self.logger.warning(f"[TEST {test_id}] Brak odpowiedzi dla kandydata {candidate_id} w etapie {stage}")
                 return None
-                
-            self.logger.info(f"[TEST {test_id}] Pobrano {len(answers_response.data)} odpowiedzi dla kandydata {candidate_id}")
-                
-            question_ids = [answer['question_id'] for answer in answers_response.data]
-            self.logger.debug(f"[TEST {test_id}] Identyfikatory pytań do pobrania: {question_ids}")
             
-            questions_response = self.supabase.table('questions')\
-                .select('*, tests!inner(*)')\
-                .eq('test_id', test_id)\
-                .in_('id', question_ids)\
-                .execute()
-                            
-            if not questions_response.data:
-                self.logger.warning(f"[TEST {test_id}] Nie znaleziono pytań dla podanych identyfikatorów")
+            answers = []
+            for row in answers_response.data:
+                version = row.pop('question')['test']['updated_at']
+                answers.append(row)
+            
+            definition = self.get_test_definition(test_id, version)
+            if not definition:
+                self.logger.warning(f"[TEST {test_id}] Nie znaleziono testu")
                 return None
-                
-            questions = {q['id']: q for q in questions_response.data}
-            self.logger.info(f"[TEST {test_id}] Pobrano {len(questions)} pytań")
+            
+            test_type = definition['test_type']
+            questions = {
+                answer['question_id']: definition['questions'][answer['question_id']]
+                for answer in answers
+                if answer['question_id'] in definition['questions']
+            }
+            
+            self.logger.info(f"[TEST {test_id}] Typ testu: {test_type}")
+            self.logger.info(f"[TEST {test_id}] Pobrano {len(answers)} odpowiedzi i {len(questions)} pytań dla kandydata {candidate_id}")
 
             # Handle different test types
             if test_type == 'EQ':
@@ -83,7 +88,7 @@ class TestScoreService:
                 eq_questions = [q for q in questions.values() if q['answer_type'] == 'AH_POINTS']
                 if eq_questions:
                     self.logger.info(f"[TEST {test_id}] Wykryto test EQ z {len(eq_questions)} pytaniami typu AH_POINTS")
-                    eq_scores = self.calculate_eq_scores(answers_response.data, eq_questions)
+                    eq_scores = self.calculate_eq_scores(answers, eq_questions)
                     self.logger.info(f"[TEST {test_id}] Obliczono wyniki EQ dla kandydata {candidate_id}: {eq_scores}")
                     return eq_scores
                 else:
@@ -98,10 +103,11 @@ class TestScoreService:
                 
                 # Check critical questions first
                 if critical_questions:
+                    self.prefetch_ai_evaluations(answers, critical_questions, definition['rules'])
                     for question in critical_questions:
-                        answer = next((a for a in answers_response.data if a['question_id'] == question['id']), None)
+                        answer = next((a for a in answers if a['question_id'] == question['id']), None)
                         if answer:
-                            score = self.calculate_score(answer, question)
+                            score = self.calculate_score(answer, question, definition['rules'].get(question['id']))
                             max_points = float(question.get('points', 0))
                             
                             # If critical question score is not maximum, reject immediately
@@ -110,6 +116,7 @@ class TestScoreService:
                                     f"[TEST {test_id}] Kandydat {candidate_id} nie uzyskał maksymalnej liczby punktów "
                                     f"({score}/{max_points}) w pytaniu krytycznym {question['id']}"
                                 )
+                                self.save_answer_scores(answers)
                                 return {
                                     'score': 0,
                                     'status': 'REJECTED_CRITICAL',
@@ -118,18 +125,57 @@ class TestScoreService:
                 
                 # If all critical questions passed or there were none, calculate total score
                 self.logger.info(f"[TEST {test_id}] Wykryto standardowy test typu {test_type}")
-                total_score = self.calculate_total_score(answers_response, non_critical_questions)
+                self.prefetch_ai_evaluations(answers, non_critical_questions, definition['rules'])
+                total_score = self.calculate_total_score(answers, non_critical_questions, definition['rules'])
+                self.save_answer_scores(answers)
                 self.logger.info(f"[TEST {test_id}] Obliczono wynik standardowy dla kandydata {candidate_id}: {total_score}")
                 return {
                     'score': total_score or 0,
                     'status': 'OK'
                 }
                 
+        except (ScoreWriteException, AIEvaluationDeferred):
+            # Ocena odłożona nie może zostać zapisana jako 0 punktów - kandydat zostanie oceniony ponownie
+            raise
         except Exception as e:
             self.logger.error(f"[TEST {test_id}] Krytyczny błąd podczas obliczania wyniku dla kandydata {candidate_id}: {str(e)}")
             return None
 
 
+    def get_test_definition(self, test_id: int, version: Optional[str] = None) -> Optional[dict]:
+        """
+        Zwraca typ testu i jego pytania, korzystając ze współdzielonego cache.
+        
+        Args:
+            test_id: ID testu
+            version: Oczekiwana wersja testu (tests.updated_at); inna wersja w cache powoduje ponowne pobranie
+            
+        Returns:
+            Optional[dict]: Słownik z kluczami test_type, questions (ID pytania -> pytanie)
+            i rules (ID pytania -> skompilowana reguła oceny) lub None gdy test nie istnieje
+        """
+        definition = self.question_cache.get(test_id, version)
+        if definition is not None:
+            return definition
+        
+        test_response = self.supabase.table('tests')\
+            .select('test_type, updated_at, questions(*)')\
+            .eq('id', test_id)\
+            .execute()
+        
+        if not test_response.data:
+            return None
+        
+        test = test_response.data[0]
+        self.logger.debug(f"[TEST {test_id}] Pobrano definicję testu w wersji {test['updated_at']}")
+        questions = test.get('questions') or []
+        return self.question_cache.put(test_id, test['updated_at'], {
+            'test_type': test['test_type'],
+            'questions': {q['id']: q for q in questions},
+            'rules': {q['id']: compile_rule(q) for q in questions}
+        })
+
+
     def calculate_eq_scores(self, answers, questions) -> dict:
         """
         Oblicza wyniki testu EQ dla wszystkich kategorii.
@@ -188,13 +234,14 @@ class TestScoreService:
         return eq_scores
 
 
-    def calculate_score(self, answer: dict, question: dict) -> float:
+    def calculate_score(self, answer: dict, question: dict, rule: Optional[ScoringRule] = None) -> float:
         """
         Oblicza wynik dla pojedynczej odpowiedzi.
         
         Args:
             answer: Odpowiedź kandydata
             question: Pytanie z parametrami oceny
+            rule: Skompilowana reguła oceny pytania (jeśli brak, jest kompilowana z pytania)
             
         Returns:
             float: Wynik za odpowiedź (zawsze zaokrąglony do 1 miejsca po przecinku)
@@ -206,22 +253,16 @@ class TestScoreService:
             if max_points == 0:
                 return 0.0
                 
-            algorithm_type = question.get('algorithm_type', 'NO_ALGORITHM')
-            algorithm_params = question.get('algorithm_params', {})
-            
             # Handle empty/None answers
             if not answer:
                 self.logger.warning("Otrzymano pustą odpowiedź, zwracam 0 punktów")
                 return 0.0
 
-            # Obliczamy wynik w zależności od typu odpowiedzi
-            raw_score = self._calculate_raw_score(
-                answer, 
-                question, 
-                max_points, 
-                algorithm_type, 
-                algorithm_params
-            )
+            if rule is None:
+                rule = compile_rule(question)
+
+            # Obliczamy wynik regułą skompilowaną dla typu odpowiedzi i algorytmu
+            raw_score = self._calculate_raw_score(answer, question, rule)
             
             # Zawsze zaokrąglamy do 1 miejsca po przecinku
             final_score = round(float(raw_score), 1)
@@ -232,242 +273,152 @@ class TestScoreService:
             
             return final_score
             
+        except AIEvaluationDeferred:
+            raise
         except Exception as e:
             self.logger.error(f"Błąd podczas obliczania wyniku: {str(e)}")
             return 0.0
         
             
-    def _calculate_raw_score(
-        self, 
-        answer: dict, 
-        question: dict, 
-        max_points: float,
-        algorithm_type: str,
-        algorithm_params: dict
-    ) -> float:
+    def prefetch_ai_evaluations(self, answers: List[dict], questions: List[dict], rules: Dict[int, ScoringRule]) -> None:
+        """
+        Ocenia równolegle wszystkie odpowiedzi na podane pytania typu EVALUATION_BY_AI.
+        Wynik trafia do answer['ai_evaluation'] i jest używany przez _calculate_raw_score
+        zamiast osobnego zapytania do OpenAI.
+        
+        Args:
+            answers: Odpowiedzi kandydata
+            questions: Pytania, których odpowiedzi mają zostać ocenione
+            rules: Skompilowane reguły oceny (ID pytania -> reguła)
+        """
+        questions_by_id = {q['id']: q for q in questions}
+        pending = []
+        for answer in answers:
+            question = questions_by_id.get(answer['question_id'])
+            rule = rules.get(answer['question_id'])
+            if not question or not rule or not rule.requires_ai or not rule.max_points or 'ai_evaluation' in answer:
+                continue
+            pending.append((answer, question, rule))
+        
+        # Pojedyncza odpowiedź zostanie oceniona w zwykły sposób
+        if len(pending) < 2:
+            return
+        
+        results = self.openai_service.evaluate_answers_batch([
+            {
+                'question_text': question['question_text'],
+                'answer_text': answer.get('answer', ''),
+                'max_points': float(rule.max_points),
+                'algorithm_params': question.get('algorithm_params', {})
+            }
+            for answer, question, rule in pending
+        ])
+        
+        for (answer, _, _), result in zip(pending, results):
+            answer['ai_evaluation'] = result
+
+
+    def calculate_scores_bulk(self, question: dict, answers: List[dict]) -> List[float]:
+        """
+        Oblicza wyniki wielu odpowiedzi na to samo pytanie, np. wszystkich odpowiedzi
+        w kampanii po zmianie progów pytania. Pytania liczbowe (SCALE, SALARY, NUMERIC)
+        i datowe są liczone wektorowo, pozostałe odpowiedź po odpowiedzi.
+        Wyniki są identyczne z calculate_score dla każdej odpowiedzi.
+        
+        Args:
+            question: Pytanie z parametrami oceny
+            answers: Odpowiedzi kandydatów na to pytanie
+            
+        Returns:
+            List[float]: Wyniki zaokrąglone do 1 miejsca po przecinku, w kolejności odpowiedzi
+        """
+        max_points = question.get('points', 0)
+        if max_points == 0 or not answers:
+            return [0.0] * len(answers)
+        
+        rule = compile_rule(question)
+        if not supports_bulk(rule):
+            return [self.calculate_score(answer, question, rule) for answer in answers]
+        
+        self.logger.info(f"Wektorowe obliczanie wyników {len(answers)} odpowiedzi dla pytania {question['id']}")
+        raw_scores = score_bulk(rule, answers)
+        
+        # Zaokrąglenie jak w calculate_score (round z Pythona, nie np.round)
+        return [round(float(raw_score), 1) for raw_score in raw_scores]
+
+
+    def _calculate_raw_score(self, answer: dict, question: dict, rule: ScoringRule) -> float:
         """
         Oblicza surowy wynik dla odpowiedzi przed zaokrągleniem.
         
+        Args:
+            answer: Odpowiedź kandydata
+            question: Pytanie z parametrami oceny
+            rule: Skompilowana reguła oceny pytania
+            
         Returns:
             float: Surowy wynik przed zaokrągleniem
         """
-        answer_type = question['answer_type']
+        self.logger.debug(f"Obliczanie wyniku dla pytania {question['id']} regułą {type(rule).__name__}")
         
-        self.logger.debug(f"Obliczanie wyniku dla pytania {question['id']} typu {answer_type} z algorytmem {algorithm_type}")
-                
-        if answer_type == 'TEXT':
-            if algorithm_type == 'NO_ALGORITHM':
-                return 0.0
-            elif algorithm_type == 'EXACT_MATCH':
-                user_answer = str(answer.get('answer', '')).strip().lower()
-                correct_answer = str(algorithm_params.get('correct_answer', '')).strip().lower()
-                return float(max_points) if user_answer == correct_answer else 0.0
-            elif algorithm_type == 'EVALUATION_BY_AI':
-                try:
-                    result = self.openai_service.evaluate_answer(
-                        question_text=question['question_text'],
-                        answer_text=answer.get('answer', ''),
-                        max_points=float(max_points),
-                        algorithm_params=algorithm_params
-                    )
-                    if result and isinstance(result, dict):
-                        score = result.get('score')
-                        explanation = result.get('explanation')
-                        if score is not None:
-                            score = max(0.0, min(float(score), max_points))
-                            self.update_answer_ai_explanation(answer['id'], explanation)
-                            return score
-                    return 0.0
-                except Exception as e:
-                    self.logger.error(f"Błąd podczas oceny AI: {str(e)}")
-                    return 0.0
-                    
-        elif answer_type == 'BOOLEAN':
-            if algorithm_type == 'EXACT_MATCH':
-                try:
-                    user_answer = str(answer.get('answer', '')).lower()
-                    correct_answer = algorithm_params.get('correct_answer')
-                    self.logger.debug(f"Odpowiedź użytkownika: {user_answer}, odpowiedź poprawna: {correct_answer}")
-                    self.logger.debug(f"Wynik: {float(max_points) if user_answer == correct_answer else 0.0}")
-                    return float(max_points) if user_answer == correct_answer else 0.0
-                except:
-                    return 0.0
-                    
-        elif answer_type in ['SCALE', 'SALARY', 'NUMERIC']:
-            try:
-                user_answer = float(str(answer.get('answer', '')).replace(',', '.'))
-            except (ValueError, TypeError):
-                return 0.0
-                
-            if algorithm_type == 'EXACT_MATCH':
-                try:
-                    correct_answer = float(str(algorithm_params.get('correct_answer', 0)).replace(',', '.'))
-                    epsilon = 0.001 if answer_type == 'SCALE' else 0.01
-                    return float(max_points) if abs(user_answer - correct_answer) < epsilon else 0.0
-                except (ValueError, TypeError):
-                    return 0.0
-                    
-            elif algorithm_type == 'RANGE':
-                try:
-                    min_value = float(str(algorithm_params.get('min_value', '')).replace(',', '.'))
-                    max_value = float(str(algorithm_params.get('max_value', '')).replace(',', '.'))
-                    return float(max_points) if min_value <= user_answer <= max_value else 0.0
-                except (ValueError, TypeError):
-                    return 0.0
-                    
-            elif algorithm_type in ['LEFT_SIDED', 'RIGHT_SIDED', 'CENTER']:
-                try:
-                    if algorithm_type != 'RIGHT_SIDED':
-                        min_value = float(str(algorithm_params.get('min_value', '')).replace(',', '.'))
-                    if algorithm_type != 'LEFT_SIDED':
-                        max_value = float(str(algorithm_params.get('max_value', '')).replace(',', '.'))
-                    correct_answer = float(str(algorithm_params.get('correct_answer', '')).replace(',', '.'))
-                    
-                    if algorithm_type == 'LEFT_SIDED':
-                        if user_answer < min_value:
-                            return 0.0
-                        elif user_answer >= correct_answer:
-                            return float(max_points)
-                        return max_points * (user_answer - min_value) / (correct_answer - min_value)
-                        
-                    elif algorithm_type == 'RIGHT_SIDED':
-                        if user_answer > max_value:
-                            return 0.0
-                        elif user_answer <= correct_answer:
-                            return float(max_points)
-                        return max_points * (max_value - user_answer) / (max_value - correct_answer)
-                        
-                    else:  # CENTER
-                        if user_answer == correct_answer:
-                            return float(max_points)
-                        elif user_answer < min_value or user_answer > max_value:
-                            return 0.0
-                        elif user_answer < correct_answer:
-                            return max_points * (user_answer - min_value) / (correct_answer - min_value)
-                        else:
-                            return max_points * (max_value - user_answer) / (max_value - correct_answer)
-                            
-                except (ValueError, TypeError, ZeroDivisionError):
-                    return 0.0
-                    
-        elif answer_type == 'DATE':
-            user_date_str = answer.get('answer')
-            if not user_date_str:
-                return 0.0
-                
-            try:
-                user_date = datetime.strptime(user_date_str, '%Y-%m-%d').date()
-                
-                correct_date = algorithm_params.get('correct_answer')
-                min_date = algorithm_params.get('min_value')
-                max_date = algorithm_params.get('max_value')
-                
-                if algorithm_type == 'EXACT_MATCH':
-                    if not correct_date:
-                        return 0.0
-                    if isinstance(correct_date, str):
-                        correct_date = datetime.strptime(correct_date, '%Y-%m-%d').date()
-                    return float(max_points) if user_date == correct_date else 0.0
-                    
-                elif algorithm_type == 'RANGE':
-                    if not min_date or not max_date:
-                        return 0.0
-                    if isinstance(min_date, str):
-                        min_date = datetime.strptime(min_date, '%Y-%m-%d').date()
-                    if isinstance(max_date, str):
-                        max_date = datetime.strptime(max_date, '%Y-%m-%d').date()
-                    return float(max_points) if min_date <= user_date <= max_date else 0.0
-                    
-                elif algorithm_type in ['LEFT_SIDED', 'RIGHT_SIDED', 'CENTER']:
-                    if algorithm_type != 'RIGHT_SIDED':
-                        if not min_date or not correct_date:
-                            return 0.0
-                        if isinstance(min_date, str):
-                            min_date = datetime.strptime(min_date, '%Y-%m-%d').date()
-                    if algorithm_type != 'LEFT_SIDED':
-                        if not max_date or not correct_date:
-                            return 0.0
-                        if isinstance(max_date, str):
-                            max_date = datetime.strptime(max_date, '%Y-%m-%d').date()
-                    if isinstance(correct_date, str):
-                        correct_date = datetime.strptime(correct_date, '%Y-%m-%d').date()
-                        
-                    if algorithm_type == 'LEFT_SIDED':
-                        if user_date <= min_date:
-                            return 0.0
-                        elif user_date >= correct_date:
-                            return float(max_points)
-                        total_days = (correct_date - min_date).days
-                        if total_days <= 0:
-                            return 0.0
-                        user_days = (user_date - min_date).days
-                        return max_points * (user_days / total_days)
-                        
-                    elif algorithm_type == 'RIGHT_SIDED':
-                        if user_date >= max_date:
-                            return 0.0
-                        elif user_date <= correct_date:
-                            return float(max_points)
-                        total_days = (max_date - correct_date).days
-                        if total_days <= 0:
-                            return 0.0
-                        user_days = (max_date - user_date).days
-                        return max_points * (user_days / total_days)
-                        
-                    else:  # CENTER
-                        if user_date == correct_date:
-                            return float(max_points)
-                        elif user_date <= min_date or user_date >= max_date:
-                            return 0.0
-                        elif user_date < correct_date:
-                            total_days = (correct_date - min_date).days
-                            if total_days <= 0:
-                                return 0.0
-                            user_days = (user_date - min_date).days
-                            return max_points * (user_days / total_days)
-                        else:
-                            total_days = (max_date - correct_date).days
-                            if total_days <= 0:
-                                return 0.0
-                            user_days = (max_date - user_date).days
-                            return max_points * (user_days / total_days)
-                            
-            except (ValueError, TypeError) as e:
-                self.logger.error(f"Błąd podczas obliczania wyniku dla daty: {str(e)}")
-                return 0.0
-                
-        elif answer_type == 'ABCDEF':
-            if algorithm_type == 'EXACT_MATCH':
-                user_answer = str(answer.get('answer', '')).strip().lower()
-                correct_answer = str(algorithm_params.get('correct_answer', '')).strip().lower()
-                return float(max_points) if user_answer == correct_answer else 0.0
-                
-        return 0.0
+        if not rule.requires_ai:
+            return rule.score(answer)
+        
+        max_points = rule.max_points
+        try:
+            if 'ai_evaluation' in answer:
+                result = answer['ai_evaluation']
+            else:
+                result = self.openai_service.evaluate_answer(
+                    question_text=question['question_text'],
+                    answer_text=answer.get('answer', ''),
+                    max_points=float(max_points),
+                    algorithm_params=question.get('algorithm_params', {})
+                )
+            if result and isinstance(result, dict):
+                score = result.get('score')
+                explanation = result.get('explanation')
+                if score is not None:
+                    score = max(0.0, min(float(score), max_points))
+                    answer['ai_explanation'] = explanation
+                    return score
+            return 0.0
+        except AIEvaluationDeferred:
+            raise
+        except Exception as e:
+            self.logger.error(f"Błąd podczas oceny AI: {str(e)}")
+            return 0.0
 
 
-    def calculate_total_score(self, answers_response: dict, questions: List[dict]) -> float:
+    def calculate_total_score(
+        self, 
+        answers: List[dict], 
+        questions: List[dict], 
+        rules: Optional[Dict[int, ScoringRule]] = None
+    ) -> float:
         """
         Oblicza łączny wynik dla wszystkich odpowiedzi.
         
         Args:
-            answers_response: Odpowiedzi kandydata
+            answers: Odpowiedzi kandydata
             questions: Słownik z pytaniami i ich parametrami
+            rules: Skompilowane reguły oceny (ID pytania -> reguła)
             
         Returns:
             float: Całkowity wynik zaokrąglony do 1 miejsca po przecinku
         """
         try:
-            if not answers_response.data:
+            if not answers:
                 self.logger.warning("Brak odpowiedzi do oceny")
                 return 0.0
                 
-            self.logger.info(f"Rozpoczęcie obliczania łącznego wyniku dla {len(answers_response.data)} odpowiedzi")
+            self.logger.info(f"Rozpoczęcie obliczania łącznego wyniku dla {len(answers)} odpowiedzi")
             
             # Przechowujemy wyniki cząstkowe dla lepszego logowania
             partial_scores = []
             total_points_possible = 0.0
             
-            for answer in answers_response.data:
+            for answer in answers:
                 question = next((q for q in questions if q['id'] == answer['question_id']), None)
                 if not question:
                     self.logger.warning(f"Nie znaleziono pytania dla odpowiedzi {answer['id']}")
@@ -477,7 +428,7 @@ class TestScoreService:
                     max_points = float(question.get('points', 0))
                     if max_points > 0:
                         total_points_possible += max_points
-                        score = self.calculate_score(answer, question)
+                        score = self.calculate_score(answer, question, (rules or {}).get(question['id']))
                         if score is not None and score >= 0:
                             # Zaokrąglamy każdy wynik cząstkowy do 1 miejsca po przecinku
                             rounded_score = round(score, 1)
@@ -486,8 +437,8 @@ class TestScoreService:
                                 'max_points': max_points,
                                 'score': rounded_score
                             })
-                            # Aktualizujemy wynik w bazie danych
-                            self.update_answer_score(answer['id'], rounded_score)
+                            # Wynik zostanie zapisany w bazie danych razem z pozostałymi odpowiedziami
+                            answer['score'] = rounded_score
                             self.logger.debug( f"Pytanie {question['id']}: {rounded_score}/{max_points} punktów -- ({(rounded_score/max_points * 100):.1f}%)" )
                         else:
                             self.logger.warning(f"Otrzymano nieprawidłowy wynik {score} dla odpowiedzi {answer['id']}")
@@ -521,43 +472,47 @@ class TestScoreService:
                 self.logger.warning("Brak pytań z punktami do oceny")
                 return 0.0
             
+        except AIEvaluationDeferred:
+            raise
         except Exception as e:
             self.logger.error(f"Błąd podczas obliczania łącznego wyniku: {str(e)}")
             return 0.0
     
 
-    def update_answer_ai_explanation(self, answer_id: int, explanation: str) -> None:
+    def save_answer_scores(self, answers: List[dict]) -> None:
         """
-        Aktualizuje wynik dla konkretnej odpowiedzi.
+        Zapisuje wyniki i wyjaśnienia AI ocenionych odpowiedzi jednym wywołaniem RPC.
+        Zapis obejmuje wszystkie odpowiedzi albo żadną.
         
         Args:
-            answer_id: ID odpowiedzi
-            score: Wynik (może być float, zostanie zaokrąglony do int)
-        """
-        try:
-            self.supabase.table('candidate_answers').update({
-                'ai_explanation': explanation
-            }).eq('id', answer_id).execute()
-        except Exception as e:
-            self.logger.error(f"Błąd podczas aktualizowania wyniku dla odpowiedzi {answer_id}: {str(e)}")
-
-
-    def update_answer_score(self, answer_id: int, score: float) -> None:
+            answers: Odpowiedzi kandydata z polami score i/lub ai_explanation ustawionymi podczas oceny
+            
+        Raises:
+            ScoreWriteException: Gdy zapis się nie powiódł
         """
-        Aktualizuje wynik dla konkretnej odpowiedzi.
+        scores = []
+        for answer in answers:
+            entry = {'id': answer['id']}
+            if 'score' in answer:
+                entry['score'] = round(answer['score'])  # Round float to integer
+            if 'ai_explanation' in answer:
+                entry['ai_explanation'] = answer['ai_explanation']
+            if len(entry) > 1:
+                scores.append(entry)
+        
+        if not scores:
+            return
         
-        Args:
-            answer_id: ID odpowiedzi
-            score: Wynik (może być float, zostanie zaokrąglony do int)
-        """
         try:
-            self.logger.debug(f"Aktualizacja wyniku dla odpowiedzi {answer_id}: {score} punktów")
-            self.supabase.table('candidate_answers').update({
-                'score': round(score)  # Round float to integer
-            }).eq('id', answer_id).execute()
-            self.logger.info(f"Pomyślnie zaktualizowano wynik dla odpowiedzi {answer_id}")
+            self.logger.debug(f"Zapis wyników dla {len(scores)} odpowiedzi")
+            self.supabase.rpc('update_candidate_answer_scores', {'p_scores': scores}).execute()
+            self.logger.info(f"Pomyślnie zaktualizowano wyniki dla {len(scores)} odpowiedzi")
         except Exception as e:
-            self.logger.error(f"Błąd podczas aktualizowania wyniku dla odpowiedzi {answer_id}: {str(e)}")
+            self.logger.error(f"Błąd podczas zapisywania wyników odpowiedzi: {str(e)}")
+            raise ScoreWriteException(
+                message="Nie udało się zapisać wyników odpowiedzi",
+                original_error=e
+            )
         
 
     def create_eq_evaluation_test(self, candidate_id: int, po2_5_test_id: int, eq_scores: dict) -> None:
@@ -0,0 +1,122 @@
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+
+# Add the cron directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.config import Config
+from common.logger import Logger
+from common.batch_runner import BatchRunner
+from common.llm_backend import FakeLLMBackend
+from common.openai_service import AIEvaluationDeferred, OpenAIService
+
+
+class CountingBackend(FakeLLMBackend):
+    """Dostawca fake zliczający wysłane zapytania"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+
+    def complete(self, prompt, response_format=None):
+        with self._counter_lock:
+            self.requests += 1
+        return super().complete(prompt, response_format)
+
+
+def parse_list(value: str):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def run_scenario(config, candidates: int, answers_per_candidate: int) -> dict:
+    """
+    Ocenia syntetyczne odpowiedzi kandydatów tak jak cron: kandydaci są przetwarzani
+    przez BatchRunner (CRON_WORKERS), a odpowiedzi każdego kandydata przez
+    evaluate_answers_batch (OPENAI_MAX_CONCURRENCY, AI_PACK_SIZE). Cache ocen jest wyłączony.
+    """
+    backend = CountingBackend(config)
+    openai_service = OpenAIService(config, evaluation_cache=None, backend=backend)
+
+    def evaluate_candidate(candidate_id: int) -> bool:
+        evaluations = [
+            {
+                'question_text': f"Pytanie {question} kandydata {candidate_id}",
+                'answer_text': f"Odpowiedź {question} kandydata {candidate_id}. " * 20,
+                'max_points': 5.0,
+                'algorithm_params': {}
+            }
+            for question in range(answers_per_candidate)
+        ]
+        try:
+            results = openai_service.evaluate_answers_batch(evaluations)
+        except AIEvaluationDeferred:
+            return False
+        return all(result is not None for result in results)
+
+    with BatchRunner(config.CRON_WORKERS, log_prefix='KANDYDAT') as runner:
+        for candidate_id in range(1, candidates + 1):
+            runner.submit(candidate_id, evaluate_candidate, candidate_id)
+
+    stats = runner.stats
+    answers = candidates * answers_per_candidate
+    return {
+        'elapsed_seconds': stats['elapsed_seconds'],
+        'answers_per_second': round(answers / stats['elapsed_seconds'], 2) if stats['elapsed_seconds'] else 0,
+        'requests': backend.requests,
+        'failed_candidates': stats['failed']
+    }
+
+
+def main():
+    """Test wydajności oceny AI na lokalnym dostawcy fake (bez sieci i klucza API)"""
+    parser = argparse.ArgumentParser(description="Benchmark przepustowości oceny odpowiedzi AI w cronie")
+    parser.add_argument('--candidates', type=int, default=20, help="Liczba kandydatów")
+    parser.add_argument('--answers', type=int, default=6, help="Liczba odpowiedzi AI na kandydata")
+    parser.add_argument('--workers', default='1,4', help="Wartości CRON_WORKERS, np. 1,4,8")
+    parser.add_argument('--concurrency', default='1,4', help="Wartości OPENAI_MAX_CONCURRENCY, np. 1,4")
+    parser.add_argument('--pack-sizes', default='1,3', help="Wartości AI_PACK_SIZE, np. 1,3,6")
+    parser.add_argument('--latency', type=float, default=None, help="Opóźnienie odpowiedzi w sekundach (domyślnie FAKE_LLM_LATENCY_SECONDS)")
+    parser.add_argument('--error-rate', type=float, default=None, help="Odsetek błędów 429 (domyślnie FAKE_LLM_ERROR_RATE)")
+    parser.add_argument('--rpm', type=int, default=0, help="Limit zapytań na minutę (0 = bez limitu)")
+    parser.add_argument('--tpm', type=int, default=0, help="Limit tokenów na minutę (0 = bez limitu)")
+    args = parser.parse_args()
+
+    config = Config.instance()
+    Logger.instance(config, logFile='benchmark.log')
+
+    if args.latency is not None:
+        config.FAKE_LLM_LATENCY_SECONDS = args.latency
+    if args.error_rate is not None:
+        config.FAKE_LLM_ERROR_RATE = args.error_rate
+    # Ogranicznik jest wspólny dla procesu, więc limity obowiązują we wszystkich scenariuszach
+    config.OPENAI_REQUESTS_PER_MINUTE = args.rpm
+    config.OPENAI_TOKENS_PER_MINUTE = args.tpm
+
+    print(
+        f"Kandydaci: {args.candidates}, odpowiedzi na kandydata: {args.answers}, "
+        f"opóźnienie: {config.FAKE_LLM_LATENCY_SECONDS}s, błędy: {config.FAKE_LLM_ERROR_RATE:.0%}"
+    )
+    print(f"{'CRON_WORKERS':>12} {'CONCURRENCY':>11} {'PACK_SIZE':>9} {'czas [s]':>9} {'odp./s':>8} {'zapytania':>9} {'błędy':>6}")
+
+    for workers, concurrency, pack_size in itertools.product(
+        parse_list(args.workers), parse_list(args.concurrency), parse_list(args.pack_sizes)
+    ):
+        config.CRON_WORKERS = workers
+        config.OPENAI_MAX_CONCURRENCY = concurrency
+        config.AI_PACK_SIZE = pack_size
+        started_at = time.monotonic()
+        result = run_scenario(config, args.candidates, args.answers)
+        print(
+            f"{workers:>12} {concurrency:>11} {pack_size:>9} {time.monotonic() - started_at:>9.2f} "
+            f"{result['answers_per_second']:>8} {result['requests']:>9} {result['failed_candidates']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+from supabase import create_client
+
+# Add the cron directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.config import Config
+from common.email_service import EmailService
+from common.email_outbox import EmailOutbox
+from common.logger import Logger
+
+def main():
+    """Wysyła wiadomości z kolejki email_outbox paczkami, aż kolejka będzie pusta"""
+    try:
+        # Initialize configuration
+        config = Config.instance()
+
+        # Initialize logger singleton
+        logger = Logger.instance(config, logFile='email_sender.log')
+        logger.info("====== Starting email sender session ======")
+
+        # Initialize Supabase client
+        logger.debug("Initializing Supabase database connection")
+        supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+
+        email_service = EmailService(config)
+        outbox = EmailOutbox(supabase)
+
+        sent, failed = 0, 0
+        while True:
+            emails = outbox.claim_batch(config.EMAIL_SENDER_BATCH_SIZE, config.EMAIL_LOCK_SECONDS)
+            if not emails:
+                break
+
+            # Po wygaśnięciu blokady wiadomości z paczki może przejąć inny proces
+            lock_deadline = time.monotonic() + config.EMAIL_LOCK_SECONDS
+            logger.info(f"Wysyłanie paczki {len(emails)} wiadomości")
+            for email in emails:
+                if time.monotonic() >= lock_deadline:
+                    logger.warning("Blokada paczki wygasła, pozostałe wiadomości zostaną pobrane ponownie")
+                    break
+
+                with logger.context(f"[EMAIL {email['id']}]"):
+                    try:
+                        email_service.deliver_prepared(email)
+                    except Exception as e:
+                        failed += 1
+                        logger.error(f"Błąd podczas wysyłania wiadomości do {email['to_email']}: {str(e)}")
+                        outbox.mark_failed(
+                            email,
+                            error=f"{e.__class__.__name__}: {str(e)}",
+                            max_attempts=config.EMAIL_MAX_ATTEMPTS,
+                            retry_base_seconds=config.EMAIL_RETRY_BASE_SECONDS
+                        )
+                        continue
+
+                    # Zapis zaraz po wysłaniu, aby awaria procesu nie powodowała ponownej wysyłki
+                    outbox.mark_sent([email['id']])
+                    sent += 1
+
+        logger.info(f"====== Email sender session completed: sent {sent}, failed {failed} ======")
+
+    except Exception as e:
+        logger = Logger.instance()  # Get logger instance without config
+        logger.critical(f"Critical error occurred during email sending: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
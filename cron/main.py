@@ -10,8 +10,12 @@ from common.config import Config
 from common.email_service import EmailService
 from common.test_score_service import TestScoreService
 from common.openai_service import OpenAIService
+from common.ai_evaluation_cache import AIEvaluationCache
 from common.logger import Logger
+from common.recalculation_score_service import RecalculationScoreService
 from cron.services.candidate_score_service import CandidateScoreService
+from cron.services.recalculation_job_service import RecalculationJobService
+from cron.services.ai_batch_service import AIBatchService
 
 def main():
     """Główna funkcja skryptu sprawdzająca i aktualizująca statusy kandydatów"""
@@ -36,7 +40,7 @@ def main():
         email_service = EmailService(config)
         
         logger.debug("Initializing OpenAI service")
-        openai_service = OpenAIService(config)
+        openai_service = OpenAIService(config, AIEvaluationCache(supabase))
         
         logger.debug("Initializing test service")
         test_service = TestScoreService(supabase, openai_service)
@@ -49,10 +53,22 @@ def main():
             test_service,
         )
         
+        logger.debug("Initializing recalculation job service")
+        recalculation_job_service = RecalculationJobService(
+            supabase,
+            config,
+            RecalculationScoreService(supabase, config, test_service, email_service),
+            AIBatchService(supabase, config, openai_service),
+        )
+        
         # Update candidates
         logger.info("Starting candidate status updates")
         candidate_service.update_candidates()
         
+        # Run bulk recalculation jobs requested from the application
+        logger.info("Starting pending recalculation jobs")
+        recalculation_job_service.run_pending_jobs()
+        
         logger.info("====== Candidate check session completed ======")
         
     except Exception as e:
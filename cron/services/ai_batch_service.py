@@ -0,0 +1,243 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from supabase import Client
+from common.logger import Logger
+from common.config import Config
+from common.openai_service import OpenAIService
+from common.scoring_rules import compile_rule
+
+class AIBatchService:
+    """
+    Serwis wsadowej oceny odpowiedzi przez AI (OpenAI Batch API, tabela ai_batch_jobs).
+    Odpowiedzi wymagające oceny są zapisywane w pliku JSONL i wysyłane jednym zadaniem,
+    a wyniki trafiają do cache ocen AI. Zadanie przeliczania, które czekało na wyniki,
+    wraca do kolejki i zapisuje punkty odpowiedzi korzystając z cache.
+    """
+
+    # Statusy Batch API, po których zadanie nie zmieni się już samo
+    FINISHED_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+    def __init__(self, supabase: Client, config: Config, openai_service: OpenAIService):
+        self.supabase = supabase
+        self.config = config
+        self.openai_service = openai_service
+        self.logger = Logger.instance()
+
+
+    def submit(self, candidate_ids: List[int], recalculation_job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Wysyła do oceny wsadowej odpowiedzi kandydatów na pytania typu EVALUATION_BY_AI,
+        których ocen nie ma jeszcze w cache. Identyczne odpowiedzi są wysyłane raz.
+
+        Args:
+            candidate_ids: ID kandydatów objętych przeliczeniem
+            recalculation_job_id: ID zadania przeliczania czekającego na wyniki
+
+        Returns:
+            Optional[Dict[str, Any]]: Utworzone zadanie z tabeli ai_batch_jobs lub None,
+            gdy nie ma odpowiedzi do oceny
+        """
+        if self.openai_service.evaluation_cache is None or not self.openai_service.backend.supports_batch:
+            return None
+
+        requests = self._collect_requests(candidate_ids)
+        if not requests:
+            self.logger.info(f"[ZADANIE {recalculation_job_id}] Brak odpowiedzi wymagających oceny wsadowej")
+            return None
+
+        lines = list(requests.values())
+        if len(lines) > self.config.AI_BATCH_MAX_REQUESTS:
+            self.logger.warning(
+                f"[ZADANIE {recalculation_job_id}] Do oceny wsadowej wysłano {self.config.AI_BATCH_MAX_REQUESTS} "
+                f"z {len(lines)} odpowiedzi, pozostałe zostaną ocenione synchronicznie"
+            )
+            lines = lines[:self.config.AI_BATCH_MAX_REQUESTS]
+
+        content = '\n'.join(json.dumps(line, ensure_ascii=False) for line in lines)
+        client = self.openai_service.backend.client
+        input_file = client.files.create(
+            file=(f'recalculation_job_{recalculation_job_id}.jsonl', content.encode('utf-8')),
+            purpose='batch'
+        )
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h',
+            metadata={'recalculation_job_id': str(recalculation_job_id)}
+        )
+
+        response = self.supabase.table('ai_batch_jobs')\
+            .insert({
+                'recalculation_job_id': recalculation_job_id,
+                'openai_batch_id': batch.id,
+                'input_file_id': input_file.id,
+                'request_count': len(lines)
+            })\
+            .execute()
+
+        self.logger.info(
+            f"[ZADANIE {recalculation_job_id}] Wysłano {len(lines)} odpowiedzi do oceny wsadowej (batch {batch.id})"
+        )
+        return response.data[0]
+
+
+    def process_submitted(self) -> None:
+        """
+        Sprawdza stan wysłanych zadań wsadowych. Wyniki zakończonych zadań są zapisywane
+        w cache ocen AI, a powiązane zadania przeliczania wracają do kolejki.
+        Odpowiedzi bez wyniku zostaną ocenione synchronicznie podczas przeliczania.
+        """
+        response = self.supabase.table('ai_batch_jobs')\
+            .select('*')\
+            .eq('status', 'SUBMITTED')\
+            .order('id')\
+            .execute()
+
+        for batch_job in response.data or []:
+            try:
+                self._process_batch_job(batch_job)
+            except Exception as e:
+                self.logger.error(f"Błąd podczas sprawdzania zadania wsadowego {batch_job['openai_batch_id']}: {str(e)}")
+
+
+    def _process_batch_job(self, batch_job: Dict[str, Any]) -> None:
+        batch = self.openai_service.backend.client.batches.retrieve(batch_job['openai_batch_id'])
+        if batch.status not in self.FINISHED_STATUSES:
+            self.logger.debug(f"Zadanie wsadowe {batch.id} w trakcie ({batch.status})")
+            return
+
+        ingested, failed = 0, 0
+        if batch.output_file_id:
+            ingested, failed = self._ingest_results(batch.output_file_id)
+
+        updates = {
+            'status': 'COMPLETED' if batch.status == 'completed' else 'FAILED',
+            'output_file_id': batch.output_file_id,
+            'ingested_count': ingested,
+            'failed_count': batch_job['request_count'] - ingested,
+            'completed_at': datetime.now(timezone.utc).isoformat()
+        }
+        if batch.status != 'completed':
+            updates['error'] = f"Zadanie wsadowe zakończone ze statusem {batch.status}"
+
+        self.supabase.table('ai_batch_jobs')\
+            .update(updates)\
+            .eq('id', batch_job['id'])\
+            .execute()
+
+        self.logger.info(
+            f"Zakończono zadanie wsadowe {batch.id} ({batch.status}): zapisano {ingested} ocen, "
+            f"błędne wyniki {failed}, bez wyniku {batch_job['request_count'] - ingested - failed}"
+        )
+
+        if batch_job.get('recalculation_job_id'):
+            # Anulowane zadanie przeliczania nie wraca do kolejki
+            self.supabase.table('recalculation_jobs')\
+                .update({'status': 'PENDING'})\
+                .eq('id', batch_job['recalculation_job_id'])\
+                .eq('status', 'WAITING_AI_BATCH')\
+                .execute()
+
+
+    def _ingest_results(self, output_file_id: str) -> Tuple[int, int]:
+        """
+        Zapisuje w cache oceny z pliku wynikowego zadania wsadowego
+
+        Returns:
+            Tuple[int, int]: Liczba zapisanych ocen i liczba wyników, których nie udało się użyć
+        """
+        content = self.openai_service.backend.client.files.content(output_file_id).text
+        results = {}
+        failed = 0
+
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                cache_key, max_points = row['custom_id'].rsplit(':', 1)
+                response = row.get('response') or {}
+                if response.get('status_code') != 200:
+                    raise ValueError(f"Status odpowiedzi {response.get('status_code')}: {row.get('error')}")
+                message = response['body']['choices'][0]['message']['content']
+                results[cache_key] = self.openai_service.parse_evaluation(message, float(max_points))
+            except Exception as e:
+                failed += 1
+                self.logger.warning(f"Nie udało się odczytać wyniku oceny wsadowej: {str(e)}")
+
+        cache = self.openai_service.evaluation_cache
+        keys = list(results.keys())
+        for start in range(0, len(keys), self.config.CRON_BATCH_SIZE):
+            chunk = {key: results[key] for key in keys[start:start + self.config.CRON_BATCH_SIZE]}
+            cache.put_many(chunk, self.openai_service.PROMPT_VERSION, self.openai_service.model)
+
+        return len(results), failed
+
+
+    def _collect_requests(self, candidate_ids: List[int]) -> Dict[str, dict]:
+        """
+        Buduje zapytania Batch API dla odpowiedzi ocenianych przez AI, pomijając oceny zapisane w cache
+
+        Returns:
+            Dict[str, dict]: Mapowanie klucza cache na wiersz pliku JSONL
+        """
+        batch_size = self.config.CRON_BATCH_SIZE
+        pending = {}
+
+        for start in range(0, len(candidate_ids), batch_size):
+            chunk_ids = candidate_ids[start:start + batch_size]
+            last_id = 0
+            while True:
+                # Stronicowanie po ID, bo kandydaci mogą mieć więcej odpowiedzi niż limit wierszy PostgREST
+                response = self.supabase.table('candidate_answers')\
+                    .select('id, answer, question:questions!inner(question_text, points, answer_type, algorithm_type, algorithm_params)')\
+                    .in_('candidate_id', chunk_ids)\
+                    .eq('question.algorithm_type', 'EVALUATION_BY_AI')\
+                    .gt('id', last_id)\
+                    .order('id')\
+                    .limit(1000)\
+                    .execute()
+
+                rows = response.data or []
+                for row in rows:
+                    self._add_request(pending, row)
+
+                if len(rows) < 1000:
+                    break
+                last_id = rows[-1]['id']
+
+        # Pomijane są odpowiedzi, których ocena jest już w cache
+        keys = list(pending.keys())
+        for start in range(0, len(keys), batch_size):
+            cached = self.openai_service.evaluation_cache.get_many(keys[start:start + batch_size])
+            for key in cached:
+                pending.pop(key, None)
+
+        return pending
+
+
+    def _add_request(self, pending: Dict[str, dict], row: Dict[str, Any]) -> None:
+        question = row['question']
+        rule = compile_rule(question)
+        if not rule.requires_ai or not rule.max_points:
+            return
+
+        # Te same argumenty co w TestScoreService, aby klucze cache były zgodne
+        evaluation = {
+            'question_text': question['question_text'],
+            'answer_text': row.get('answer', ''),
+            'max_points': float(rule.max_points),
+            'algorithm_params': question.get('algorithm_params', {})
+        }
+        cache_key = self.openai_service.cache_key(**evaluation)
+        if not cache_key or cache_key in pending:
+            return
+
+        try:
+            prompt = self.openai_service.build_prompt(**evaluation)
+        except Exception as e:
+            self.logger.warning(f"Pominięto odpowiedź {row['id']} w ocenie wsadowej: {str(e)}")
+            return
+
+        pending[cache_key] = self.openai_service.batch_request(f"{cache_key}:{evaluation['max_points']}", prompt)
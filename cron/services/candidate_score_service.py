@@ -1,4 +1,5 @@
 import json
+import time
 from common.logger import Logger
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional
@@ -6,7 +7,10 @@ from supabase import Client
 from common.token_utils import generate_access_token
 from common.config import Config
 from common.email_service import EmailService
+from common.email_outbox import EmailOutbox
 from common.test_score_service import TestScoreService
+from common.openai_service import AIEvaluationDeferred
+from common.batch_runner import BatchRunner
 
 class CandidateScoreService:
     """Serwis do zarządzania kandydatami i ich statusami"""
@@ -21,6 +25,7 @@ class CandidateScoreService:
         self.config = config
         self.email_service = email_service
         self.test_score_service = test_score_service
+        self.email_outbox = EmailOutbox(supabase)
         self.logger = Logger.instance()
 
 
@@ -33,12 +38,13 @@ class CandidateScoreService:
             campaign: Dane kampanii rekrutacyjnej
             
         Returns:
-            dict: Zaktualizowane dane kandydata
+            bool: True jeśli kandydat został przetworzony, False w przypadku błędu
         """
         try:
             current_time = datetime.now(timezone.utc)
             campaign = candidate['campaign']
             updates = {}
+            emails = []
             
             self.logger.info(f"Rozpoczęcie aktualizacji wyników dla kandydata {candidate['id']} o statusie {candidate.get('recruitment_status')}")
             
@@ -58,11 +64,7 @@ class CandidateScoreService:
                         updates['recruitment_status'] = 'REJECTED_CRITICAL'
                         self.logger.warning(f"Kandydat {candidate['id']} nie zaliczył pytania krytycznego w PO1")
                         updates['updated_at'] = current_time.isoformat()
-                        self.supabase.table('candidates')\
-                            .update(updates)\
-                            .eq('id', candidate['id'])\
-                            .execute()
-                        return
+                        return self._save_candidate(candidate, updates, emails)
                     
                     if isinstance(result, dict) and 'score' in result:
                         updates['po1_score'] = result['score']
@@ -79,7 +81,7 @@ class CandidateScoreService:
                                 updates['recruitment_status'] = 'REJECTED'
                                 self.logger.warning(f"Kandydat {candidate['id']} nie osiągnął wymaganego progu {passing_threshold} punktów w PO1 (wynik: {result['score']})")
                             elif result['score'] >= passing_threshold and candidate.get('recruitment_status') == 'PO1':
-                                result = self._generate_token(candidate, campaign, 'PO2')
+                                result = self._generate_token(candidate, campaign, 'PO2', emails)
                                 updates.update(result)
                 else:
                     self.logger.warning(f"Nie otrzymano wyniku dla kandydata {candidate['id']} w teście PO1")
@@ -99,11 +101,7 @@ class CandidateScoreService:
                     updates['recruitment_status'] = 'REJECTED_CRITICAL'
                     self.logger.warning(f"Kandydat {candidate['id']} nie zaliczył pytania krytycznego w PO2")
                     updates['updated_at'] = current_time.isoformat()
-                    self.supabase.table('candidates')\
-                        .update(updates)\
-                        .eq('id', candidate['id'])\
-                        .execute()
-                    return
+                    return self._save_candidate(candidate, updates, emails)
                 
                 if isinstance(result, dict):  # EQ test results
                     updates.update(result)
@@ -135,7 +133,7 @@ class CandidateScoreService:
                             updates['recruitment_status'] = 'REJECTED'
                             self.logger.info(f"Kandydat {candidate['id']} nie osiągnął wymaganego progu {passing_threshold} punktów w PO2")
                         elif result['score'] >= passing_threshold and candidate.get('recruitment_status') == 'PO2':
-                            result = self._generate_token(candidate, campaign, 'PO3')
+                            result = self._generate_token(candidate, campaign, 'PO3', emails)
                             updates.update(result)
 
             # Sprawdzenie i obliczenie wyniku PO2_5
@@ -153,11 +151,7 @@ class CandidateScoreService:
                     updates['recruitment_status'] = 'REJECTED_CRITICAL'
                     self.logger.warning(f"Kandydat {candidate['id']} nie zaliczył pytania krytycznego w PO2_5")
                     updates['updated_at'] = current_time.isoformat()
-                    self.supabase.table('candidates')\
-                        .update(updates)\
-                        .eq('id', candidate['id'])\
-                        .execute()
-                    return
+                    return self._save_candidate(candidate, updates, emails)
                 
                 if result is not None and 'score' in result:  # Regular test score
                     updates['po2_5_score'] = result['score']
@@ -174,7 +168,7 @@ class CandidateScoreService:
                             updates['recruitment_status'] = 'REJECTED'
                             self.logger.info(f"Kandydat {candidate['id']} nie osiągnął wymaganego progu {passing_threshold} punktów w PO2_5")
                         elif result['score'] >= passing_threshold and (candidate.get('recruitment_status') == 'PO2' or candidate.get('recruitment_status') == 'PO2_5'):
-                            result = self._generate_token(candidate, campaign, 'PO3')
+                            result = self._generate_token(candidate, campaign, 'PO3', emails)
                             updates.update(result)
 
             # Sprawdzenie i obliczenie wyniku PO3
@@ -192,11 +186,7 @@ class CandidateScoreService:
                     updates['recruitment_status'] = 'REJECTED_CRITICAL'
                     self.logger.warning(f"Kandydat {candidate['id']} nie zaliczył pytania krytycznego w PO3")
                     updates['updated_at'] = current_time.isoformat()
-                    self.supabase.table('candidates')\
-                        .update(updates)\
-                        .eq('id', candidate['id'])\
-                        .execute()
-                    return
+                    return self._save_candidate(candidate, updates, emails)
                 
                 if result is not None and 'score' in result:  # Regular test score
                     updates['po3_score'] = result['score']
@@ -213,7 +203,8 @@ class CandidateScoreService:
                             updates['recruitment_status'] = 'REJECTED'
                             self.logger.info(f"Kandydat {candidate['id']} nie osiągnął wymaganego progu {passing_threshold} punktów w PO3")
                         elif result['score'] >= passing_threshold and candidate.get('recruitment_status') == 'PO3':
-                            self._next_stage(candidate)
+                            updates['recruitment_status'] = 'PO4'
+                            self.logger.info(f"Kandydat {candidate['id']} osiągnął wymagany próg {passing_threshold} punktów w PO3")
 
             if updates:
                 self.logger.info(f"Aktualizacja danych kandydata {candidate['id']}: {updates}")
@@ -233,10 +224,8 @@ class CandidateScoreService:
                 updates['updated_at'] = datetime.now(timezone.utc).isoformat()
                 
                 # Update database with all changes including total_score
-                self.supabase.table('candidates')\
-                    .update(updates)\
-                    .eq('id', candidate['id'])\
-                    .execute()
+                if not self._save_candidate(candidate, updates, emails):
+                    return False
                 
                 if 'recruitment_status' in updates:
                     self.logger.info(f"Zaktualizowano status kandydata {candidate['id']} na {updates['recruitment_status']}")
@@ -245,10 +234,16 @@ class CandidateScoreService:
                 
             else:
                 self.logger.info(f"Brak aktualizacji dla kandydata {candidate['id']}")
-                
             
+            return True
+            
+        except AIEvaluationDeferred as e:
+            # Znacznik needs_scoring pozostaje ustawiony, więc kandydat zostanie oceniony przy kolejnym uruchomieniu
+            self.logger.warning(f"Ocena kandydata {candidate['id']} odłożona do kolejnego uruchomienia: {str(e)}")
+            return False
         except Exception as e:
             self.logger.error(f"Błąd podczas aktualizacji wyników kandydata {candidate['id']}: {str(e)}")
+            return False
 
 
     def _calculate_total_weighted_score(self, po1_score: Optional[float], 
@@ -317,45 +312,53 @@ class CandidateScoreService:
             return 0.0
 
 
-    def _next_stage(self, candidate: Dict[str, Any]):
+    def _save_candidate(self, candidate: Dict[str, Any], updates: Dict[str, Any], emails: List[Dict[str, Any]]) -> bool:
         """
-        Pobiera następny etap rekrutacji dla kandydata
+        Zapisuje zmiany kandydata. Zaproszenia są dodawane do kolejki email_outbox
+        w tej samej transakcji co nowy token, więc zmiana etapu i wiadomość zapisują się razem.
+        
+        Zapis jest warunkowy: zmiany obliczone dla statusu odczytanego przy pobraniu kandydata
+        nie nadpisują decyzji rekrutera podjętej w trakcie obliczeń (np. odrzucenia).
         
-        Args:
-            candidate: Dane kandydata
-            
         Returns:
-            str: Następny etap rekrutacji
+            bool: False, jeśli status kandydata zmienił się w międzyczasie i nic nie zapisano
         """
-        updates = {}
+        expected_status = candidate.get('recruitment_status')
         
-        if candidate.get('recruitment_status') == 'PO1':
-            updates['recruitment_status'] = 'PO2'
-        elif candidate.get('recruitment_status') == 'PO2':
-            updates['recruitment_status'] = 'PO2_5'
-        elif candidate.get('recruitment_status') == 'PO2_5':
-            updates['recruitment_status'] = 'PO3'
-        elif candidate.get('recruitment_status') == 'PO3':
-            updates['recruitment_status'] = 'PO4'
-        
-        if updates:
-            self.supabase.table('candidates')\
+        if not emails:
+            response = self.supabase.table('candidates')\
                 .update(updates)\
                 .eq('id', candidate['id'])\
+                .eq('recruitment_status', expected_status)\
                 .execute()
-            self.logger.info(f"Zaktualizowano status kandydata {candidate['id']} na {updates['recruitment_status']}")
+            saved = bool(response.data)
         else:
-            self.logger.info(f"Status nie może być zaktualizowany dla kandydata {candidate['id']}")
+            saved = self.email_outbox.update_candidate_and_enqueue(candidate['id'], updates, emails, expected_status)
+            emails.clear()
+        
+        if not saved:
+            self.logger.warning(
+                f"Status kandydata {candidate['id']} zmienił się podczas obliczania wyników "
+                f"(oczekiwano {expected_status}), zmiany nie zostały zapisane"
+            )
+        return saved
 
 
-    def _generate_token(self, candidate: Dict[str, Any], campaign: dict[str, Any], next_stage: str) -> Dict[str, Any]:
+    def _generate_token(
+        self,
+        candidate: Dict[str, Any],
+        campaign: dict[str, Any],
+        next_stage: str,
+        emails: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
         """
-        Generuje token dostępu i wysyła email do kandydata
+        Generuje token dostępu i przygotowuje zaproszenie dla kandydata
         
         Args:
             candidate: Dane kandydata
             campaign: Dane kampanii
             next_stage: Etap rekrutacji (PO2/PO3)
+            emails: Lista, do której dodawane jest zaproszenie (zapisywane przez _save_candidate)
         """
 
         try:
@@ -407,15 +410,16 @@ class CandidateScoreService:
                 'PO3': 'Test końcowy'
             }.get(next_stage, f'Test {next_stage}')
             
-            if self.email_service.send_test_invitation(
+            # Zaproszenie trafi do kolejki razem z zapisem tokenu (_save_candidate)
+            emails.append(self.email_service.build_test_invitation(
                 to_email=candidate['email'],
                 stage_name=stage_name,
                 campaign_title=campaign.get('title'),
                 test_url=test_url,
                 expiry_date=formatted_expiry,
                 test_details=test_details
-            ):
-                self.logger.info(f"Wysłano zaproszenie na {stage_name} do kandydata {candidate['id']}")
+            ))
+            self.logger.info(f"Przygotowano zaproszenie na {stage_name} dla kandydata {candidate['id']}")
 
             return updates
 
@@ -424,65 +428,152 @@ class CandidateScoreService:
             raise
 
 
-    def get_candidate_to_update(self, candidate_id: int) -> Dict[str, Any]:
+    def get_candidates_batch(self, after_id: int, batch_size: int) -> List[Dict[str, Any]]:
+        """
+        Pobiera kolejną paczkę aktywnych kandydatów oczekujących na przeliczenie wyników
+        wraz z danymi kampanii (przy CRON_FULL_SCAN wszystkich aktywnych kandydatów)
+        
+        Args:
+            after_id: ID ostatniego kandydata z poprzedniej paczki (0 dla pierwszej paczki)
+            batch_size: Maksymalna liczba kandydatów w paczce
+            
+        Returns:
+            List[Dict[str, Any]]: Lista kandydatów posortowana rosnąco po ID
+        """
         try:
-            response = self.supabase.table('candidates')\
+            query = self.supabase.table('candidates')\
                 .select('*, campaign:campaigns!campaign_id(*)')\
                 .neq('recruitment_status', 'REJECTED')\
                 .neq('recruitment_status', 'REJECTED_CRITICAL')\
                 .neq('recruitment_status', 'ACCEPTED')\
-                .neq('recruitment_status', 'PO4')\
-                .eq('id', candidate_id)\
-                .execute()
+                .neq('recruitment_status', 'PO4')
             
-            if not response.data:
-                self.logger.info(f"Brak kandydata {candidate_id} w bazie danych")
-                return None
+            # Domyślnie tylko kandydaci oznaczeni po przesłaniu nowych odpowiedzi
+            if not self.config.CRON_FULL_SCAN:
+                query = query.eq('needs_scoring', True)
             
-            return response.data[0]
+            response = query\
+                .gt('id', after_id)\
+                .order('id')\
+                .limit(batch_size)\
+                .execute()
+            
+            candidates = response.data or []
+            self.logger.info(f"Pobrano paczkę {len(candidates)} kandydatów (ID > {after_id})")
+            return candidates
+        
         except Exception as e:
-            self.logger.error(f"Błąd podczas pobierania kandydata {candidate_id}: {str(e)}")
+            self.logger.error(f"Błąd podczas pobierania paczki kandydatów (ID > {after_id}): {str(e)}")
             raise
 
 
-    def get_candidates_to_update(self) -> List:
+    def get_current_statuses(self, candidate_ids: List[int]) -> Dict[int, str]:
+        """
+        Pobiera aktualne statusy rekrutacji dla podanych kandydatów jednym zapytaniem
+        
+        Args:
+            candidate_ids: Lista ID kandydatów
+            
+        Returns:
+            Dict[int, str]: Mapowanie ID kandydata na jego obecny status
+        """
+        if not candidate_ids:
+            return {}
+        
         try:
             response = self.supabase.table('candidates')\
-                .select('id')\
-                .neq('recruitment_status', 'REJECTED')\
-                .neq('recruitment_status', 'REJECTED_CRITICAL')\
-                .neq('recruitment_status', 'ACCEPTED')\
-                .neq('recruitment_status', 'PO4')\
+                .select('id, recruitment_status')\
+                .in_('id', candidate_ids)\
                 .execute()
             
-            candidates = response.data
+            return {row['id']: row['recruitment_status'] for row in (response.data or [])}
+        
+        except Exception as e:
+            self.logger.error(f"Błąd podczas sprawdzania statusów kandydatów: {str(e)}")
+            raise
 
-            if not candidates:
-                self.logger.info("Brak kandydatów do aktualizacji")
-                return []
+
+    def _process_candidate(self, candidate: Dict[str, Any]) -> bool:
+        """
+        Przelicza wyniki kandydata i zdejmuje znacznik needs_scoring
+        
+        Znacznik jest zdejmowany tylko wtedy, gdy od momentu pobrania kandydata nie
+        przesłał on nowych odpowiedzi (scoring_requested_at się nie zmienił).
+        W przypadku błędu znacznik pozostaje, więc kandydat zostanie przetworzony ponownie.
+        
+        Args:
+            candidate: Dane kandydata wraz z kampanią
             
-            self.logger.info(f"Pobieranie listy kandydatów: {len(candidates)}")
-            return candidates
+        Returns:
+            bool: True jeśli kandydat został przetworzony, False w przypadku błędu
+        """
+        if not self.calculate_candidate_scores(candidate):
+            return False
+        
+        if not candidate.get('needs_scoring'):
+            return True
+        
+        try:
+            query = self.supabase.table('candidates')\
+                .update({'needs_scoring': False})\
+                .eq('id', candidate['id'])
+            
+            if candidate.get('scoring_requested_at') is not None:
+                query = query.eq('scoring_requested_at', candidate['scoring_requested_at'])
+            
+            query.execute()
+            return True
         
         except Exception as e:
-            self.logger.error(f"Błąd podczas pobierania listy kandydatów: {str(e)}")
-            raise
+            self.logger.error(f"Błąd podczas zdejmowania znacznika needs_scoring dla kandydata {candidate['id']}: {str(e)}")
+            return False
 
 
     def update_candidates(self):
-        """Aktualizuje statusy i wyniki wszystkich aktywnych kandydatów"""
+        """Aktualizuje statusy i wyniki aktywnych kandydatów oczekujących na przeliczenie"""
         try:
-            candidates = self.get_candidates_to_update()
-
-            for candidate in candidates:
-                candidate_data = self.get_candidate_to_update(candidate['id'])
-                if candidate_data:
-                    self.calculate_candidate_scores(candidate_data)
-                else:
-                    self.logger.warning(f"Brak kandydata {candidate['id']} w bazie danych lub zmienił status")
+            batch_size = self.config.CRON_BATCH_SIZE
+            recheck_seconds = self.config.CRON_STATUS_RECHECK_SECONDS
+            last_id = 0
+            
+            self.logger.info(f"Przetwarzanie kandydatów przy użyciu {self.config.CRON_WORKERS} wątków")
+            
+            with BatchRunner(self.config.CRON_WORKERS, log_prefix='KANDYDAT') as runner:
+                while True:
+                    candidates = self.get_candidates_batch(last_id, batch_size)
+                    if not candidates:
+                        break
                     
-            self.logger.info("Zakończono aktualizację kandydatów")
+                    last_id = candidates[-1]['id']
+                    statuses = {}
+                    statuses_checked_at = None
+                    
+                    for index, candidate in enumerate(candidates):
+                        # Odświeżamy statusy pozostałych kandydatów z paczki, jeśli ostatnie sprawdzenie jest zbyt stare
+                        if statuses_checked_at is None or time.monotonic() - statuses_checked_at >= recheck_seconds:
+                            statuses = self.get_current_statuses([c['id'] for c in candidates[index:]])
+                            statuses_checked_at = time.monotonic()
+                        
+                        if statuses.get(candidate['id']) != candidate.get('recruitment_status'):
+                            self.logger.warning(f"Brak kandydata {candidate['id']} w bazie danych lub zmienił status")
+                            continue
+                        
+                        # Czeka na wolny wątek, więc status jest sprawdzany tuż przed obliczeniem wyników
+                        runner.submit(candidate['id'], self._process_candidate, candidate)
+                    
+                    if len(candidates) < batch_size:
+                        break
+            
+            stats = runner.stats
+            if stats['processed'] == 0:
+                self.logger.info("Brak kandydatów do aktualizacji")
+                    
+            self.logger.info(
+                f"Zakończono aktualizację kandydatów: przetworzono {stats['processed']}, "
+                f"błędy {stats['failed']}, czas {stats['elapsed_seconds']}s "
+                f"({stats['per_second']} kandydatów/s)"
+            )
             
         except Exception as e:
             self.logger.error(f"Błąd podczas pobierania listy kandydatów: {str(e)}")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,291 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from supabase import Client
+from common.logger import Logger
+from common.config import Config
+from common.batch_runner import BatchRunner
+from common.recalculation_score_service import RecalculationScoreService
+from cron.services.ai_batch_service import AIBatchService
+
+class RecalculationJobService:
+    """Serwis wykonujący zbiorcze zadania przeliczania wyników (tabela recalculation_jobs)"""
+
+    def __init__(self,
+                 supabase: Client,
+                 config: Config,
+                 recalculation_service: RecalculationScoreService,
+                 ai_batch_service: Optional[AIBatchService] = None
+    ):
+        self.supabase = supabase
+        self.config = config
+        self.recalculation_service = recalculation_service
+        self.ai_batch_service = ai_batch_service
+        self.logger = Logger.instance()
+
+
+    def run_pending_jobs(self) -> None:
+        """
+        Wykonuje kolejno wszystkie oczekujące zadania przeliczania. Najpierw odbiera wyniki
+        zakończonych zadań wsadowych AI, aby czekające na nie przeliczenia wróciły do kolejki.
+        """
+        if self.ai_batch_service:
+            self.ai_batch_service.process_submitted()
+
+        while True:
+            job = self.claim_next_job()
+            if not job:
+                break
+            self.run_job(job)
+
+
+    def claim_next_job(self) -> Optional[Dict[str, Any]]:
+        """
+        Przejmuje najstarsze oczekujące zadanie lub zadanie RUNNING bez postępu dłużej niż
+        CRON_JOB_TIMEOUT_SECONDS (np. po awarii procesu cron). Zmiana statusu jest warunkowa,
+        więc równolegle uruchomiony cron nie przejmie tego samego zadania.
+
+        Returns:
+            Optional[Dict[str, Any]]: Przejęte zadanie lub None, gdy brak zadań
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            stale_before = (now - timedelta(seconds=self.config.CRON_JOB_TIMEOUT_SECONDS)).isoformat()
+
+            candidates = self.supabase.table('recalculation_jobs')\
+                .select('id, status, heartbeat_at')\
+                .or_(f"status.eq.PENDING,and(status.eq.RUNNING,heartbeat_at.lt.\"{stale_before}\")")\
+                .order('id')\
+                .limit(1)\
+                .execute()
+
+            if not candidates.data:
+                return None
+
+            job = candidates.data[0]
+            query = self.supabase.table('recalculation_jobs')\
+                .update({
+                    'status': 'RUNNING',
+                    'started_at': now.isoformat(),
+                    'heartbeat_at': now.isoformat()
+                })\
+                .eq('id', job['id'])\
+                .eq('status', job['status'])
+
+            if job['status'] == 'RUNNING':
+                self.logger.warning(f"[ZADANIE {job['id']}] Przejmowanie zadania bez postępu od {job['heartbeat_at']}")
+                query = query.eq('heartbeat_at', job['heartbeat_at'])
+
+            claimed = query.execute()
+            if claimed.data:
+                return claimed.data[0]
+
+
+    def run_job(self, job: Dict[str, Any]) -> None:
+        """
+        Przelicza wyniki wszystkich kandydatów z zakresu zadania, paczkami i równolegle
+        (CRON_BATCH_SIZE, CRON_WORKERS), zapisując postęp po każdej paczce.
+
+        Args:
+            job: Dane zadania z tabeli recalculation_jobs
+        """
+        job_id = job['id']
+        try:
+            campaign_ids = self._get_scope_campaign_ids(job)
+            total = self._count_candidates(job, campaign_ids)
+            if not self._update_job(job, {'total': total}):
+                self.logger.warning(f"[ZADANIE {job_id}] Zadanie zostało anulowane lub przejęte przez inny proces")
+                return
+
+            if self._should_use_ai_batch(job, total) and self._submit_ai_batch(job, campaign_ids):
+                return
+
+            self.logger.info(f"[ZADANIE {job_id}] Rozpoczęcie przeliczania wyników {total} kandydatów")
+
+            interrupted = False
+            last_id = 0
+            with BatchRunner(self.config.CRON_WORKERS, log_prefix='KANDYDAT') as runner:
+                while total and last_id is not None:
+                    candidates, last_id = self._get_candidates_batch(job, campaign_ids, last_id)
+                    for candidate in candidates:
+                        runner.submit(candidate['id'], self._recalculate_candidate, candidate)
+
+                    # Zapis postępu jest warunkowy - nie powiedzie się po anulowaniu lub przejęciu zadania
+                    if not self._update_job(job, self._progress(runner.stats)):
+                        self.logger.warning(f"[ZADANIE {job_id}] Zadanie zostało anulowane lub przejęte przez inny proces")
+                        interrupted = True
+                        break
+
+            stats = runner.stats
+            updates = self._progress(stats)
+            updates['finished_at'] = datetime.now(timezone.utc).isoformat()
+            if interrupted:
+                # Anulowane zadanie zachowuje końcowy postęp; przejętego zadania nie nadpisujemy
+                self._update_job(job, updates, status='CANCELLED')
+            else:
+                updates['status'] = 'COMPLETED'
+                self._update_job(job, updates)
+
+            self.logger.info(
+                f"[ZADANIE {job_id}] Zakończono przeliczanie: przetworzono {stats['processed']}/{total}, "
+                f"błędy {stats['failed']}, czas {stats['elapsed_seconds']}s "
+                f"({stats['per_second']} kandydatów/s)"
+            )
+
+        except Exception as e:
+            self.logger.error(f"[ZADANIE {job_id}] Błąd podczas wykonywania zadania przeliczania: {str(e)}")
+            self._update_job(job, {
+                'status': 'FAILED',
+                'error': str(e),
+                'finished_at': datetime.now(timezone.utc).isoformat()
+            })
+
+
+    def _should_use_ai_batch(self, job: Dict[str, Any], total: int) -> bool:
+        """Zadanie wsadowe AI jest tworzone raz, tylko dla dużych przeliczeń"""
+        return bool(self.ai_batch_service) \
+            and self.config.AI_BATCH_MODE \
+            and not job.get('ai_batch_job_id') \
+            and total >= self.config.AI_BATCH_MIN_CANDIDATES
+
+
+    def _submit_ai_batch(self, job: Dict[str, Any], campaign_ids: Optional[List[int]]) -> bool:
+        """
+        Wysyła odpowiedzi kandydatów z zakresu zadania do oceny wsadowej przez AI.
+        Zadanie przeliczania czeka na wyniki (WAITING_AI_BATCH) i wraca do kolejki po ich odebraniu.
+
+        Returns:
+            bool: True, jeśli zadanie czeka na ocenę wsadową; False, gdy należy przeliczać od razu
+        """
+        job_id = job['id']
+        candidate_ids = []
+        last_id = 0
+        while last_id is not None:
+            candidates, last_id = self._get_candidates_batch(job, campaign_ids, last_id)
+            candidate_ids.extend(candidate['id'] for candidate in candidates)
+
+        try:
+            batch_job = self.ai_batch_service.submit(candidate_ids, job_id)
+        except Exception as e:
+            self.logger.warning(f"[ZADANIE {job_id}] Nie udało się utworzyć zadania wsadowego AI, przeliczanie synchroniczne: {str(e)}")
+            return False
+
+        if not batch_job:
+            return False
+
+        self._update_job(job, {
+            'status': 'WAITING_AI_BATCH',
+            'ai_batch_job_id': batch_job['id']
+        })
+        return True
+
+
+    def _recalculate_candidate(self, candidate: Dict[str, Any]) -> bool:
+        result = self.recalculation_service.recalculate_candidate_scores(candidate['id'], candidate)
+        return result.get('status') != 'error'
+
+
+    def _get_scope_campaign_ids(self, job: Dict[str, Any]) -> Optional[List[int]]:
+        """Zwraca ID kampanii objętych zadaniem lub None, gdy zadanie nie ogranicza kampanii"""
+        if job.get('campaign_id'):
+            return [job['campaign_id']]
+
+        if job.get('test_id'):
+            test_id = job['test_id']
+            response = self.supabase.table('campaigns')\
+                .select('id')\
+                .or_(f"po1_test_id.eq.{test_id},po2_test_id.eq.{test_id},po2_5_test_id.eq.{test_id},po3_test_id.eq.{test_id}")\
+                .execute()
+            return [campaign['id'] for campaign in response.data or []]
+
+        return None
+
+
+    def _count_candidates(self, job: Dict[str, Any], campaign_ids: Optional[List[int]]) -> int:
+        if campaign_ids == []:
+            return 0
+
+        if job.get('candidate_ids') and campaign_ids is None:
+            return len(set(job['candidate_ids']))
+
+        query = self.supabase.table('candidates')\
+            .select('id', count='exact')\
+            .limit(1)
+
+        if campaign_ids is not None:
+            query = query.in_('campaign_id', campaign_ids)
+        if job.get('candidate_ids'):
+            query = query.in_('id', job['candidate_ids'])
+
+        return query.execute().count or 0
+
+
+    def _get_candidates_batch(
+        self,
+        job: Dict[str, Any],
+        campaign_ids: Optional[List[int]],
+        after_id: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Pobiera kolejną paczkę kandydatów z zakresu zadania wraz z kampaniami
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[int]]: Kandydaci oraz ID, od którego należy
+            pobrać następną paczkę (None, gdy to ostatnia paczka)
+        """
+        batch_size = self.config.CRON_BATCH_SIZE
+        query = self.supabase.table('candidates')\
+            .select('*, campaign:campaigns!campaign_id(*)')
+
+        if campaign_ids is not None:
+            query = query.in_('campaign_id', campaign_ids)
+
+        if job.get('candidate_ids'):
+            # Lista ID jest dzielona na paczki, aby nie przekraczać długości adresu zapytania
+            remaining_ids = sorted(candidate_id for candidate_id in set(job['candidate_ids']) if candidate_id > after_id)
+            batch_ids = remaining_ids[:batch_size]
+            if not batch_ids:
+                return [], None
+            response = query\
+                .in_('id', batch_ids)\
+                .order('id')\
+                .execute()
+            next_id = batch_ids[-1] if len(remaining_ids) > batch_size else None
+            return response.data or [], next_id
+
+        response = query\
+            .gt('id', after_id)\
+            .order('id')\
+            .limit(batch_size)\
+            .execute()
+
+        candidates = response.data or []
+        next_id = candidates[-1]['id'] if len(candidates) == batch_size else None
+        return candidates, next_id
+
+
+    def _progress(self, stats: Dict[str, float]) -> Dict[str, Any]:
+        return {
+            'processed': stats['processed'],
+            'failed': stats['failed'],
+            'per_second': stats['per_second']
+        }
+
+
+    def _update_job(self, job: Dict[str, Any], updates: Dict[str, Any], status: str = 'RUNNING') -> bool:
+        """
+        Zapisuje zmiany zadania, o ile nadal ma ono podany status i należy do tego procesu
+        (started_at z momentu przejęcia). Każdy zapis odświeża heartbeat_at.
+
+        Returns:
+            bool: False, gdy zadanie zostało w międzyczasie anulowane lub przejęte
+        """
+        updates = {**updates, 'heartbeat_at': datetime.now(timezone.utc).isoformat()}
+        query = self.supabase.table('recalculation_jobs')\
+            .update(updates)\
+            .eq('id', job['id'])\
+            .eq('status', status)
+
+        if job.get('started_at'):
+            query = query.eq('started_at', job['started_at'])
+
+        return bool(query.execute().data)
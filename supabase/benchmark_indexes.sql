@@ -0,0 +1,72 @@
+-- Porównanie planów zapytań przed i po dodaniu indeksów z migracji 20250113500013_v_1_0_23.sql.
+-- Skrypt działa w jednej transakcji zakończonej ROLLBACK - dane testowe i zmiany indeksów nie są zapisywane.
+--
+-- Uruchomienie (lokalna baza Supabase):
+--   psql -U postgres -h 127.0.0.1 -p 54322 -d postgres -f supabase/benchmark_indexes.sql
+--
+-- Liczbę kandydatów można zmienić poniżej (domyślnie 100 000 kandydatów i 5 odpowiedzi na etap).
+
+\set candidates 100000
+\set ON_ERROR_STOP on
+\timing off
+
+BEGIN;
+
+-- Stan "przed": usunięcie indeksów, jeśli migracja została już zastosowana
+DROP INDEX IF EXISTS idx_candidates_access_token_po2;
+DROP INDEX IF EXISTS idx_candidates_access_token_po3;
+DROP INDEX IF EXISTS idx_candidates_active;
+
+-- Dane testowe
+INSERT INTO tests (id, title, test_type, passing_threshold)
+VALUES (900001, 'Benchmark', 'SURVEY', 0);
+
+INSERT INTO questions (test_id, question_text, answer_type, order_number)
+SELECT 900001, 'Pytanie ' || n, 'TEXT', n
+FROM generate_series(1, 5) AS n;
+
+INSERT INTO campaigns (code, title, workplace_location, contract_type, employment_type, work_start_date,
+                       duties, requirements, employer_offerings, job_description, universal_access_token, po1_test_id)
+SELECT 'BENCH_' || n, 'Benchmark ' || n, '-', '-', '-', current_date, '-', '-', '-', '-',
+       md5('campaign' || n), 900001
+FROM generate_series(1, 200) AS n;
+
+INSERT INTO candidates (campaign_id, first_name, last_name, email, recruitment_status,
+                        access_token_po2, access_token_po3)
+SELECT (SELECT id FROM campaigns WHERE code = 'BENCH_' || (1 + n % 200)),
+       'Jan' || n, 'Kowalski' || n, 'kandydat' || n || '@example.com',
+       (ARRAY['PO1', 'PO2', 'PO3', 'PO4', 'REJECTED', 'ACCEPTED']::recruitment_status[])[1 + n % 6],
+       CASE WHEN n % 6 >= 1 THEN md5('po2' || n) END,
+       CASE WHEN n % 6 >= 2 THEN md5('po3' || n) END
+FROM generate_series(1, :candidates) AS n;
+
+INSERT INTO candidate_answers (candidate_id, question_id, stage, answer)
+SELECT c.id, q.id, s.stage, 'Odpowiedź'
+FROM candidates c
+JOIN campaigns cp ON cp.id = c.campaign_id AND cp.code LIKE 'BENCH\_%'
+CROSS JOIN questions q
+CROSS JOIN (VALUES ('PO1'), ('PO2'), ('PO3')) AS s(stage)
+WHERE q.test_id = 900001;
+
+ANALYZE tests, questions, campaigns, candidates, candidate_answers;
+
+-- Wartości do zapytań
+SELECT access_token_po2 AS token_po2, access_token_po3 AS token_po3, id AS candidate_id
+FROM candidates WHERE access_token_po3 IS NOT NULL ORDER BY id DESC LIMIT 1 \gset
+SELECT universal_access_token AS universal_token FROM campaigns WHERE code = 'BENCH_100' \gset
+
+\echo
+\echo '======================== PRZED ========================'
+\ir benchmark_indexes_queries.sql
+
+CREATE UNIQUE INDEX idx_candidates_access_token_po2 ON candidates(access_token_po2) WHERE access_token_po2 IS NOT NULL;
+CREATE UNIQUE INDEX idx_candidates_access_token_po3 ON candidates(access_token_po3) WHERE access_token_po3 IS NOT NULL;
+CREATE INDEX idx_candidates_active ON candidates(id)
+    WHERE recruitment_status NOT IN ('REJECTED', 'REJECTED_CRITICAL', 'ACCEPTED', 'PO4');
+ANALYZE candidates;
+
+\echo
+\echo '========================== PO =========================='
+\ir benchmark_indexes_queries.sql
+
+ROLLBACK;
@@ -0,0 +1,36 @@
+-- Zapytania porównywane przez supabase/benchmark_indexes.sql (odpowiedniki zapytań aplikacji i crona)
+
+\echo
+\echo '--- TestPublicService: kandydat po tokenie PO2 ---'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT * FROM candidates WHERE access_token_po2 = :'token_po2';
+
+\echo
+\echo '--- TestPublicService: kandydat po tokenie PO3 ---'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT * FROM candidates WHERE access_token_po3 = :'token_po3';
+
+\echo
+\echo '--- TestPublicService: kampania po uniwersalnym tokenie (bez indeksu) ---'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT * FROM campaigns WHERE universal_access_token = :'universal_token';
+
+\echo
+\echo '--- TestScoreService: odpowiedzi kandydata z etapu (indeks unikalności odpowiedzi) ---'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, question_id, answer, points_per_option
+FROM candidate_answers
+WHERE candidate_id = :candidate_id AND stage = 'PO2';
+
+\echo
+\echo '--- Cron (CRON_FULL_SCAN): paczka kandydatów w trakcie rekrutacji ---'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id
+FROM candidates
+WHERE recruitment_status <> 'REJECTED'
+  AND recruitment_status <> 'REJECTED_CRITICAL'
+  AND recruitment_status <> 'ACCEPTED'
+  AND recruitment_status <> 'PO4'
+  AND id > 50000
+ORDER BY id
+LIMIT 100;
@@ -0,0 +1,17 @@
+-- Wersja 1.0.12 aplikacji nie wprowadzała zmian w schemacie bazy, stąd brak migracji v_1_0_12
+
+-- Znacznik kandydatów, których wyniki musi przeliczyć cron
+ALTER TABLE candidates
+    ADD COLUMN IF NOT EXISTS needs_scoring boolean NOT NULL DEFAULT true,
+    ADD COLUMN IF NOT EXISTS scoring_requested_at timestamp with time zone DEFAULT now();
+
+COMMENT ON COLUMN candidates.needs_scoring IS 'Set when new answers are submitted, cleared by cron after scoring';
+COMMENT ON COLUMN candidates.scoring_requested_at IS 'Time of the last scoring request, used to clear needs_scoring without losing newer submissions';
+
+-- Kandydaci w zakończonych etapach nie wymagają przeliczenia
+UPDATE candidates
+SET needs_scoring = false
+WHERE recruitment_status IN ('REJECTED', 'REJECTED_CRITICAL', 'ACCEPTED', 'PO4');
+
+-- Indeks częściowy dla kolejki kandydatów oczekujących na przeliczenie
+CREATE INDEX IF NOT EXISTS idx_candidates_needs_scoring ON candidates(id) WHERE needs_scoring;
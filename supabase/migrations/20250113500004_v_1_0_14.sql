@@ -0,0 +1,26 @@
+-- Zbiorczy zapis wyników i wyjaśnień AI dla odpowiedzi kandydata
+-- p_scores: [{"id": 1, "score": 3, "ai_explanation": "..."}, ...]
+-- Klucze score i ai_explanation są opcjonalne - brak klucza pozostawia obecną wartość.
+-- Wszystkie wiersze są aktualizowane jednym poleceniem (wszystkie albo żaden).
+CREATE OR REPLACE FUNCTION update_candidate_answer_scores(
+    p_scores jsonb
+) RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    v_updated integer;
+BEGIN
+    UPDATE candidate_answers ca
+    SET score = CASE
+            WHEN s.value ? 'score' THEN (s.value->>'score')::float
+            ELSE ca.score
+        END,
+        ai_explanation = CASE
+            WHEN s.value ? 'ai_explanation' THEN s.value->>'ai_explanation'
+            ELSE ca.ai_explanation
+        END
+    FROM jsonb_array_elements(p_scores) AS s(value)
+    WHERE ca.id = (s.value->>'id')::bigint;
+
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
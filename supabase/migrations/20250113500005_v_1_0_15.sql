@@ -0,0 +1,21 @@
+-- Zadania zbiorczego przeliczania wyników kandydatów wykonywane przez cron
+CREATE TABLE IF NOT EXISTS recalculation_jobs (
+    id bigserial primary key,
+    campaign_id bigint references campaigns(id) ON DELETE CASCADE,
+    test_id integer references tests(id) ON DELETE CASCADE,
+    candidate_ids bigint[],
+    status text not null default 'PENDING' check (status in ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED')),
+    total integer,
+    processed integer not null default 0,
+    failed integer not null default 0,
+    per_second float,
+    error text,
+    created_by bigint references users(id) ON DELETE SET NULL,
+    created_at timestamp with time zone default now(),
+    started_at timestamp with time zone,
+    finished_at timestamp with time zone
+);
+
+COMMENT ON TABLE recalculation_jobs IS 'Background score recalculation jobs scoped to a campaign, a test or a list of candidates';
+
+CREATE INDEX IF NOT EXISTS idx_recalculation_jobs_pending ON recalculation_jobs(id) WHERE status = 'PENDING';
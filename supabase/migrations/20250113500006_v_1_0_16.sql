@@ -0,0 +1,13 @@
+-- Cache ocen odpowiedzi wystawionych przez AI
+-- Klucz to skrót SHA-256 z treści pytania, odpowiedzi, maksymalnej liczby punktów,
+-- parametrów oceny, wersji promptu i modelu
+CREATE TABLE IF NOT EXISTS ai_evaluation_cache (
+    cache_key text primary key,
+    score float not null,
+    explanation text,
+    model text not null,
+    prompt_version text not null,
+    created_at timestamp with time zone default now()
+);
+
+COMMENT ON TABLE ai_evaluation_cache IS 'Content-addressed cache of AI answer evaluations, reused by cron and recalculation';
@@ -0,0 +1,26 @@
+-- Zadania wsadowej oceny odpowiedzi przez AI (OpenAI Batch API)
+CREATE TABLE IF NOT EXISTS ai_batch_jobs (
+    id bigserial primary key,
+    recalculation_job_id bigint references recalculation_jobs(id) ON DELETE SET NULL,
+    openai_batch_id text not null,
+    input_file_id text not null,
+    output_file_id text,
+    status text not null default 'SUBMITTED' check (status in ('SUBMITTED', 'COMPLETED', 'FAILED')),
+    request_count integer not null default 0,
+    ingested_count integer not null default 0,
+    failed_count integer not null default 0,
+    error text,
+    created_at timestamp with time zone default now(),
+    completed_at timestamp with time zone
+);
+
+COMMENT ON TABLE ai_batch_jobs IS 'OpenAI batch jobs evaluating EVALUATION_BY_AI answers for large recalculations; results are ingested into ai_evaluation_cache';
+
+CREATE INDEX IF NOT EXISTS idx_ai_batch_jobs_submitted ON ai_batch_jobs(id) WHERE status = 'SUBMITTED';
+
+-- Zadanie przeliczania czeka na wyniki zadania wsadowego, po czym wraca do kolejki
+ALTER TABLE recalculation_jobs ADD COLUMN IF NOT EXISTS ai_batch_job_id bigint references ai_batch_jobs(id) ON DELETE SET NULL;
+
+ALTER TABLE recalculation_jobs DROP CONSTRAINT IF EXISTS recalculation_jobs_status_check;
+ALTER TABLE recalculation_jobs ADD CONSTRAINT recalculation_jobs_status_check
+    check (status in ('PENDING', 'RUNNING', 'WAITING_AI_BATCH', 'COMPLETED', 'FAILED', 'CANCELLED'));
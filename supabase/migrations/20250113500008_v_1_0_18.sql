@@ -0,0 +1,81 @@
+-- Kolejka wiadomości email wysyłanych przez cron/email_sender.py
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id bigserial primary key,
+    candidate_id bigint references candidates(id) ON DELETE CASCADE,
+    to_email text not null,
+    subject text not null,
+    body text not null,
+    content_type text not null default 'plain' check (content_type in ('plain', 'html')),
+    status text not null default 'PENDING' check (status in ('PENDING', 'SENDING', 'SENT', 'FAILED')),
+    attempts integer not null default 0,
+    next_attempt_at timestamp with time zone not null default now(),
+    locked_until timestamp with time zone,
+    last_error text,
+    created_at timestamp with time zone default now(),
+    sent_at timestamp with time zone
+);
+
+COMMENT ON TABLE email_outbox IS 'Transactional outbox of candidate emails, written together with the candidate update and drained by the email sender';
+
+CREATE INDEX IF NOT EXISTS idx_email_outbox_pending ON email_outbox(next_attempt_at) WHERE status IN ('PENDING', 'SENDING');
+
+-- Aktualizacja kandydata i dodanie wiadomości do kolejki w jednej transakcji
+-- p_updates: {"recruitment_status": "PO2", "access_token_po2": "...", ...} - klucze to nazwy kolumn tabeli candidates
+-- p_emails: [{"to_email": "...", "subject": "...", "body": "...", "content_type": "plain"}, ...]
+CREATE OR REPLACE FUNCTION update_candidate_and_enqueue_emails(
+    p_candidate_id bigint,
+    p_updates jsonb,
+    p_emails jsonb
+) RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    v_set text;
+    v_enqueued integer;
+BEGIN
+    SELECT string_agg(format('%I = r.%I', key, key), ', ')
+    INTO v_set
+    FROM jsonb_object_keys(p_updates) AS key;
+
+    IF v_set IS NOT NULL THEN
+        EXECUTE format(
+            'UPDATE candidates c SET %s FROM jsonb_populate_record(NULL::candidates, $1) r WHERE c.id = $2',
+            v_set
+        ) USING p_updates, p_candidate_id;
+    END IF;
+
+    INSERT INTO email_outbox (candidate_id, to_email, subject, body, content_type)
+    SELECT p_candidate_id,
+           e.value->>'to_email',
+           e.value->>'subject',
+           e.value->>'body',
+           COALESCE(e.value->>'content_type', 'plain')
+    FROM jsonb_array_elements(COALESCE(p_emails, '[]'::jsonb)) AS e(value);
+
+    GET DIAGNOSTICS v_enqueued = ROW_COUNT;
+    RETURN v_enqueued;
+END;
+$$;
+
+-- Przejęcie paczki wiadomości do wysłania. SKIP LOCKED pozwala uruchomić kilka nadawców
+-- równolegle; wiadomości przejęte przez nadawcę, który przestał działać, wracają po p_lock_seconds.
+CREATE OR REPLACE FUNCTION claim_email_outbox(
+    p_limit integer,
+    p_lock_seconds integer
+) RETURNS SETOF email_outbox LANGUAGE plpgsql AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE email_outbox o
+    SET status = 'SENDING',
+        attempts = o.attempts + 1,
+        locked_until = now() + make_interval(secs => p_lock_seconds)
+    WHERE o.id IN (
+        SELECT id
+        FROM email_outbox
+        WHERE (status = 'PENDING' AND next_attempt_at <= now())
+           OR (status = 'SENDING' AND locked_until < now())
+        ORDER BY id
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING o.*;
+END;
+$$;
@@ -0,0 +1,22 @@
+-- Zbiorcze przeniesienie kandydatów do następnego etapu: zmiany wszystkich kandydatów
+-- i ich wiadomości są zapisywane w jednej transakcji
+-- p_items: [{"candidate_id": 1, "updates": {...}, "emails": [{...}, ...]}, ...]
+CREATE OR REPLACE FUNCTION advance_candidates_and_enqueue_emails(
+    p_items jsonb
+) RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    v_item jsonb;
+    v_enqueued integer := 0;
+BEGIN
+    FOR v_item IN SELECT value FROM jsonb_array_elements(COALESCE(p_items, '[]'::jsonb))
+    LOOP
+        v_enqueued := v_enqueued + update_candidate_and_enqueue_emails(
+            (v_item->>'candidate_id')::bigint,
+            COALESCE(v_item->'updates', '{}'::jsonb),
+            v_item->'emails'
+        );
+    END LOOP;
+
+    RETURN v_enqueued;
+END;
+$$;
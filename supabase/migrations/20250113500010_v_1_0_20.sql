@@ -0,0 +1,36 @@
+-- Wersja HTML wiadomości wysyłana razem z treścią tekstową (multipart/alternative)
+ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS html_body text;
+
+CREATE OR REPLACE FUNCTION update_candidate_and_enqueue_emails(
+    p_candidate_id bigint,
+    p_updates jsonb,
+    p_emails jsonb
+) RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    v_set text;
+    v_enqueued integer;
+BEGIN
+    SELECT string_agg(format('%I = r.%I', key, key), ', ')
+    INTO v_set
+    FROM jsonb_object_keys(p_updates) AS key;
+
+    IF v_set IS NOT NULL THEN
+        EXECUTE format(
+            'UPDATE candidates c SET %s FROM jsonb_populate_record(NULL::candidates, $1) r WHERE c.id = $2',
+            v_set
+        ) USING p_updates, p_candidate_id;
+    END IF;
+
+    INSERT INTO email_outbox (candidate_id, to_email, subject, body, html_body, content_type)
+    SELECT p_candidate_id,
+           e.value->>'to_email',
+           e.value->>'subject',
+           e.value->>'body',
+           e.value->>'html_body',
+           COALESCE(e.value->>'content_type', 'plain')
+    FROM jsonb_array_elements(COALESCE(p_emails, '[]'::jsonb)) AS e(value);
+
+    GET DIAGNOSTICS v_enqueued = ROW_COUNT;
+    RETURN v_enqueued;
+END;
+$$;
@@ -0,0 +1,98 @@
+-- Strona listy kandydatów dostępnych dla użytkownika (przez grupy kampanii) w jednym zapytaniu.
+-- Filtry, wyszukiwanie, sortowanie i stronicowanie kursorem (keyset) są wykonywane po stronie bazy.
+-- p_after_id / p_after_value: pozycja ostatniego kandydata poprzedniej strony (ID i wartość kolumny sortowania)
+-- Kolejność NULL jest domyślna dla PostgreSQL: na końcu przy ASC, na początku przy DESC.
+CREATE OR REPLACE FUNCTION get_user_candidates(
+    p_user_id bigint,
+    p_campaign_codes text[],
+    p_statuses text[],
+    p_search text DEFAULT NULL,
+    p_sort_by text DEFAULT 'created_at',
+    p_sort_desc boolean DEFAULT true,
+    p_after_id bigint DEFAULT NULL,
+    p_after_value text DEFAULT NULL,
+    p_limit integer DEFAULT 100,
+    p_include_total boolean DEFAULT false
+) RETURNS TABLE (
+    id bigint,
+    campaign_id bigint,
+    first_name text,
+    last_name text,
+    email text,
+    phone text,
+    recruitment_status recruitment_status,
+    po1_score float,
+    po2_score float,
+    po2_5_score float,
+    po3_score float,
+    po4_score float,
+    total_score float,
+    created_at timestamp with time zone,
+    campaign_code text,
+    total_count bigint
+) LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    v_type text;
+    v_op text := CASE WHEN p_sort_desc THEN '<' ELSE '>' END;
+    v_direction text := CASE WHEN p_sort_desc THEN 'DESC' ELSE 'ASC' END;
+    v_keyset text := 'true';
+    v_pattern text := CASE WHEN COALESCE(p_search, '') <> '' THEN '%' || lower(p_search) || '%' END;
+BEGIN
+    v_type := CASE
+        WHEN p_sort_by = 'created_at' THEN 'timestamptz'
+        WHEN p_sort_by IN ('po1_score', 'po2_score', 'po2_5_score', 'po3_score', 'po4_score', 'total_score') THEN 'float8'
+        WHEN p_sort_by = 'recruitment_status' THEN 'recruitment_status'
+        WHEN p_sort_by IN ('first_name', 'last_name', 'email', 'phone') THEN 'text'
+    END;
+    IF v_type IS NULL THEN
+        RAISE EXCEPTION 'Nieprawidłowa kolumna sortowania: %', p_sort_by;
+    END IF;
+
+    IF p_after_id IS NOT NULL THEN
+        IF p_after_value IS NULL THEN
+            v_keyset := format('(c.%1$I IS NULL AND c.id %2$s $5)', p_sort_by, v_op);
+            IF p_sort_desc THEN
+                v_keyset := v_keyset || format(' OR c.%I IS NOT NULL', p_sort_by);
+            END IF;
+        ELSE
+            v_keyset := format(
+                'c.%1$I %2$s $6::%3$s OR (c.%1$I = $6::%3$s AND c.id %2$s $5)',
+                p_sort_by, v_op, v_type
+            );
+            IF NOT p_sort_desc THEN
+                v_keyset := v_keyset || format(' OR c.%I IS NULL', p_sort_by);
+            END IF;
+        END IF;
+    END IF;
+
+    RETURN QUERY EXECUTE format($query$
+        SELECT c.id, c.campaign_id, c.first_name, c.last_name, c.email, c.phone,
+               c.recruitment_status, c.po1_score, c.po2_score, c.po2_5_score,
+               c.po3_score, c.po4_score, c.total_score, c.created_at,
+               cp.code AS campaign_code,
+               CASE WHEN $8 THEN count(*) OVER () END AS total_count
+        FROM candidates c
+        JOIN campaigns cp ON cp.id = c.campaign_id
+        WHERE c.campaign_id IN (
+                SELECT lgc.campaign_id
+                FROM link_groups_users lgu
+                JOIN link_groups_campaigns lgc ON lgc.group_id = lgu.group_id
+                WHERE lgu.user_id = $1
+            )
+          AND cp.code = ANY($2)
+          AND c.recruitment_status::text = ANY($3)
+          AND ($4 IS NULL
+               OR c.first_name ILIKE $4
+               OR c.last_name ILIKE $4
+               OR c.email ILIKE $4
+               OR c.phone ILIKE $4)
+          AND (%1$s)
+        ORDER BY c.%2$I %3$s, c.id %3$s
+        LIMIT $7
+    $query$, v_keyset, p_sort_by, v_direction)
+    USING p_user_id, p_campaign_codes, p_statuses, v_pattern, p_after_id, p_after_value, p_limit, p_include_total;
+END;
+$$;
+
+-- Kandydaci kampanii dostępnych dla użytkownika (link_groups_campaigns jest indeksowana kluczem (group_id, campaign_id))
+CREATE INDEX IF NOT EXISTS idx_candidates_campaign_id ON candidates(campaign_id);
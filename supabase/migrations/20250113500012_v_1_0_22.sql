@@ -0,0 +1,118 @@
+-- Wyszukiwanie kandydatów indeksem trigramowym (pg_trgm).
+-- search_text łączy imię, nazwisko, email i telefon (małymi literami), a indeks GIN gin_trgm_ops
+-- obsługuje LIKE '%fraza%', więc wyszukiwanie nie wymaga pełnego przeglądu tabeli candidates.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE candidates ADD COLUMN IF NOT EXISTS search_text text
+    GENERATED ALWAYS AS (
+        lower(first_name || ' ' || last_name || ' ' || email || ' ' || COALESCE(phone, ''))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_candidates_search_text_trgm ON candidates USING gin (search_text gin_trgm_ops);
+
+-- Nowa kolumna wyniku (search_rank) wymaga ponownego utworzenia funkcji.
+-- p_sort_by = 'relevance' sortuje wyniki wyszukiwania wg podobieństwa (similarity) do frazy.
+DROP FUNCTION IF EXISTS get_user_candidates(bigint, text[], text[], text, text, boolean, bigint, text, integer, boolean);
+
+CREATE FUNCTION get_user_candidates(
+    p_user_id bigint,
+    p_campaign_codes text[],
+    p_statuses text[],
+    p_search text DEFAULT NULL,
+    p_sort_by text DEFAULT 'created_at',
+    p_sort_desc boolean DEFAULT true,
+    p_after_id bigint DEFAULT NULL,
+    p_after_value text DEFAULT NULL,
+    p_limit integer DEFAULT 100,
+    p_include_total boolean DEFAULT false
+) RETURNS TABLE (
+    id bigint,
+    campaign_id bigint,
+    first_name text,
+    last_name text,
+    email text,
+    phone text,
+    recruitment_status recruitment_status,
+    po1_score float,
+    po2_score float,
+    po2_5_score float,
+    po3_score float,
+    po4_score float,
+    total_score float,
+    created_at timestamp with time zone,
+    campaign_code text,
+    search_rank real,
+    total_count bigint
+) LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    v_type text;
+    v_sort_expr text;
+    v_op text := CASE WHEN p_sort_desc THEN '<' ELSE '>' END;
+    v_direction text := CASE WHEN p_sort_desc THEN 'DESC' ELSE 'ASC' END;
+    v_keyset text := 'true';
+    v_search text := NULLIF(lower(trim(COALESCE(p_search, ''))), '');
+    v_pattern text;
+BEGIN
+    v_pattern := '%' || v_search || '%';
+    -- Bez frazy wyszukiwania trafność nie jest określona
+    IF p_sort_by = 'relevance' AND v_search IS NULL THEN
+        p_sort_by := 'created_at';
+    END IF;
+
+    v_type := CASE
+        WHEN p_sort_by = 'relevance' THEN 'real'
+        WHEN p_sort_by = 'created_at' THEN 'timestamptz'
+        WHEN p_sort_by IN ('po1_score', 'po2_score', 'po2_5_score', 'po3_score', 'po4_score', 'total_score') THEN 'float8'
+        WHEN p_sort_by = 'recruitment_status' THEN 'recruitment_status'
+        WHEN p_sort_by IN ('first_name', 'last_name', 'email', 'phone') THEN 'text'
+    END;
+    IF v_type IS NULL THEN
+        RAISE EXCEPTION 'Nieprawidłowa kolumna sortowania: %', p_sort_by;
+    END IF;
+    v_sort_expr := CASE
+        WHEN p_sort_by = 'relevance' THEN 'similarity(c.search_text, $9)'
+        ELSE format('c.%I', p_sort_by)
+    END;
+
+    IF p_after_id IS NOT NULL THEN
+        IF p_after_value IS NULL THEN
+            v_keyset := format('(%1$s IS NULL AND c.id %2$s $5)', v_sort_expr, v_op);
+            IF p_sort_desc THEN
+                v_keyset := v_keyset || format(' OR %s IS NOT NULL', v_sort_expr);
+            END IF;
+        ELSE
+            v_keyset := format(
+                '%1$s %2$s $6::%3$s OR (%1$s = $6::%3$s AND c.id %2$s $5)',
+                v_sort_expr, v_op, v_type
+            );
+            IF NOT p_sort_desc THEN
+                v_keyset := v_keyset || format(' OR %s IS NULL', v_sort_expr);
+            END IF;
+        END IF;
+    END IF;
+
+    RETURN QUERY EXECUTE format($query$
+        SELECT c.id, c.campaign_id, c.first_name, c.last_name, c.email, c.phone,
+               c.recruitment_status, c.po1_score, c.po2_score, c.po2_5_score,
+               c.po3_score, c.po4_score, c.total_score, c.created_at,
+               cp.code AS campaign_code,
+               CASE WHEN $9 IS NOT NULL THEN similarity(c.search_text, $9) END AS search_rank,
+               CASE WHEN $8 THEN count(*) OVER () END AS total_count
+        FROM candidates c
+        JOIN campaigns cp ON cp.id = c.campaign_id
+        WHERE c.campaign_id IN (
+                SELECT lgc.campaign_id
+                FROM link_groups_users lgu
+                JOIN link_groups_campaigns lgc ON lgc.group_id = lgu.group_id
+                WHERE lgu.user_id = $1
+            )
+          AND cp.code = ANY($2)
+          AND c.recruitment_status::text = ANY($3)
+          AND ($9 IS NULL OR c.search_text LIKE $4)
+          AND (%1$s)
+        ORDER BY %2$s %3$s, c.id %3$s
+        LIMIT $7
+    $query$, v_keyset, v_sort_expr, v_direction)
+    USING p_user_id, p_campaign_codes, p_statuses, v_pattern, p_after_id, p_after_value, p_limit, p_include_total, v_search;
+END;
+$$;
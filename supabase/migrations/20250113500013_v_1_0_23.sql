@@ -0,0 +1,15 @@
+-- Indeksy najczęściej wykonywanych zapytań (plany przed i po: supabase/benchmark_indexes.sql)
+
+-- Wyszukiwanie kandydata po tokenie testu PO2/PO3 (strona testu kandydata)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_candidates_access_token_po2 ON candidates(access_token_po2) WHERE access_token_po2 IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_candidates_access_token_po3 ON candidates(access_token_po3) WHERE access_token_po3 IS NOT NULL;
+
+-- Wyszukiwanie kampanii po uniwersalnym tokenie ankiety PO1 nie wymaga indeksu - tabela campaigns jest mała
+-- i planista wybiera pełny przegląd także wtedy, gdy indeks istnieje
+
+-- Odpowiedzi kandydata z danego etapu (ocenianie testu, przeliczanie punktów) nie wymagają osobnego indeksu:
+-- obsługuje je indeks ograniczenia unikalności candidate_answers(candidate_id, question_id, stage)
+
+-- Kandydaci w trakcie rekrutacji przeglądani przez cron w kolejności ID (CRON_FULL_SCAN)
+CREATE INDEX IF NOT EXISTS idx_candidates_active ON candidates(id)
+    WHERE recruitment_status NOT IN ('REJECTED', 'REJECTED_CRITICAL', 'ACCEPTED', 'PO4');
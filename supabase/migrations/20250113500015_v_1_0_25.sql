@@ -0,0 +1,24 @@
+-- Znacznik needs_scoring ustawiany w tej samej transakcji co zapis odpowiedzi kandydata.
+-- Odpowiedzi z gotowym wynikiem (symulowane przez cron odpowiedzi EQ_EVALUATION) nie wymagają przeliczenia.
+CREATE OR REPLACE FUNCTION mark_candidates_for_scoring() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE candidates c
+    SET needs_scoring = true,
+        scoring_requested_at = now()
+    WHERE c.id IN (
+        SELECT DISTINCT a.candidate_id
+        FROM new_answers a
+        WHERE a.score IS NULL
+    );
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_candidate_answers_mark_for_scoring ON candidate_answers;
+
+CREATE TRIGGER trg_candidate_answers_mark_for_scoring
+    AFTER INSERT ON candidate_answers
+    REFERENCING NEW TABLE AS new_answers
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION mark_candidates_for_scoring();
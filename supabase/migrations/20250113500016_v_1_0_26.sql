@@ -0,0 +1,9 @@
+-- Czas ostatniego postępu zadania przeliczania. Zadanie RUNNING bez postępu dłużej niż
+-- CRON_JOB_TIMEOUT_SECONDS (np. po awarii procesu cron) może przejąć kolejne uruchomienie
+ALTER TABLE recalculation_jobs ADD COLUMN IF NOT EXISTS heartbeat_at timestamp with time zone;
+
+UPDATE recalculation_jobs
+SET heartbeat_at = started_at
+WHERE heartbeat_at IS NULL AND started_at IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_recalculation_jobs_running ON recalculation_jobs(heartbeat_at) WHERE status = 'RUNNING';
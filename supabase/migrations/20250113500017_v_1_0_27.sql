@@ -0,0 +1,36 @@
+-- Warunkowe zbiorcze przeniesienie kandydatów: każda pozycja p_items przekazuje status odczytany
+-- przed przygotowaniem zmian (expected_status). Kandydaci, których status zmienił się w międzyczasie
+-- (odrzuceni przez rekrutera lub przeniesieni już przez cron), nie są aktualizowani, a ich wiadomości
+-- nie trafiają do kolejki - funkcja zwraca ich ID w polu skipped.
+-- p_items: [{"candidate_id": 1, "expected_status": "PO1", "updates": {...}, "emails": [{...}, ...]}, ...]
+-- Wynik: {"enqueued": 2, "skipped": [3, 4]}
+DROP FUNCTION IF EXISTS advance_candidates_and_enqueue_emails(jsonb);
+
+CREATE FUNCTION advance_candidates_and_enqueue_emails(
+    p_items jsonb
+) RETURNS jsonb LANGUAGE plpgsql AS $$
+DECLARE
+    v_item jsonb;
+    v_result integer;
+    v_enqueued integer := 0;
+    v_skipped bigint[] := '{}';
+BEGIN
+    FOR v_item IN SELECT value FROM jsonb_array_elements(COALESCE(p_items, '[]'::jsonb))
+    LOOP
+        v_result := update_candidate_and_enqueue_emails(
+            (v_item->>'candidate_id')::bigint,
+            COALESCE(v_item->'updates', '{}'::jsonb),
+            v_item->'emails',
+            v_item->>'expected_status'
+        );
+
+        IF v_result IS NULL THEN
+            v_skipped := v_skipped || (v_item->>'candidate_id')::bigint;
+        ELSE
+            v_enqueued := v_enqueued + v_result;
+        END IF;
+    END LOOP;
+
+    RETURN jsonb_build_object('enqueued', v_enqueued, 'skipped', to_jsonb(v_skipped));
+END;
+$$;
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Moduły aplikacji importują się tak jak w app/app.py i w skryptach cron
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'app'))
+
+os.environ.setdefault('LOG_DIR', os.path.join(tempfile.gettempdir(), 'ai_rekruter_tests'))
+os.environ.setdefault('LOG_RETENTION_DAYS', '1')
+# Klient tworzony przy imporcie app/database.py nie łączy się z bazą - testy podmieniają go na FakeSupabase
+os.environ.setdefault('SUPABASE_URL', 'http://localhost:54321')
+os.environ.setdefault('SUPABASE_KEY', 'test.test.test')
+
+from common.config import Config
+from common.logger import Logger
+
+Logger.instance(Config.instance(), logFile='tests.log')
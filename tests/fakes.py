@@ -0,0 +1,168 @@
+import copy
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+
+class FakeQuery:
+    """Zapytanie PostgREST wykonywane na wierszach trzymanych w pamięci (FakeSupabase)"""
+
+    def __init__(self, db: 'FakeSupabase', table: str):
+        self.db = db
+        self.table = table
+        self.action = 'select'
+        self.payload = None
+        self.on_conflict = None
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.order_by: List[tuple] = []
+        self.row_limit: Optional[int] = None
+        self.count = None
+        self.single_row = False
+
+    # Operacje
+    def select(self, columns: str = '*', count: Optional[str] = None) -> 'FakeQuery':
+        self.count = count
+        return self
+
+    def insert(self, rows) -> 'FakeQuery':
+        self.action, self.payload = 'insert', rows
+        return self
+
+    def update(self, values: Dict[str, Any]) -> 'FakeQuery':
+        self.action, self.payload = 'update', values
+        return self
+
+    def upsert(self, rows, on_conflict: Optional[str] = None) -> 'FakeQuery':
+        self.action, self.payload, self.on_conflict = 'upsert', rows, on_conflict
+        return self
+
+    def delete(self) -> 'FakeQuery':
+        self.action = 'delete'
+        return self
+
+    # Filtry
+    def _filter(self, column: str, predicate: Callable[[Any], bool]) -> 'FakeQuery':
+        self.filters.append(lambda row: predicate(self._value(row, column)))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda current: current == value)
+
+    def neq(self, column, value):
+        return self._filter(column, lambda current: current != value)
+
+    def in_(self, column, values):
+        values = list(values)
+        return self._filter(column, lambda current: current in values)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda current: current is not None and current > value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda current: current is not None and current < value)
+
+    def is_(self, column, value):
+        expected = None if value in ('null', None) else value
+        return self._filter(column, lambda current: current is expected or current == expected)
+
+    def order(self, column: str, desc: bool = False) -> 'FakeQuery':
+        self.order_by.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> 'FakeQuery':
+        self.row_limit = count
+        return self
+
+    def single(self) -> 'FakeQuery':
+        self.single_row = True
+        return self
+
+    @staticmethod
+    def _value(row: Dict[str, Any], column: str) -> Any:
+        # Kolumny osadzonych tabel (np. question.algorithm_type) są słownikami w wierszu
+        value = row
+        for part in column.split('.'):
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+
+    def _matching(self) -> List[Dict[str, Any]]:
+        return [row for row in self.db.tables.setdefault(self.table, []) if all(f(row) for f in self.filters)]
+
+    def execute(self) -> SimpleNamespace:
+        rows = self.db.tables.setdefault(self.table, [])
+
+        if self.action == 'insert':
+            inserted = [self.db.add(self.table, row) for row in self._as_list(self.payload)]
+            return SimpleNamespace(data=copy.deepcopy(inserted), count=None)
+
+        if self.action == 'upsert':
+            key = self.on_conflict or self.db.primary_keys.get(self.table, 'id')
+            result = []
+            for row in self._as_list(self.payload):
+                existing = next((current for current in rows if current.get(key) == row.get(key)), None)
+                if existing is not None:
+                    existing.update(copy.deepcopy(row))
+                    result.append(existing)
+                else:
+                    result.append(self.db.add(self.table, row))
+            return SimpleNamespace(data=copy.deepcopy(result), count=None)
+
+        matching = self._matching()
+
+        if self.action == 'update':
+            for row in matching:
+                row.update(copy.deepcopy(self.payload))
+            return SimpleNamespace(data=copy.deepcopy(matching), count=None)
+
+        if self.action == 'delete':
+            self.db.tables[self.table] = [row for row in rows if row not in matching]
+            return SimpleNamespace(data=copy.deepcopy(matching), count=None)
+
+        for column, desc in reversed(self.order_by):
+            matching.sort(key=lambda row: (self._value(row, column) is None, self._value(row, column)), reverse=desc)
+        total = len(matching)
+        if self.row_limit is not None:
+            matching = matching[:self.row_limit]
+        data = copy.deepcopy(matching)
+        if self.single_row:
+            data = data[0] if data else None
+        return SimpleNamespace(data=data, count=total if self.count else None)
+
+    @staticmethod
+    def _as_list(rows) -> List[Dict[str, Any]]:
+        return rows if isinstance(rows, list) else [rows]
+
+
+class FakeSupabase:
+    """
+    Minimalny zamiennik klienta supabase do testów serwisów: tabele są listami słowników,
+    wartości domyślne kolumn podaje test (defaults), a funkcje RPC rejestruje w rpc_handlers.
+    """
+
+    def __init__(
+        self,
+        tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        defaults: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+        self.defaults = defaults or {}
+        self.primary_keys = {'ai_evaluation_cache': 'cache_key'}
+        self.rpc_handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self.rpc_calls: List[tuple] = []
+
+    def add(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        rows = self.tables.setdefault(table, [])
+        row = {**copy.deepcopy(self.defaults.get(table, {})), **copy.deepcopy(row)}
+        if self.primary_keys.get(table, 'id') == 'id' and 'id' not in row:
+            row['id'] = max((current.get('id') or 0 for current in rows), default=0) + 1
+        rows.append(row)
+        return row
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> SimpleNamespace:
+        self.rpc_calls.append((name, params))
+        handler = self.rpc_handlers[name]
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=handler(params)))
@@ -0,0 +1,103 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from common.ai_evaluation_cache import AIEvaluationCache
+from common.config import Config
+from common.openai_service import OpenAIService
+from cron.services.ai_batch_service import AIBatchService
+from tests.fakes import FakeSupabase
+
+QUESTION = {
+    'question_text': 'Opisz swoje doświadczenie',
+    'points': 5,
+    'answer_type': 'TEXT',
+    'algorithm_type': 'EVALUATION_BY_AI',
+    'algorithm_params': {'evaluation_focus': 'doświadczenie', 'scoring_criteria': 'konkretne przykłady'}
+}
+
+
+@pytest.fixture
+def config():
+    config = SimpleNamespace(**vars(Config.instance()))
+    config.LLM_PROVIDER = 'fake'
+    config.FAKE_LLM_LATENCY_SECONDS = 0
+    config.FAKE_LLM_ERROR_RATE = 0
+    config.OPENAI_JSON_MODE = False
+    config.CRON_BATCH_SIZE = 100
+    config.AI_BATCH_MAX_REQUESTS = 50000
+    return config
+
+
+@pytest.fixture
+def supabase():
+    return FakeSupabase({
+        'candidate_answers': [
+            {'id': 1, 'candidate_id': 10, 'answer': 'Pięć lat w logistyce', 'question': QUESTION},
+            {'id': 2, 'candidate_id': 11, 'answer': 'Pięć lat w logistyce', 'question': QUESTION},
+            {'id': 3, 'candidate_id': 11, 'answer': 'Kierowałem zespołem', 'question': QUESTION},
+        ],
+        'recalculation_jobs': [{'id': 7, 'status': 'RUNNING'}]
+    }, defaults={'ai_batch_jobs': {'status': 'SUBMITTED'}})
+
+
+@pytest.fixture
+def service(config, supabase):
+    openai_service = OpenAIService(config, evaluation_cache=AIEvaluationCache(supabase))
+    return AIBatchService(supabase, config, openai_service)
+
+
+def test_submit_and_ingest_writes_cache_and_requeues_job(service, supabase):
+    batch_job = service.submit([10, 11], recalculation_job_id=7)
+
+    # Identyczne odpowiedzi są wysyłane raz
+    assert batch_job['request_count'] == 2
+    supabase.tables['recalculation_jobs'][0]['status'] = 'WAITING_AI_BATCH'
+
+    service.process_submitted()
+
+    cache_rows = supabase.tables['ai_evaluation_cache']
+    assert len(cache_rows) == 2
+    assert {row['prompt_version'] for row in cache_rows} == {OpenAIService.PROMPT_VERSION}
+    assert all(0 <= row['score'] <= 5 for row in cache_rows)
+
+    stored = supabase.tables['ai_batch_jobs'][0]
+    assert stored['status'] == 'COMPLETED'
+    assert stored['ingested_count'] == 2
+    assert stored['failed_count'] == 0
+    assert supabase.tables['recalculation_jobs'][0]['status'] == 'PENDING'
+
+    # Ponowne przeliczenie korzysta z cache, więc nie ma już czego wysyłać
+    assert service.submit([10, 11], recalculation_job_id=7) is None
+
+
+def test_ingest_results_skips_failed_and_invalid_lines(service, supabase):
+    evaluation = {
+        'question_text': QUESTION['question_text'],
+        'answer_text': 'Pięć lat w logistyce',
+        'max_points': 5.0,
+        'algorithm_params': QUESTION['algorithm_params']
+    }
+    key = service.openai_service.cache_key(**evaluation)
+
+    def line(custom_id, status_code, content):
+        return json.dumps({
+            'custom_id': custom_id,
+            'response': {'status_code': status_code, 'body': {'choices': [{'message': {'content': content}}]}},
+            'error': None
+        })
+
+    output = '\n'.join([
+        line(f"{key}:5.0", 200, 'Ocena:\n```json\n{"score": 4, "explanation": "dobrze"}\n```'),
+        line("other:5.0", 500, ''),
+        line("too-high:5.0", 200, '{"score": 9, "explanation": "poza zakresem"}'),
+        ''
+    ])
+    client = service.openai_service.backend.client
+    output_file = client.files.create(file=('output.jsonl', output.encode('utf-8')), purpose='batch_output')
+
+    ingested, failed = service._ingest_results(output_file.id)
+
+    assert (ingested, failed) == (1, 2)
+    assert service.openai_service.evaluation_cache.get(key) == {'score': 4, 'explanation': 'dobrze'}
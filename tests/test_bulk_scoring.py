@@ -0,0 +1,134 @@
+import math
+import random
+from datetime import date
+
+import pytest
+
+from common.bulk_scoring import supports_bulk
+from common.scoring_rules import compile_rule
+from common import test_score_service
+
+ALGORITHMS = ('EXACT_MATCH', 'RANGE', 'LEFT_SIDED', 'RIGHT_SIDED', 'CENTER')
+
+NUMERIC_PARAMS = {
+    'typowe': {'min_value': '0', 'max_value': '10', 'correct_answer': '4'},
+    'przecinek dziesiętny': {'min_value': '1,5', 'max_value': '7,25', 'correct_answer': '3,3'},
+    # max == min == correct - skalowanie dzieliłoby przez zero
+    'max == min': {'min_value': '5', 'max_value': '5', 'correct_answer': '5'},
+    'correct na granicy': {'min_value': '0', 'max_value': '8', 'correct_answer': '8'},
+    'nieprawidłowe parametry': {'min_value': 'abc', 'max_value': '10', 'correct_answer': 'x'},
+}
+
+DATE_PARAMS = {
+    'typowe': {'min_value': '2024-01-01', 'max_value': '2024-12-31', 'correct_answer': '2024-03-15'},
+    'daty jako obiekty': {'min_value': date(2024, 1, 1), 'max_value': date(2024, 1, 31), 'correct_answer': date(2024, 1, 11)},
+    'max == min': {'min_value': '2024-05-05', 'max_value': '2024-05-05', 'correct_answer': '2024-05-05'},
+    'correct na granicy': {'min_value': '2024-01-01', 'max_value': '2024-01-09', 'correct_answer': '2024-01-01'},
+    'nieprawidłowe parametry': {'min_value': '2024-13-01', 'max_value': '2024-12-31', 'correct_answer': '2024-03-15'},
+}
+
+NUMERIC_ANSWERS = [
+    '0', '4', '10', '5', '-1', '11', '3,3', '1.5', '7.25', '4.0005', '3.999',
+    # Wyniki kończące się na 5 (np. 10 * 0.3 / 4 = 0.75) - zaokrąglenie jak round() z Pythona
+    '0.1', '0.3', '0.5', '2.6', '3.7', '0.45', '1.05', '2.25',
+    '', 'abc', 'nan', '1e400', '-inf', None, 7,
+]
+
+DATE_ANSWERS = [
+    '2024-01-01', '2024-12-31', '2024-03-15', '2024-03-14', '2024-03-16', '2023-12-31', '2025-01-01',
+    '2024-01-05', '2024-01-09', '2024-01-11', '2024-01-20', '2024-05-05', '2024-05-04', '2024-07-01',
+    '2024-02-30', '2024-1-5', '15.03.2024', '', None, 20240315,
+]
+
+
+def answers(values):
+    return [{'answer': value} for value in values] + [{}]
+
+
+def numeric_answers(seed):
+    # Losowe wartości z przedziału parametrów, także ze zbiorem wyników kończących się na 5
+    generator = random.Random(seed)
+    return answers(NUMERIC_ANSWERS + [str(round(generator.uniform(-2, 12), generator.randint(0, 4))) for _ in range(50)])
+
+
+def same_score(left, right):
+    return left == right or (math.isnan(left) and math.isnan(right))
+
+
+def assert_bulk_matches_single(question, question_answers):
+    service = test_score_service.TestScoreService(None, None)
+    rule = compile_rule(question)
+
+    bulk = service.calculate_scores_bulk(question, question_answers)
+    single = [service.calculate_score(answer, question, rule) for answer in question_answers]
+
+    mismatches = [
+        (answer.get('answer'), bulk_score, single_score)
+        for answer, bulk_score, single_score in zip(question_answers, bulk, single)
+        if not same_score(bulk_score, single_score)
+    ]
+    assert not mismatches
+
+
+@pytest.mark.parametrize('answer_type', ['SCALE', 'SALARY', 'NUMERIC'])
+@pytest.mark.parametrize('algorithm_type', ALGORITHMS)
+@pytest.mark.parametrize('params', NUMERIC_PARAMS.values(), ids=NUMERIC_PARAMS.keys())
+@pytest.mark.parametrize('points', [1, 3, 10])
+def test_numeric_bulk_scores_match_single_scores(answer_type, algorithm_type, params, points):
+    question = {
+        'id': 1, 'answer_type': answer_type, 'algorithm_type': algorithm_type,
+        'algorithm_params': params, 'points': points
+    }
+
+    assert_bulk_matches_single(question, numeric_answers(points))
+
+
+@pytest.mark.parametrize('algorithm_type', ALGORITHMS)
+@pytest.mark.parametrize('params', DATE_PARAMS.values(), ids=DATE_PARAMS.keys())
+@pytest.mark.parametrize('points', [1, 3, 7])
+def test_date_bulk_scores_match_single_scores(algorithm_type, params, points):
+    question = {
+        'id': 1, 'answer_type': 'DATE', 'algorithm_type': algorithm_type,
+        'algorithm_params': params, 'points': points
+    }
+
+    assert_bulk_matches_single(question, answers(DATE_ANSWERS))
+
+
+@pytest.mark.parametrize('answer_type, algorithm_type, params, values', [
+    ('TEXT', 'EXACT_MATCH', {'correct_answer': 'Tak '}, ['tak', 'TAK', 'nie', '', None]),
+    ('ABCDEF', 'EXACT_MATCH', {'correct_answer': 'B'}, ['b', 'A', '']),
+    ('BOOLEAN', 'EXACT_MATCH', {'correct_answer': 'true'}, ['true', 'True', 'false', '']),
+    ('NUMERIC', 'NO_ALGORITHM', {}, ['1', '2']),
+])
+def test_other_rules_fall_back_to_single_scores(answer_type, algorithm_type, params, values):
+    question = {
+        'id': 1, 'answer_type': answer_type, 'algorithm_type': algorithm_type,
+        'algorithm_params': params, 'points': 2
+    }
+
+    assert not supports_bulk(compile_rule(question))
+    assert_bulk_matches_single(question, answers(values))
+
+
+def test_rounding_of_x5_results_follows_python_round():
+    # Wynik równy odpowiedzi; dla tych wartości np.round(x, 1) daje inny wynik niż round(x, 1)
+    values = ['0.15', '0.35', '0.45', '1.05', '1.15', '4.35', '5.55', '6.65', '9.95']
+    question = {
+        'id': 1, 'answer_type': 'NUMERIC', 'algorithm_type': 'LEFT_SIDED',
+        'algorithm_params': {'min_value': '0', 'correct_answer': '10'}, 'points': 10
+    }
+
+    bulk = test_score_service.TestScoreService(None, None).calculate_scores_bulk(question, answers(values))
+
+    assert bulk == [0.1, 0.3, 0.5, 1.1, 1.1, 4.3, 5.5, 6.7, 9.9, 0.0]
+    assert_bulk_matches_single(question, answers(values))
+
+
+def test_zero_points_and_no_answers():
+    question = {'id': 1, 'answer_type': 'NUMERIC', 'algorithm_type': 'RANGE',
+                'algorithm_params': {'min_value': '0', 'max_value': '1'}, 'points': 0}
+    service = test_score_service.TestScoreService(None, None)
+
+    assert service.calculate_scores_bulk(question, answers(['1'])) == [0.0, 0.0]
+    assert service.calculate_scores_bulk({**question, 'points': 1}, []) == []
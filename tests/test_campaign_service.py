@@ -0,0 +1,19 @@
+from services import campaign_service
+from services.campaign_service import CampaignService
+from tests.fakes import FakeSupabase
+
+
+def test_edit_campaign_refreshes_cached_interview_template(monkeypatch):
+    db = FakeSupabase({'campaigns': [
+        {'id': 1, 'interview_email_subject': 'Stary temat', 'interview_email_content': 'Stara treść'}
+    ]})
+    monkeypatch.setattr(campaign_service, 'supabase', db)
+    assert CampaignService.get_interview_email_template(1)['subject'] == 'Stary temat'
+
+    CampaignService.edit_campaign(1, {
+        'code': 'C1',
+        'interview_email_subject': 'Nowy temat',
+        'interview_email_content': 'Nowa treść'
+    }, group_id=1)
+
+    assert CampaignService.get_interview_email_template(1) == {'subject': 'Nowy temat', 'content': 'Nowa treść'}
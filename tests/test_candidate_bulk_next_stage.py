@@ -0,0 +1,94 @@
+import pytest
+
+from services import candidate_service
+from services.candidate_service import CandidateService, CandidateException
+from tests.fakes import FakeSupabase
+
+
+CAMPAIGN = {'id': 1, 'code': 'C1', 'po1_test_id': 10, 'po2_test_id': 20, 'po3_test_id': 30}
+
+
+def candidate(candidate_id, status, **scores):
+    return {
+        'id': candidate_id, 'first_name': 'Jan', 'last_name': 'Kowalski', 'email': f'{candidate_id}@test.pl',
+        'campaign_id': 1, 'campaigns': CAMPAIGN, 'recruitment_status': status,
+        'po1_score': None, 'po2_score': None, 'po3_score': None, **scores
+    }
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeSupabase({
+        'candidates': [
+            candidate(1, 'PO1', po1_score=30),
+            candidate(2, 'PO1', po1_score=29),
+            candidate(3, 'PO1'),
+            candidate(4, 'PO2', po2_score=50),
+        ],
+        'tests': [{'id': 10, 'passing_threshold': 30}, {'id': 20, 'passing_threshold': 40}]
+    })
+    # Lista kandydatów z filtrami - jak get_user_candidates, bez kursora i sumy
+    db.rpc_handlers['get_user_candidates'] = lambda params: [
+        {**row, 'campaign_code': 'C1'} for row in db.tables['candidates']
+        if row['recruitment_status'] in params['p_statuses']
+    ]
+    db.concurrent_changes = {}
+    db.rpc_handlers['advance_candidates_and_enqueue_emails'] = lambda params: advance(db, params)
+    monkeypatch.setattr(candidate_service, 'supabase', db)
+    monkeypatch.setattr(CandidateService, '_build_test_email', staticmethod(lambda **kwargs: {'to_email': 'x'}))
+    return db
+
+
+def advance(db, params):
+    """Warunkowy zapis jak advance_candidates_and_enqueue_emails (v_1_0_27)"""
+    rows = {row['id']: row for row in db.tables['candidates']}
+    # Zmiany statusu wykonane między odczytem kandydatów a zapisem (rekruter, cron)
+    for candidate_id, status in db.concurrent_changes.items():
+        rows[candidate_id]['recruitment_status'] = status
+    enqueued, skipped = 0, []
+    for item in params['p_items']:
+        row = rows[item['candidate_id']]
+        if row['recruitment_status'] != item['expected_status']:
+            skipped.append(item['candidate_id'])
+            continue
+        row.update(item['updates'])
+        enqueued += len(item['emails'])
+    return {'enqueued': enqueued, 'skipped': skipped}
+
+
+def advanced_ids(db):
+    calls = [params for name, params in db.rpc_calls if name == 'advance_candidates_and_enqueue_emails']
+    return [item['candidate_id'] for params in calls for item in params['p_items']]
+
+
+def test_only_candidates_reaching_the_stage_threshold_are_moved(db):
+    result = CandidateService.bulk_move_to_next_stage(user_id=1, campaign_codes=['C1'], statuses=['PO1', 'PO2'])
+
+    assert advanced_ids(db) == [1, 4]
+    assert result['moved'] == 2
+    assert {item['id'] for item in result['skipped']} == {2, 3}
+
+
+def test_candidates_are_selected_by_filters_on_the_server(db):
+    CandidateService.bulk_move_to_next_stage(user_id=1, campaign_codes=['C1'], statuses=['PO2', 'REJECTED'])
+
+    _, params = db.rpc_calls[0]
+    assert params['p_statuses'] == ['PO2']
+    assert advanced_ids(db) == [4]
+
+
+def test_stage_filter_is_required(db):
+    with pytest.raises(CandidateException):
+        CandidateService.bulk_move_to_next_stage(user_id=1, campaign_codes=['C1'], statuses=['REJECTED'])
+
+
+def test_candidates_changed_during_the_move_are_not_overwritten(db):
+    db.concurrent_changes = {1: 'REJECTED'}
+
+    result = CandidateService.bulk_move_to_next_stage(user_id=1, campaign_codes=['C1'], statuses=['PO1', 'PO2'])
+
+    assert result['moved'] == 1
+    assert result['enqueued'] == 1
+    assert {item['id'] for item in result['skipped']} == {1, 2, 3}
+    assert db.tables['candidates'][0]['recruitment_status'] == 'REJECTED'
+    assert db.tables['candidates'][3]['recruitment_status'] == 'PO3'
@@ -0,0 +1,85 @@
+import pytest
+
+from services import candidate_service
+from services.candidate_service import CandidateService
+from tests.fakes import FakeSupabase
+
+
+def test_cursor_round_trip():
+    cursor = CandidateService._encode_cursor('po1_score', True, 12.5, 7)
+
+    assert CandidateService._decode_cursor(cursor, 'po1_score', True) == {'value': 12.5, 'id': 7}
+
+
+def test_cursor_keeps_null_sort_value():
+    cursor = CandidateService._encode_cursor('po1_score', False, None, 7)
+
+    assert CandidateService._decode_cursor(cursor, 'po1_score', False) == {'value': None, 'id': 7}
+
+
+@pytest.mark.parametrize('sort_by, descending', [('created_at', True), ('po1_score', False)])
+def test_cursor_of_other_sort_starts_from_first_page(sort_by, descending):
+    cursor = CandidateService._encode_cursor('po1_score', True, 12.5, 7)
+
+    assert CandidateService._decode_cursor(cursor, sort_by, descending) is None
+
+
+@pytest.mark.parametrize('cursor', [None, '', 'nie-kursor', 'e30='])
+def test_empty_or_broken_cursor_starts_from_first_page(cursor):
+    assert CandidateService._decode_cursor(cursor, 'created_at', True) is None
+
+
+def get_user_candidates(rows):
+    """
+    Odpowiednik get_user_candidates dla jednej kolumny float: kolejność jak ORDER BY w PostgreSQL
+    (NULL na końcu przy ASC i na początku przy DESC), a warunek kursora przepisany z migracji v_1_0_22.
+    """
+    def handler(params):
+        column, desc = params['p_sort_by'], params['p_sort_desc']
+        after_id, after_value = params['p_after_id'], params['p_after_value']
+        before = (lambda a, b: a > b) if desc else (lambda a, b: a < b)
+
+        def keyset(row):
+            value = row[column]
+            if after_id is None:
+                return True
+            if after_value is None:
+                return (value is None and before(after_id, row['id'])) or (desc and value is not None)
+            after = float(after_value)
+            return (value is not None and before(after, value)) \
+                or (value == after and before(after_id, row['id'])) \
+                or (not desc and value is None)
+
+        ordered = sorted(
+            (row for row in rows if keyset(row)),
+            key=lambda row: (row[column] is None, row[column] or 0, row['id']),
+            reverse=desc
+        )
+        return [{**row, 'campaign_code': 'C1'} for row in ordered[:params['p_limit']]]
+    return handler
+
+
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+def test_pages_cover_candidates_with_null_scores_once(monkeypatch, sort_order):
+    scores = [None, 10.0, None, 10.0, 5.0, None, 20.0]
+    rows = [{'id': i + 1, 'po1_score': score} for i, score in enumerate(scores)]
+    db = FakeSupabase()
+    db.rpc_handlers['get_user_candidates'] = get_user_candidates(rows)
+    monkeypatch.setattr(candidate_service, 'supabase', db)
+
+    seen = []
+    cursor = None
+    while True:
+        page = CandidateService.get_candidates(
+            user_id=1, campaign_codes=['C1'], statuses=['PO1'],
+            sort_by='po1_score', sort_order=sort_order, page_size=2, cursor=cursor
+        )
+        seen.extend((row['po1_score'], row['id']) for row in page['candidates'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    nulls = [(None, 1), (None, 3), (None, 6)]
+    values = [(5.0, 5), (10.0, 2), (10.0, 4), (20.0, 7)]
+    expected = values + nulls if sort_order == 'asc' else list(reversed(values + nulls))
+    assert seen == expected
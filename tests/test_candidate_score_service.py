@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+from common.config import Config
+from cron.services.candidate_score_service import CandidateScoreService
+from tests.fakes import FakeSupabase
+
+CAMPAIGN = {
+    'id': 1, 'po1_test_id': 1, 'po2_test_id': 2, 'po2_5_test_id': None, 'po3_test_id': 3,
+    'po1_test_weight': 1, 'po2_test_weight': 1, 'po2_5_test_weight': 0, 'po3_test_weight': 2
+}
+
+
+class FakeTestScoreService:
+    """Zwraca stały wynik testu PO3"""
+
+    def __init__(self, score):
+        self.score = score
+
+    def calculate_test_score(self, candidate_id, test_id, stage):
+        return {'score': self.score}
+
+
+@pytest.fixture
+def candidate():
+    return {
+        'id': 7, 'recruitment_status': 'PO3', 'campaign': CAMPAIGN,
+        'po1_score': 40, 'po2_score': 50, 'po2_5_score': None, 'po3_score': None, 'total_score': 45
+    }
+
+
+def service(db, score):
+    return CandidateScoreService(db, SimpleNamespace(**vars(Config.instance())), None, FakeTestScoreService(score))
+
+
+def database(candidate):
+    row = {key: value for key, value in candidate.items() if key != 'campaign'}
+    return FakeSupabase({'candidates': [row], 'tests': [{'id': 3, 'passing_threshold': 60}]})
+
+
+def test_po3_pass_saves_scores_and_po4_in_one_write(candidate):
+    db = database(candidate)
+
+    assert service(db, 70).calculate_candidate_scores(candidate) is True
+
+    saved = db.tables['candidates'][0]
+    assert saved['recruitment_status'] == 'PO4'
+    assert saved['po3_score'] == 70
+    assert saved['total_score'] == 57.5
+
+
+def test_po3_scores_are_not_saved_over_a_changed_status(candidate):
+    db = database(candidate)
+    db.tables['candidates'][0]['recruitment_status'] = 'REJECTED'
+
+    assert service(db, 70).calculate_candidate_scores(candidate) is False
+
+    saved = db.tables['candidates'][0]
+    assert saved['recruitment_status'] == 'REJECTED'
+    assert saved['po3_score'] is None
@@ -0,0 +1,64 @@
+import smtplib
+
+import pytest
+
+from cron import email_sender
+from tests.fakes import FakeSupabase
+
+
+class FakeEmailService:
+    """Wysyłka, która zawodzi dla wskazanych adresów"""
+
+    errors = {}
+    delivered = []
+
+    def __init__(self, config):
+        pass
+
+    def deliver_prepared(self, email):
+        error = self.errors.get(email['to_email'])
+        if error:
+            raise error
+        self.delivered.append(email['id'])
+
+
+@pytest.fixture
+def outbox_db(monkeypatch):
+    db = FakeSupabase({'email_outbox': [
+        {'id': 1, 'to_email': 'a@test.pl', 'subject': 's', 'body': 'b', 'attempts': 1, 'status': 'SENDING'},
+        {'id': 2, 'to_email': 'b@test.pl', 'subject': 's', 'body': 'b', 'attempts': 1, 'status': 'SENDING'},
+        {'id': 3, 'to_email': 'c@test.pl', 'subject': 's', 'body': 'b', 'attempts': 1, 'status': 'SENDING'},
+    ]})
+    batches = [list(db.tables['email_outbox'])]
+    db.rpc_handlers['claim_email_outbox'] = lambda params: batches.pop(0) if batches else []
+
+    monkeypatch.setattr(email_sender, 'create_client', lambda url, key: db)
+    monkeypatch.setattr(email_sender, 'EmailService', FakeEmailService)
+    FakeEmailService.errors = {}
+    FakeEmailService.delivered = []
+    return db
+
+
+def statuses(db):
+    return {row['id']: row['status'] for row in db.tables['email_outbox']}
+
+
+def test_smtp_error_text_is_stored_in_last_error(outbox_db):
+    FakeEmailService.errors = {'b@test.pl': smtplib.SMTPRecipientsRefused({'b@test.pl': (550, b'User unknown')})}
+
+    email_sender.main()
+
+    assert statuses(outbox_db) == {1: 'SENT', 2: 'PENDING', 3: 'SENT'}
+    failed = outbox_db.tables['email_outbox'][1]
+    assert failed['last_error'].startswith('SMTPRecipientsRefused')
+    assert 'User unknown' in failed['last_error']
+
+
+def test_each_message_is_marked_sent_before_the_next_one(outbox_db):
+    # Awaria procesu w trakcie paczki nie może cofnąć zapisu wysłanych już wiadomości
+    FakeEmailService.errors = {'c@test.pl': KeyboardInterrupt()}
+
+    with pytest.raises(KeyboardInterrupt):
+        email_sender.main()
+
+    assert statuses(outbox_db) == {1: 'SENT', 2: 'SENT', 3: 'SENDING'}
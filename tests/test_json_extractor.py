@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from common.json_extractor import JSONExtractor, extract_json
+
+
+def test_plain_object():
+    assert extract_json('{"score": 3, "explanation": "ok"}') == {'score': 3, 'explanation': 'ok'}
+
+
+def test_markdown_fence():
+    text = 'Oto ocena:\n```json\n{"score": 4, "explanation": "dobrze"}\n```\nDziękuję.'
+    assert extract_json(text) == {'score': 4, 'explanation': 'dobrze'}
+
+
+def test_prose_around_object():
+    text = 'Kandydat odpowiedział poprawnie. {"score": 5, "explanation": "pełna odpowiedź"} Koniec.'
+    assert extract_json(text, required_keys=('score', 'explanation'))['score'] == 5
+
+
+def test_trailing_commas():
+    text = '{"results": [{"id": 1, "score": 2,}, {"id": 2, "score": 1},],}'
+    assert extract_json(text) == {'results': [{'id': 1, 'score': 2}, {'id': 2, 'score': 1}]}
+
+
+def test_trailing_comma_inside_string_is_kept():
+    text = '{"score": 1, "explanation": "lista: a, ] b, } c",}'
+    assert extract_json(text)['explanation'] == 'lista: a, ] b, } c'
+
+
+def test_escaped_quotes_and_braces_in_string():
+    text = '{"score": 2, "explanation": "napisał \\"{nie wiem]\\" i zakończył"}'
+    assert extract_json(text)['explanation'] == 'napisał "{nie wiem]" i zakończył'
+
+
+def test_unbalanced_bracket_in_prose_before_object():
+    text = 'Ocena [skala 0-5: {"score": 3, "explanation": "ok"}'
+    assert extract_json(text, required_keys=('score', 'explanation')) == {'score': 3, 'explanation': 'ok'}
+
+
+def test_closed_non_json_brackets_before_object():
+    text = 'Uwagi [patrz punkt {a}] oraz wynik: {"score": 1, "explanation": "słabo"}'
+    assert extract_json(text, required_keys=('score',)) == {'score': 1, 'explanation': 'słabo'}
+
+
+def test_required_keys_skip_other_values():
+    text = '[1, 2] {"note": "x"} {"score": 0, "explanation": "brak"}'
+    assert extract_json(text, required_keys=('score', 'explanation'))['score'] == 0
+
+
+def test_missing_json_raises():
+    with pytest.raises(json.JSONDecodeError):
+        extract_json('Brak oceny [do uzupełnienia')
+
+
+def test_streamed_chunks():
+    extractor = JSONExtractor()
+    chunks = ['Wynik: {"sco', 're": 3, "expl', 'anation": "o}k"} i ', '{"score": 1, "explanation": "b"}']
+    values = [value for chunk in chunks for value in extractor.feed(chunk)] + extractor.finish()
+    assert values == [{'score': 3, 'explanation': 'o}k'}, {'score': 1, 'explanation': 'b'}]
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+from common.ai_evaluation_cache import AIEvaluationCache
+from common.config import Config
+from common.openai_service import OpenAIService
+from tests.fakes import FakeSupabase
+
+
+@pytest.fixture
+def config():
+    config = SimpleNamespace(**vars(Config.instance()))
+    config.LLM_PROVIDER = 'fake'
+    config.FAKE_LLM_LATENCY_SECONDS = 0
+    config.FAKE_LLM_ERROR_RATE = 0
+    config.OPENAI_JSON_MODE = False
+    config.AI_PACK_SIZE = 3
+    return config
+
+
+def make_evaluations(count):
+    return [
+        {
+            'question_text': f"Pytanie {number}",
+            'answer_text': f"Odpowiedź {number}",
+            'max_points': 5.0,
+            'algorithm_params': {'evaluation_focus': 'treść', 'scoring_criteria': 'poprawność'}
+        }
+        for number in range(count)
+    ]
+
+
+def test_packed_results_are_cached_under_packed_prompt_keys(config):
+    supabase = FakeSupabase()
+    service = OpenAIService(config, evaluation_cache=AIEvaluationCache(supabase))
+    evaluations = make_evaluations(3)
+
+    results = service.evaluate_answers_batch(evaluations)
+
+    assert all(result is not None for result in results)
+    rows = {row['cache_key']: row for row in supabase.tables['ai_evaluation_cache']}
+    for evaluation in evaluations:
+        packed_key = service.cache_key(**evaluation, prompt_version=OpenAIService.PACKED_PROMPT_VERSION)
+        assert rows[packed_key]['prompt_version'] == OpenAIService.PACKED_PROMPT_VERSION
+        # Ocena zbiorcza nie może być odczytana jako ocena z pojedynczego promptu
+        assert service.cache_key(**evaluation) not in rows
+        assert service.evaluate_answer(**evaluation) is not None
+
+    # Pojedyncze oceny są zapisane pod kluczami PROMPT_VERSION
+    single_rows = [row for row in supabase.tables['ai_evaluation_cache'] if row['prompt_version'] == OpenAIService.PROMPT_VERSION]
+    assert len(single_rows) == 3
+
+
+def test_packed_mode_reuses_cached_packed_and_single_results(config):
+    supabase = FakeSupabase()
+    service = OpenAIService(config, evaluation_cache=AIEvaluationCache(supabase))
+    evaluations = make_evaluations(4)
+
+    service.evaluate_answers_batch(evaluations[:3])
+    service.evaluate_answer(**evaluations[3])
+    cached_rows = len(supabase.tables['ai_evaluation_cache'])
+
+    results = service.evaluate_answers_batch(evaluations)
+
+    assert all(result is not None for result in results)
+    assert len(supabase.tables['ai_evaluation_cache']) == cached_rows
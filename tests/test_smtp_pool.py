@@ -0,0 +1,85 @@
+import smtplib
+from types import SimpleNamespace
+
+import pytest
+
+from common.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Połączenie SMTP, którego zachowanie ustawia test (FakeSMTP.script)"""
+
+    script = []
+    created = []
+
+    def __init__(self, host, port):
+        self.closed = False
+        self.send_errors = list(FakeSMTP.script.pop(0)) if FakeSMTP.script else []
+        FakeSMTP.created.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        if 'login' in self.send_errors:
+            raise smtplib.SMTPAuthenticationError(535, b'Authentication failed')
+
+    def send_message(self, msg):
+        error = self.send_errors.pop(0) if self.send_errors else None
+        if error and error != 'login':
+            raise error
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(smtplib, 'SMTP', FakeSMTP)
+    FakeSMTP.script = []
+    FakeSMTP.created = []
+    config = SimpleNamespace(
+        SMTP_SERVER='smtp.test', SMTP_PORT=587, SMTP_USERNAME='user', SMTP_PASSWORD='secret',
+        SMTP_POOL_SIZE=1, SMTP_MAX_MESSAGES_PER_CONNECTION=100, SMTP_IDLE_TIMEOUT_SECONDS=60
+    )
+    return SMTPConnectionPool(config)
+
+
+def test_connection_is_reused(pool):
+    pool.send_message(object())
+    pool.send_message(object())
+
+    assert len(FakeSMTP.created) == 1
+    assert len(pool._idle) == 1
+
+
+def test_disconnect_reconnects_and_resends(pool):
+    FakeSMTP.script = [[smtplib.SMTPServerDisconnected('closed')], []]
+
+    pool.send_message(object())
+
+    old, new = FakeSMTP.created
+    assert old.closed
+    assert [connection.smtp for connection in pool._idle] == [new]
+
+
+def test_failed_reconnect_does_not_return_closed_connection_to_pool(pool):
+    FakeSMTP.script = [[smtplib.SMTPServerDisconnected('closed')], ['login']]
+
+    with pytest.raises(smtplib.SMTPAuthenticationError):
+        pool.send_message(object())
+
+    assert pool._idle == []
+    assert all(connection.closed for connection in FakeSMTP.created)
+
+
+def test_rejected_message_keeps_connection(pool):
+    FakeSMTP.script = [[smtplib.SMTPRecipientsRefused({'a@b': (550, b'no such user')})]]
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send_message(object())
+
+    assert len(pool._idle) == 1